@@ -0,0 +1,223 @@
+"""
+Sérialisation des historiques de backtest renvoyés par l'API.
+
+Formats (en-tête Accept) :
+    application/json                      orjson si installé, json sinon
+    application/vnd.apache.arrow.stream   Arrow IPC (pyarrow, optionnel)
+    application/msgpack                   MessagePack (msgpack, optionnel)
+    application/x-ndjson                  NDJSON envoyé par blocs, une ligne par barre
+    text/event-stream                     SSE, un évènement par bloc de barres
+
+Les réponses NDJSON et SSE sont émises une fois le backtest terminé : seul l'envoi
+de l'historique est découpé, pas le calcul (les kernels remplissent l'historique
+en un appel).
+
+Dispositions JSON (paramètre layout) :
+    records   [{"value": ..., "cost": ..., ...}, ...] (format historique, par défaut)
+    columnar  {"columns": [...], "index": [...], "data": {colonne: [...]}}
+"""
+import json
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+JSON = "application/json"
+ARROW = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+NDJSON = "application/x-ndjson"
+SSE = "text/event-stream"
+
+# Barres sérialisées par bloc dans les réponses en flux
+STREAM_CHUNK_ROWS = 1000
+
+LAYOUTS = ("records", "columnar")
+
+# Types média reconnus -> format ; alias usuels inclus
+_MEDIA_TYPES = {
+    "application/json": JSON,
+    "application/*": JSON,
+    "*/*": JSON,
+    "application/vnd.apache.arrow.stream": ARROW,
+    "application/vnd.apache.arrow.file": ARROW,
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/x-ndjson": NDJSON,
+    "application/ndjson": NDJSON,
+    "text/event-stream": SSE,
+}
+
+_AVAILABLE = {JSON: True, ARROW: pa is not None, MSGPACK: msgpack is not None, NDJSON: True, SSE: True}
+
+
+def negotiate(accept: str | None) -> str:
+    """
+    Premier format de l'en-tête Accept disponible. JSON par défaut quand aucun type
+    reconnu n'est demandé (text/plain, text/html...) ; 406 seulement si les formats
+    demandés explicitement ne sont pas installés (pyarrow, msgpack).
+    """
+    if not accept:
+        return JSON
+    requested = []
+    for part in accept.split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = next((_quality(p[2:]) for p in params if p.startswith("q=")), 1.0)
+        if media.lower() in _MEDIA_TYPES and q > 0:
+            requested.append((q, _MEDIA_TYPES[media.lower()]))
+    if not requested:
+        return JSON
+    # Tri stable : à qualité égale, l'ordre de l'en-tête est conservé
+    for _, fmt in sorted(requested, key=lambda r: -r[0]):
+        if _AVAILABLE[fmt]:
+            return fmt
+    raise HTTPException(
+        status_code=406,
+        detail=f"Formats disponibles : {', '.join(f for f, ok in _AVAILABLE.items() if ok)}",
+    )
+
+
+def _quality(value: str) -> float:
+    """Paramètre q ; une valeur invalide est ignorée (qualité par défaut)."""
+    try:
+        return float(value)
+    except ValueError:
+        return 1.0
+
+
+def downsample(history: pd.DataFrame, max_points: int | None) -> pd.DataFrame:
+    """Garde au plus max_points lignes régulièrement espacées (première et dernière incluses)."""
+    n = len(history)
+    if not max_points or n <= max_points:
+        return history
+    if max_points == 1:
+        return history.iloc[[-1]]
+    rows = np.unique(np.linspace(0, n - 1, max_points).round().astype(np.intp))
+    return history.iloc[rows]
+
+
+def columnar(history: pd.DataFrame) -> dict[str, Any]:
+    """Colonnes en tableaux NumPy (sérialisés tels quels par orjson), index en dates ISO 8601."""
+    index = history.index
+    if isinstance(index, pd.DatetimeIndex):
+        index = np.datetime_as_string(index.to_numpy(dtype="datetime64[s]"), unit="s")
+    else:
+        index = np.asarray(index)
+    return {
+        "columns": [str(c) for c in history.columns],
+        "index": index.tolist(),
+        "data": {str(c): _column(history[c]) for c in history.columns},
+    }
+
+
+def render(history: pd.DataFrame, accept: str | None, layout: str = "records", max_points: int | None = None, meta: dict | None = None) -> Response:
+    """Réponse HTTP d'un historique de backtest ; meta est ajouté au premier niveau (ex: "meilleur")."""
+    fmt = negotiate(accept)
+    history = downsample(history, max_points)
+    meta = meta or {}
+
+    if fmt in (NDJSON, SSE):
+        return stream(history, fmt, meta)
+
+    if fmt == ARROW:
+        table = pa.Table.from_pandas(history, preserve_index=True)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **{k: str(v) for k, v in meta.items()}})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW)
+
+    if layout == "columnar":
+        payload = {**meta, **columnar(history)}
+    else:
+        payload = {**meta, "data": history.to_dict(orient="records")}
+
+    if fmt == MSGPACK:
+        return Response(content=msgpack.packb(_plain(payload), use_bin_type=True), media_type=MSGPACK)
+    return Response(content=dumps(payload), media_type=JSON)
+
+
+def stream(history: pd.DataFrame, fmt: str, meta: dict, chunk_rows: int | None = None) -> StreamingResponse:
+    """
+    Réponse découpée d'un historique déjà calculé : les barres sont sérialisées bloc
+    par bloc pendant l'envoi, sans construire la liste complète des lignes ni le JSON
+    complet en mémoire. Rien n'est émis pendant le backtest lui-même.
+
+    NDJSON : une ligne {"date": ..., colonnes...} par barre ; meta dans l'en-tête X-Backtest-Meta.
+    SSE : évènement "meta" (meta, colonnes, nombre de barres), puis un évènement "rows"
+    par bloc (tableau de lignes), puis "end".
+    """
+    chunk_rows = chunk_rows or STREAM_CHUNK_ROWS
+    header = {**meta, "columns": [str(c) for c in history.columns], "rows": len(history)}
+
+    def ndjson():
+        for rows in _rowChunks(history, chunk_rows):
+            yield b"".join(dumps(r) + b"\n" for r in rows)
+
+    def sse():
+        yield b"event: meta\ndata: " + dumps(header) + b"\n\n"
+        for rows in _rowChunks(history, chunk_rows):
+            yield b"event: rows\ndata: " + dumps(rows) + b"\n\n"
+        yield b"event: end\ndata: {}\n\n"
+
+    if fmt == SSE:
+        # Pas de mise en tampon par un éventuel reverse proxy (nginx)
+        return StreamingResponse(sse(), media_type=SSE, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    return StreamingResponse(ndjson(), media_type=NDJSON, headers={"X-Backtest-Meta": dumps(meta).decode()})
+
+
+def _rowChunks(history: pd.DataFrame, chunk_rows: int):
+    """Blocs de lignes {"date": ..., colonne: valeur} construits à partir des colonnes du bloc."""
+    names = ["date", *(str(c) for c in history.columns)]
+    for start in range(0, len(history), chunk_rows):
+        part = columnar(history.iloc[start:start + chunk_rows])
+        columns = [part["index"], *(_plain(v) if isinstance(v, np.ndarray) else v for v in part["data"].values())]
+        yield [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def dumps(payload: Any) -> bytes:
+    """JSON compact ; NaN -> null dans les deux implémentations."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_plain(payload), separators=(",", ":"), allow_nan=False).encode()
+
+
+def _column(series: pd.Series):
+    values = series.to_numpy()
+    if values.dtype.kind == "f":
+        return np.ascontiguousarray(values)
+    return values.tolist()
+
+
+def _plain(value):
+    """Tableaux NumPy -> listes Python, NaN -> None (json et msgpack)."""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return [None if _isnan(v) else v for v in value.tolist()]
+    if _isnan(value):
+        return None
+    return value
+
+
+def _isnan(value) -> bool:
+    return isinstance(value, float) and value != value
@@ -1,41 +1,157 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session
 
+from app.api.v1.backtestResponse import LAYOUTS, negotiate, render
 from app.core.database.database import get_db
 from app.domain.services.backtestService import BacktestService
 from app.domain.services.walletService import WalletService
 from app.domain.strategies.BaseParams import BaseParams
+from app.domain.strategies.SweepParams import SweepParams
+from app.infrastructure.cache.backtestResultCache import backtestResultCache
+from app.infrastructure.priceSource.databasePriceSource import DatabasePriceSource
+from app.infrastructure.priceSource.snapshotPriceSource import SnapshotPriceSource
+from app.domain.strategies.tradingUtils.Utils import TIMEFRAME_MINUTES
 from app.infrastructure.repository.candle.dailyCandleRepository import dailyCandleRepository
+from app.infrastructure.repository.candle.threeMinCandleRepository import threeMinCandleRepository
 from app.infrastructure.repository.walletRepository import WalletRepository
 from app.infrastructure.repository.userRepository import UserRepository
+from app.infrastructure.runners.backtestJobQueue import backtestJobQueue
+from app.infrastructure.store.priceSnapshotStore import priceSnapshotStore
 
 router = APIRouter(prefix="/strategy", tags=["Strategy"])
 
 def get_daily_candle_repo(db: Session = Depends(get_db)):
     return dailyCandleRepository(db)
 
-def backtestService(db: Session = Depends(get_db)):
-    dailyCandleRepo = dailyCandleRepository(db)
+def price_source(db: Session = Depends(get_db)):
+    # Snapshots mappés en mémoire quand ils sont configurés, lecture en base sinon
+    # 15m, 1h et 4h sont agrégés à la volée depuis les bougies 3m
+    repositories = {"1d": dailyCandleRepository(db), "3m": threeMinCandleRepository(db)}
+    if priceSnapshotStore is not None:
+        return SnapshotPriceSource(priceSnapshotStore, repositories)
+    return DatabasePriceSource(repositories)
+
+def backtestService(db: Session = Depends(get_db), priceSource = Depends(price_source)):
     walletRepo = WalletRepository(db)
     userRepo = UserRepository(db)
     walletService = WalletService(walletRepo)
-    return BacktestService(dailyCandleRepo=dailyCandleRepo, walletService=walletService, userRepo=userRepo)
+    return BacktestService(
+        priceSource=priceSource,
+        walletService=walletService,
+        userRepo=userRepo,
+        jobQueue=backtestJobQueue,
+        resultCache=backtestResultCache,
+    )
+
+def job_queue():
+    return backtestJobQueue
+
+def check_timeframe(timeframe: str = "1d") -> str:
+    if timeframe not in TIMEFRAME_MINUTES:
+        raise HTTPException(status_code=400, detail=f"Timeframe non supporté : {timeframe} ({', '.join(TIMEFRAME_MINUTES)})")
+    return timeframe
+
+
+def strategy_meta(strategy_name: str, result_df) -> dict:
+    # constant_mix compare plusieurs fréquences de rééquilibrage et indique la meilleure
+    if strategy_name == "constant_mix":
+        return {"meilleur": result_df.attrs.get('best_mode')}
+    return {}
+
+def job_meta(job) -> dict:
+    # Dates en ISO 8601 : meta est aussi sérialisé par json (sans orjson) et en en-tête NDJSON
+    dates = {name: getattr(job, name) for name in ("submitted_at", "started_at", "finished_at")}
+    return {
+        "job_id": job.id,
+        "strategy": job.strategy_name,
+        "status": job.status,
+        "progress": job.progress,
+        **{name: value.isoformat() if value is not None else None for name, value in dates.items()},
+        "error": job.error,
+    }
+
+def check_layout(layout: str = "records") -> str:
+    if layout not in LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"Layout non supporté : {layout} ({', '.join(LAYOUTS)})")
+    return layout
+
+
+@router.post("/jobs/{strategy_name}", status_code=202, response_model=None)
+def submit_strategy_job(
+        strategy_name: str,
+        userId: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        timeframe: str = Depends(check_timeframe),
+        service = Depends(backtestService)):
+    try:
+        job = service.submitStrategy(strategy_name, userId, start=start, end=end, timeframe=timeframe)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/jobs/{job_id}", response_model=None)
+def get_strategy_job(
+        job_id: str,
+        layout: str = Depends(check_layout),
+        max_points: Optional[int] = Query(default=None, ge=1),
+        accept: Optional[str] = Header(default=None),
+        queue = Depends(job_queue)):
+    negotiate(accept)
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    if job.result is None:
+        return job_meta(job)
+    # Job terminé : même rendu que le backtest synchrone, état du job en meta
+    meta = {**job_meta(job), **strategy_meta(job.strategy_name, job.result)}
+    return render(job.result, accept, layout=layout, max_points=max_points, meta=meta)
+
+
+@router.post("/{strategy_name}/sweep", response_model=None)
+def run_strategy_sweep(
+        strategy_name: str,
+        userId: int,
+        body: SweepParams,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        timeframe: str = Depends(check_timeframe),
+        service = Depends(backtestService)):
+    try:
+        table = service.runSweep(
+            strategy_name,
+            userId,
+            body.grid,
+            max_workers=body.max_workers,
+            rank_by=body.rank_by,
+            start=start,
+            end=end,
+            timeframe=timeframe,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # NaN -> None pour la sérialisation JSON des combinaisons en erreur
+    table = table.astype(object).where(table.notna(), None)
+    return {"rank_by": body.rank_by, "data": table.to_dict(orient="records")}
 
 
 @router.post("/{strategy_name}", response_model=None)
 def run_any_strategy(
         strategy_name: str,
         userId:int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        timeframe: str = Depends(check_timeframe),
+        layout: str = Depends(check_layout),
+        max_points: Optional[int] = Query(default=None, ge=1),
+        accept: Optional[str] = Header(default=None),
         service = Depends(backtestService)):
-    result_df = service.runStrategy(strategy_name, userId)
-    if(strategy_name != "constant_mix"):
-       response = {
-            "data": result_df.to_dict(orient="records")
-        } 
-    else:
-        response = {
-            "meilleur": result_df.attrs.get('best_mode'),
-            "data": result_df.to_dict(orient="records")
-        }
-    return response
+    # Format négocié avant le calcul : un Accept non servi ne coûte pas un backtest
+    negotiate(accept)
+    result_df = service.runStrategy(strategy_name, userId, start=start, end=end, timeframe=timeframe)
+    return render(result_df, accept, layout=layout, max_points=max_points, meta=strategy_meta(strategy_name, result_df))
 
@@ -4,7 +4,8 @@ from sqlalchemy.orm import Session
 from app.core.database.database import get_db
 from app.domain.services.candle.dailyCandleService import dailyCandleService
 from app.domain.services.candle.threeMinCandleService import threeMinutesCandleService
-from app.infrastructure.adapters.binanceCandleAdapter import binanceCandleAdapter
+from app.infrastructure.adapters.binanceCandleAdapter import candleProvider
+from app.infrastructure.store.priceSnapshotStore import priceSnapshotStore
 
 from app.infrastructure.repository.candle.dailyCandleRepository import dailyCandleRepository
 from app.infrastructure.repository.candle.threeMinCandleRepository import threeMinCandleRepository
@@ -17,20 +18,22 @@ def candle1d_service(db:Session = Depends(get_db)) -> dailyCandleService:
     return dailyCandleService(
         dailyCandleRepository(db),
         CryptoRepository(),
-        binanceCandleAdapter()
+        candleProvider,
+        snapshotStore=priceSnapshotStore
     )
 
 def candle3m_service(db:Session = Depends(get_db)) -> threeMinutesCandleService:
     return threeMinutesCandleService(
         threeMinCandleRepository(db),
         CryptoRepository(),
-        binanceCandleAdapter()
+        candleProvider,
+        snapshotStore=priceSnapshotStore
     )
 
 @router.get("/getTwoYearsCandles")
 async def getTwoYearsCandles(service: dailyCandleService = Depends(candle1d_service)):
     try:
-        return await service.syncPeriod(730)
+        return await service.backfillPeriod(730)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
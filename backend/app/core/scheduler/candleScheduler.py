@@ -2,16 +2,17 @@ from fastapi_utils.tasks import repeat_every
 
 from app.core.database.database import SessionLocal
 from app.domain.services.candle.baseCandleService import baseCandleService
-from app.infrastructure.adapters.binanceCandleAdapter import binanceCandleAdapter
+from app.infrastructure.adapters.binanceCandleAdapter import candleProvider
 from app.infrastructure.repository.candle.dailyCandleRepository import dailyCandleRepository
 from app.infrastructure.repository.candle.threeMinCandleRepository import threeMinCandleRepository
 from app.infrastructure.repository.cryptoRepository import CryptoRepository
+from app.infrastructure.store.priceSnapshotStore import priceSnapshotStore
 
 
 def registerCandleScheduler(app):
 
     crypto_repo = CryptoRepository()
-    candle_provider = binanceCandleAdapter()
+    candle_provider = candleProvider
 
     def get_daily_service():
         db = SessionLocal()
@@ -21,7 +22,8 @@ def registerCandleScheduler(app):
             cryptoRepo=crypto_repo,
             binanceAdapter=candle_provider,
             timeframe="1d",
-            retention_days=730
+            retention_days=730,
+            snapshotStore=priceSnapshotStore
         )
 
     def get_3min_service():
@@ -32,7 +34,8 @@ def registerCandleScheduler(app):
             cryptoRepo=crypto_repo,
             binanceAdapter=candle_provider,
             timeframe="3m",
-            retention_days=2
+            retention_days=2,
+            snapshotStore=priceSnapshotStore
         )
 
     # @app.on_event("startup")
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+
+class JobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class BacktestJob:
+    """Backtest exécuté en arrière-plan ; result est l'historique renvoyé par le runner."""
+    id: str
+    strategy_name: str
+    user_id: int
+    status: str = JobStatus.PENDING
+    submitted_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def progress(self) -> float:
+        """Avancement par étape : le runner ne remonte pas d'avancement intermédiaire."""
+        return 1.0 if self.status in (JobStatus.DONE, JobStatus.FAILED) else 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
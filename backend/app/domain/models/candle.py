@@ -10,3 +10,20 @@ class Candle:
     high: float
     low: float
     close: float
+
+
+@dataclass
+class CandleFetchReport:
+    """Complétude d'un téléchargement de bougies pour un symbole."""
+    symbol: str
+    interval: str
+    expected: int
+    received: int
+
+    @property
+    def missing(self) -> int:
+        return max(self.expected - self.received, 0)
+
+    @property
+    def complete(self) -> bool:
+        return self.received >= self.expected
@@ -6,7 +6,23 @@ from typing import Dict, List
 class ICandlePort(ABC):
 
     @abstractmethod
-    async def saveCandles(self, symbol: str, candles: List[Dict]):
+    async def saveCandles(self, symbol: str, candles: List[Dict]) -> int:
+        pass
+
+    @abstractmethod
+    async def stageCandles(self, symbol: str, candles: List[Dict]) -> int:
+        pass
+
+    @abstractmethod
+    async def mergeStagedCandles(self) -> Dict[str, int]:
+        pass
+
+    @abstractmethod
+    async def purgeOlderThan(self, cutoff: datetime) -> int:
+        pass
+
+    @abstractmethod
+    async def getLatestOpenTimes(self, symbols: List[str] | None = None) -> Dict[str, datetime]:
         pass
 
     # @abstractmethod
@@ -0,0 +1,24 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+import pandas as pd
+
+
+class IPriceSourcePort(ABC):
+    """Côté lecture des bougies pour les backtests : matrices de clôtures (dates x symboles)."""
+
+    @abstractmethod
+    def getPriceMatrix(
+        self,
+        symbols: Optional[Iterable[str]],
+        timeframe: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def getVersion(self, timeframe: str) -> Any:
+        """Identifie l'état des données d'un timeframe (change quand de nouvelles bougies arrivent)."""
+        pass
@@ -1,52 +1,182 @@
+from datetime import datetime
+
 import pandas as pd
 from fastapi import Depends
 from sqlalchemy.orm import Session
 
 from app.core.database.database import get_db
+from app.domain.models.backtestJob import BacktestJob
 from app.domain.port.candlePort import ICandlePort
+from app.domain.port.priceSourcePort import IPriceSourcePort
 from app.domain.port.walletPort import IWalletPort
 from app.domain.services import walletService
 from app.domain.services.walletService import WalletService
 from app.domain.strategies.constantMix.constantMixParams import ConstantMixParams
+from app.domain.strategies.tradingUtils.Utils import timeframe_periods_per_year, wallet_items_to_holdings
+from app.infrastructure.cache.backtestResultCache import BacktestResultCache
 from app.infrastructure.repository import walletRepository
-from app.infrastructure.repository.candle.dailyCandleRepository import dailyCandleRepository
 from app.infrastructure.repository.walletRepository import WalletRepository
 from app.infrastructure.repository.userRepository import UserRepository
 from app.infrastructure.runners.StrategyFactory import StrategyFactory
+from app.infrastructure.runners.backtestJobQueue import BacktestJobQueue
+from app.infrastructure.runners.parameterSweep import ParameterSweep
 from app.tradingutils.platform_fees_loader import get_fee_rate, get_slippage_rate
 
 class BacktestService:
-    def __init__(self, dailyCandleRepo: dailyCandleRepository, walletService: WalletService, userRepo: UserRepository):
-        self.dailyCandleRepository = dailyCandleRepo
+    def __init__(
+        self,
+        priceSource: IPriceSourcePort,
+        walletService: WalletService,
+        userRepo: UserRepository,
+        timeframe: str = "1d",
+        jobQueue: BacktestJobQueue | None = None,
+        resultCache: BacktestResultCache | None = None,
+    ):
+        self.priceSource = priceSource
         self.walletService = walletService
         self.userRepo = userRepo
+        self.timeframe = timeframe
+        self.jobQueue = jobQueue
+        self.resultCache = resultCache
+
+    def runStrategy(
+        self,
+        strategy_name: str,
+        userId: int,
+        params=None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        timeframe: str | None = None,
+    ):
+        if self.resultCache is None:
+            runner, prices_df, wallet, run_kwargs = self._prepareRun(strategy_name, userId, start, end, timeframe)
+            return runner.run(prices_df, wallet, **run_kwargs)
+
+        # Le wallet et les paramètres sont résolus avant de lire les prix : un hit ne charge aucune bougie
+        runner, base_params, wallet, run_kwargs, symbols = self._resolveRun(strategy_name, userId)
+        timeframe = timeframe or self.timeframe
+        key = self._resultKey(strategy_name, base_params, wallet, symbols, start, end, timeframe)
+        result = self.resultCache.get(key)
+        if result is None:
+            result = runner.run(self._loadPrices(symbols, start, end, timeframe), wallet, **run_kwargs)
+            self.resultCache.put(key, result)
+        return result
+
+    def submitStrategy(
+        self,
+        strategy_name: str,
+        userId: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        timeframe: str | None = None,
+    ) -> BacktestJob:
+        """
+        Prépare les données dans la requête et confie le backtest à la file de jobs.
+        Avec un cache de résultats, un backtest déjà calculé donne un job terminé d'emblée
+        et le résultat d'un job est partagé avec runStrategy (même clé).
+        """
+        if self.resultCache is None:
+            _, prices_df, wallet, run_kwargs = self._prepareRun(strategy_name, userId, start, end, timeframe)
+            return self.jobQueue.submit(strategy_name, userId, prices_df, wallet, run_kwargs)
+
+        _, base_params, wallet, run_kwargs, symbols = self._resolveRun(strategy_name, userId)
+        timeframe = timeframe or self.timeframe
+        key = self._resultKey(strategy_name, base_params, wallet, symbols, start, end, timeframe)
+        result = self.resultCache.get(key)
+        if result is not None:
+            return self.jobQueue.record(strategy_name, userId, result)
+        prices_df = self._loadPrices(symbols, start, end, timeframe)
+        return self.jobQueue.submit(
+            strategy_name, userId, prices_df, wallet, run_kwargs, on_done=lambda result: self.resultCache.put(key, result)
+        )
+
+    def _resultKey(self, strategy_name: str, base_params, wallet, symbols, start, end, timeframe: str) -> str:
+        """Clé du cache de résultats ; la version des données est lue avant les prix."""
+        return self.resultCache.key(
+            strategy_name,
+            base_params,
+            wallet,
+            self.priceSource.getVersion(timeframe),
+            symbols=symbols,
+            start=start,
+            end=end,
+            timeframe=timeframe,
+        )
+
+    def _prepareRun(self, strategy_name: str, userId: int, start, end, timeframe):
+        """Runner, prix filtrés, wallet et coûts plateforme d'un backtest."""
+        runner, _, wallet, run_kwargs, symbols = self._resolveRun(strategy_name, userId)
+        prices_df = self._loadPrices(symbols, start, end, timeframe)
+        return runner, prices_df, wallet, run_kwargs
+
+    def _resolveRun(self, strategy_name: str, userId: int):
+        """Runner, paramètres résolus, wallet, coûts plateforme et symboles nécessaires."""
+        wallet = self.walletService.getWalletByUserId(userId)
+        favorite_platform, fee_rate, slippage_rate = self._platformCosts(userId)
 
-    def runStrategy(self, strategy_name: str, userId: int, params=None):
-        candles = self.dailyCandleRepository.getAllCandles()
-        candles_list = [
-            {
-                "open_time": c.open_time,
-                "close": c.close,
-                "high": c.high,
-                "low": c.low,
-                "open": c.open,
-                "symbol": c.symbol,
-            }
-            for c in candles
-        ]
-        df = pd.DataFrame(candles_list)
-        df['open_time'] = pd.to_datetime(df['open_time'])
-        df.set_index('open_time', inplace=True)
-        prices_df = df.pivot(columns='symbol', values='close')
+        runner_cls = StrategyFactory.create(strategy_name)
+        runner = runner_cls()
+        base_params = runner.build_params(fee_rate=fee_rate, slippage=slippage_rate, favorite_platform=favorite_platform)
+        run_kwargs = {"fee_rate": fee_rate, "slippage": slippage_rate, "favorite_platform": favorite_platform}
+        return runner, base_params, wallet, run_kwargs, self._requiredSymbols(base_params, wallet)
+
+    def runSweep(
+        self,
+        strategy_name: str,
+        userId: int,
+        grid: dict,
+        max_workers: int | None = None,
+        rank_by: str = "sharpe",
+        start: datetime | None = None,
+        end: datetime | None = None,
+        timeframe: str | None = None,
+    ) -> pd.DataFrame:
+        """Grid search des paramètres d'une stratégie ; renvoie le tableau des métriques classé."""
+        timeframe = timeframe or self.timeframe
         wallet = self.walletService.getWalletByUserId(userId)
+        favorite_platform, fee_rate, slippage_rate = self._platformCosts(userId)
+
+        runner = StrategyFactory.create(strategy_name)()
+        base_params = runner.build_params(fee_rate=fee_rate, slippage=slippage_rate, favorite_platform=favorite_platform)
+        # Les poids cibles testés par la grille élargissent l'ensemble des symboles à charger
+        symbols = self._requiredSymbols(base_params, wallet, grid.get("target_weights", ()))
+        prices_df = self._loadPrices(symbols, start, end, timeframe)
+        sweep = ParameterSweep(
+            runner.strategy_cls, base_params, max_workers=max_workers, periods_per_year=timeframe_periods_per_year(timeframe)
+        )
+        return sweep.run(prices_df, wallet, grid, rank_by=rank_by)
+
+    def _loadPrices(
+        self,
+        symbols: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        timeframe: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Matrice de prix pivotée (dates x symboles) fournie par la source de prix, filtrée
+        à la source ; les timeframes non stockés (15m, 1h, 4h) sont agrégés depuis les bougies 3m.
+        """
+        return self.priceSource.getPriceMatrix(symbols, timeframe or self.timeframe, start=start, end=end)
 
+    @staticmethod
+    def _requiredSymbols(params, wallet, extra_weights=()) -> list[str] | None:
+        """
+        Symboles dont la stratégie a besoin : poids cibles non nuls et actifs détenus
+        (ces derniers doivent être valorisés, et vendus s'ils ne sont pas ciblés).
+        None (tous les symboles) si rien ne permet de restreindre la lecture.
+        """
+        symbols = set(wallet_items_to_holdings(wallet))
+        for weights in (getattr(params, "target_weights", None), *extra_weights):
+            if isinstance(weights, dict):
+                symbols.update(a for a, w in weights.items() if w > 0)
+        return sorted(symbols) or None
+
+    def _platformCosts(self, userId: int) -> tuple[str, float, float]:
         user = self.userRepo.get_by_id(userId)
         favorite_platform = user.favorite_platform if (user and user.favorite_platform) else "Binance"
         fee_rate = get_fee_rate(favorite_platform)
         # Le slippage sera calculé par asset dans chaque stratégie selon la catégorie
         # On garde un slippage de fallback pour compatibilité mais il sera ignoré par les stratégies modernes
         slippage_rate = get_slippage_rate(favorite_platform, "majors")  # Fallback si stratégie ne supporte pas slippage_map
-
-        runner_cls = StrategyFactory.create(strategy_name)
-        runner = runner_cls()
-        return runner.run(prices_df, wallet, fee_rate=fee_rate, slippage=slippage_rate, favorite_platform=favorite_platform)
+        return favorite_platform, fee_rate, slippage_rate
@@ -1,26 +1,72 @@
+import asyncio
+import functools
 from datetime import timedelta, timezone, datetime
 
+from app.domain.services.candle.candleIngestion import CandleIngestionPipeline
+
 
 class baseCandleService:
 
-    def __init__(self, candleRepo, cryptoRepo, binanceAdapter, timeframe: str, retention_days: int):
+    def __init__(self, candleRepo, cryptoRepo, binanceAdapter, timeframe: str, retention_days: int, snapshotStore=None):
         self.candleRepo = candleRepo
         self.cryptoRepo = cryptoRepo
         self.binanceAdapter = binanceAdapter
         self.timeframe = timeframe
         self.retention_days = retention_days
+        # Snapshot disque des matrices de prix (optionnel), tenu à jour après chaque écriture
+        self.snapshotStore = snapshotStore
 
     async def syncPeriod(self, period_days: int):
+        return await self._downloadPeriod(period_days, bulk=False)
+
+    async def backfillPeriod(self, period_days: int):
+        """
+        Variante de syncPeriod pour les gros historiques (nouveau symbole, nouveau timeframe) :
+        les bougies sont chargées par COPY dans une table temporaire puis fusionnées en une requête.
+        """
+        return await self._downloadPeriod(period_days, bulk=True)
+
+    async def _downloadPeriod(self, period_days: int, bulk: bool):
         symbols = await self.cryptoRepo.get_all_symbols()
 
         end = datetime.now(timezone.utc)
         start = end - timedelta(days=period_days)
 
-        for sym in symbols:
-            print(sym)
-            candles = self.binanceAdapter.fetchCandles(sym, start, end, self.timeframe)
-            print(candles)
-            await self.candleRepo.saveCandles(sym, candles)
+        # Seule la partie de la période absente de la base est téléchargée
+        ranges = await self._missingRanges(symbols, start, end)
+
+        if bulk:
+            pipeline = CandleIngestionPipeline(self.candleRepo, batch_size=50_000, write=self.candleRepo.stageCandles)
+        else:
+            pipeline = CandleIngestionPipeline(self.candleRepo)
+
+        # Téléchargement concurrent de tous les symboles (limité par l'adapter) ; les pages sont
+        # écrites en base par lots au fil de leur arrivée
+        async with pipeline:
+            reports = await asyncio.gather(
+                *(
+                    self.binanceAdapter.fetchCandlesReport(
+                        sym, sym_start, end, self.timeframe, on_page=functools.partial(pipeline.put, sym)
+                    )
+                    for sym, sym_start in ranges.items()
+                )
+            )
+
+        inserted_by_symbol = await self.candleRepo.mergeStagedCandles() if bulk else pipeline.inserted
+        if any(inserted_by_symbol.values()):
+            await asyncio.to_thread(self._refreshSnapshot, since=min(ranges.values()), cutoff=start)
+
+        completeness = {}
+        for sym, (_, report) in zip(ranges, reports):
+            inserted = inserted_by_symbol.get(sym, 0)
+            print(f"{sym} : {report.received}/{report.expected} bougies téléchargées, {inserted} insérées")
+            completeness[sym] = {
+                "expected": report.expected,
+                "received": report.received,
+                "inserted": inserted,
+                "complete": report.complete,
+            }
+        return completeness
 
     async def updateCandles(self):
         symbols = await self.cryptoRepo.get_all_symbols()
@@ -31,21 +77,74 @@ class baseCandleService:
         if self.timeframe.endswith("d"):
             now = datetime.now(timezone.utc).replace(minute=0,second=0, microsecond=0)
 
-        start = now - self._timeframe_to_delta()
+        # Depuis la dernière bougie stockée : rattrape aussi les trous laissés par un arrêt du service,
+        # dans la limite de la période de rétention
+        ranges = await self._missingRanges(symbols, now - timedelta(days=self.retention_days), now)
 
-        for sym in symbols:
-            try:
-                candles = self.binanceAdapter.fetchCandles(sym, start, now, self.timeframe)
+        results = await asyncio.gather(
+            *(self.binanceAdapter.fetchCandles(sym, sym_start, now, self.timeframe) for sym, sym_start in ranges.items()),
+            return_exceptions=True
+        )
 
-                if not candles:
+        written = []
+        for sym, candles in zip(ranges, results):
+            try:
+                if isinstance(candles, Exception) or not candles:
                     continue
 
                 await self.candleRepo.saveCandles(sym, candles)
-                await self.candleRepo.deleteOlderThan(sym, now - timedelta(days=self.retention_days))
+                written.append(ranges[sym])
 
             except Exception:
                 continue
 
+        # Rétention une fois par passage, pour tous les symboles (DROP de partitions en PostgreSQL)
+        try:
+            await self.candleRepo.purgeOlderThan(now - timedelta(days=self.retention_days))
+        except Exception as e:
+            print(f"Purge des bougies de plus de {self.retention_days} jours impossible : {e}")
+
+        if written:
+            await asyncio.to_thread(
+                self._refreshSnapshot, since=min(written), cutoff=now - timedelta(days=self.retention_days)
+            )
+
+    def _refreshSnapshot(self, since: datetime, cutoff: datetime):
+        """
+        Ajoute au snapshot disque les bougies écrites depuis since et applique la rétention.
+        Lectures en base et écritures disque synchrones : appelé hors de la boucle (to_thread).
+        """
+        if self.snapshotStore is None:
+            return
+        try:
+            self.snapshotStore.refresh(self.candleRepo, since=since)
+            self.snapshotStore.trimBefore(self.timeframe, cutoff)
+        except Exception as e:
+            # Le snapshot n'est qu'une copie de lecture : la base reste la référence
+            print(f"Mise à jour du snapshot {self.timeframe} impossible : {e}")
+
+    async def _missingRanges(self, symbols, start: datetime, end: datetime) -> dict[str, datetime]:
+        """
+        Début de la plage à télécharger pour chaque symbole : la bougie qui suit la
+        dernière stockée, sans remonter avant start. Les symboles à jour sont omis.
+        """
+        latest = await self.candleRepo.getLatestOpenTimes(symbols)
+        step = self._timeframe_to_delta()
+
+        ranges = {}
+        for sym in symbols:
+            last = latest.get(sym)
+            if last is None:
+                ranges[sym] = start
+                continue
+            if last.tzinfo is None:
+                # open_time est stocké sans fuseau, en UTC
+                last = last.replace(tzinfo=timezone.utc)
+            sym_start = max(start, last + step)
+            if sym_start <= end:
+                ranges[sym] = sym_start
+        return ranges
+
     def _timeframe_to_delta(self):
         if self.timeframe.endswith("d"):
             return timedelta(days=int(self.timeframe[:-1]))
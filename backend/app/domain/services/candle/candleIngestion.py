@@ -0,0 +1,79 @@
+import asyncio
+from collections import defaultdict
+
+from app.domain.port.candlePort import ICandlePort
+
+_DONE = object()
+
+
+class CandleIngestionPipeline:
+    """
+    Étape d'ingestion en flux entre le téléchargement et la base.
+
+    Les producteurs (une tâche de téléchargement par symbole) déposent les pages de
+    bougies dès leur réception dans une file bornée ; un consommateur unique les
+    regroupe par symbole et les écrit par lots de batch_size via saveCandles. La file
+    bornée applique une contre-pression sur le téléchargement si la base ne suit pas.
+
+    Par défaut les lots sont insérés via saveCandles ; write permet de brancher un autre
+    puits, par exemple stageCandles pour un backfill chargé par COPY.
+
+    Usage :
+        async with CandleIngestionPipeline(repo) as pipeline:
+            await pipeline.put("BTCEUR", page)
+        pipeline.inserted  # {symbole: nb de bougies écrites par write}
+    """
+
+    def __init__(self, candleRepo: ICandlePort, batch_size: int = 5000, max_pending_pages: int = 32, write=None):
+        self.candleRepo = candleRepo
+        self.write = write or candleRepo.saveCandles
+        self.batch_size = batch_size
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_pages)
+        self.inserted: dict[str, int] = defaultdict(int)
+        self._buffers: dict[str, list] = defaultdict(list)
+        self._error: BaseException | None = None
+        self._consumer: asyncio.Task | None = None
+
+    async def __aenter__(self):
+        self._consumer = asyncio.create_task(self._consume())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.queue.put(_DONE)
+        await self._consumer
+        if exc is None and self._error is not None:
+            raise self._error
+        return False
+
+    async def put(self, symbol: str, candles: list) -> None:
+        # Inutile de continuer à télécharger si l'écriture a échoué
+        if self._error is not None:
+            raise self._error
+        if candles:
+            await self.queue.put((symbol, candles))
+
+    async def _consume(self):
+        while True:
+            item = await self.queue.get()
+            if item is _DONE:
+                break
+            if self._error is not None:
+                continue  # on vide la file sans écrire pour débloquer les producteurs
+            symbol, candles = item
+            buffer = self._buffers[symbol]
+            buffer.extend(candles)
+            if len(buffer) >= self.batch_size:
+                await self._flush(symbol)
+
+        for symbol in list(self._buffers):
+            if self._error is None:
+                await self._flush(symbol)
+
+    async def _flush(self, symbol: str):
+        batch = self._buffers.pop(symbol, [])
+        if not batch:
+            return
+        try:
+            self.inserted[symbol] += await self.write(symbol, batch)
+        except Exception as e:
+            self._error = e
@@ -6,13 +6,14 @@ from app.domain.services.candle.baseCandleService import baseCandleService
 
 
 class dailyCandleService(baseCandleService):
-    def __init__(self, candleRepo, cryptoRepo, binanceAdapter):
+    def __init__(self, candleRepo, cryptoRepo, binanceAdapter, snapshotStore=None):
         super().__init__(
             candleRepo,
             cryptoRepo,
             binanceAdapter,
             timeframe="1d",
-            retention_days=730
+            retention_days=730,
+            snapshotStore=snapshotStore
         )
 
 
@@ -3,13 +3,14 @@ from app.infrastructure.models.candle.candleThreeMTable import CandleThreeMTable
 
 
 class threeMinutesCandleService(baseCandleService):
-    def __init__(self, candleRepo, cryptoRepo, binanceAdapter):
+    def __init__(self, candleRepo, cryptoRepo, binanceAdapter, snapshotStore=None):
         super().__init__(
             candleRepo,
             cryptoRepo,
             binanceAdapter,
             timeframe="3m",
-            retention_days=30
+            retention_days=30,
+            snapshotStore=snapshotStore
         )
 
     def getCandlesBySymbol(self, symbol: str):
@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class SweepParams(BaseModel):
+    grid: Dict[str, List[Any]]  # {"champ du dataclass de params": [valeurs à tester]}
+    max_workers: Optional[int] = Field(default=None, ge=1)
+    rank_by: str = "sharpe"
@@ -0,0 +1,270 @@
+import numpy as np
+
+from app.domain.strategies.tradingUtils.Broker import Broker
+from app.domain.strategies.tradingUtils.History import HistoryBuffer
+from app.domain.strategies.tradingUtils.Kernel import (
+    HAS_NUMBA,
+    KERNEL_OK,
+    compiled,
+    pay_trading_fees,
+    rebalance,
+    record,
+)
+
+# Taille max d'un bloc de barres évalué d'un coup entre deux rééquilibrages
+MAX_BLOCK = 65536
+
+
+def run_constant_mix_kernel(
+    broker: Broker,
+    target_weights: np.ndarray,
+    slippage: np.ndarray,
+    schedule: np.ndarray,
+    drift_threshold: float | None,
+    t_start: int = 1,
+) -> None:
+    """
+    Boucle constant-mix vectorisée par segments (sans numba ou en verbose ; sinon
+    run_constant_mix_modes passe par constant_mix_loop compilé).
+
+    Entre deux rééquilibrages les quantités sont fixes : la valeur et les poids de
+    tout un bloc de barres se calculent en une opération matricielle (px[bloc] @ qty).
+    On cherche dans le bloc la première barre déclenchante (calendrier `schedule`
+    ou drift >= drift_threshold), on enregistre d'un coup les barres qui précèdent,
+    et on ne repasse par le broker scalaire qu'au point de rééquilibrage.
+
+    Args:
+        broker: Broker déjà initialisé (holdings chargés, barre t_start - 1 enregistrée)
+        target_weights: Poids cibles alignés sur broker.assets
+        slippage: Slippage par actif aligné sur broker.assets
+        schedule: Masque booléen des barres de rééquilibrage calendaire (len = nb barres)
+        drift_threshold: Seuil de drift max déclenchant un rééquilibrage (None = désactivé)
+        t_start: Première barre à traiter
+    """
+    px = broker.px
+    n = len(px)
+    history = broker.history
+    block = 1
+    t = t_start
+    while t < n:
+        if schedule[t]:
+            c = broker.rebalance_array(t, target_weights, slippage)
+            broker.mark_to_market_array(t, extra_cost=c, target_weights=target_weights)
+            t += 1
+            continue
+
+        end = min(n, t + block)
+        values = px[t:end] * broker.qty
+        totals = values.sum(axis=1)
+        weights = np.zeros_like(values)
+        np.divide(values, totals[:, None], out=weights, where=(totals != 0.0)[:, None])
+        diffs = np.abs(weights - target_weights)
+        max_drift = diffs.max(axis=1)
+        l1_drift = diffs.sum(axis=1)
+
+        trigger = schedule[t:end].copy()
+        if drift_threshold is not None:
+            trigger |= max_drift >= drift_threshold
+        hits = np.flatnonzero(trigger)
+        stop = int(hits[0]) if hits.size else end - t
+
+        history.record_block(t, t + stop, totals[:stop], 0.0, broker.qty, max_drift[:stop], l1_drift[:stop])
+        t += stop
+
+        if hits.size:
+            c = broker.rebalance_array(t, target_weights, slippage)
+            broker.mark_to_market_array(t, extra_cost=c, target_weights=target_weights)
+            t += 1
+            # Taille du prochain bloc calée sur la longueur du segment observé
+            block = max(2 * stop, 1)
+        else:
+            block = min(2 * block, MAX_BLOCK)
+
+
+def run_constant_mix_modes(
+    template: Broker,
+    target_weights: np.ndarray,
+    slippage: np.ndarray,
+    schedules: dict[str, np.ndarray],
+    drift_threshold: float | None,
+    t_start: int = 1,
+) -> dict[str, HistoryBuffer]:
+    """
+    Plusieurs fréquences de rééquilibrage sur un même broker de départ.
+
+    Avec numba, un seul appel compilé traite tous les modes : masques calendaires
+    empilés (modes x barres), holdings et historiques en tableaux (modes x ...).
+    Sans numba (ou en verbose), chaque mode passe par la boucle par segments.
+
+    Args:
+        template: Broker initialisé (holdings, barres 0..t_start-1 enregistrées) ; non modifié
+        schedules: Masque de rééquilibrage calendaire par mode
+
+    Returns:
+        Historique par mode
+    """
+    modes = list(schedules)
+    if not (HAS_NUMBA and not template.verbose):
+        histories = {}
+        for mode in modes:
+            broker = _clone(template, t_start)
+            run_constant_mix_kernel(broker, target_weights, slippage, schedules[mode], drift_threshold, t_start)
+            histories[mode] = broker.history
+        return histories
+
+    # Barres courtes (3m, 15m...) : les rééquilibrages peuvent toucher presque chaque
+    # barre, la boucle compilée évite un aller-retour Python par rééquilibrage
+    m, (n, k) = len(modes), template.px.shape
+    head = template.history
+    value = np.empty((m, n))
+    cost = np.empty((m, n))
+    max_drift = np.full((m, n), np.nan)
+    l1_drift = np.full((m, n), np.nan)
+    positions = np.empty((m, k, n))
+    value[:, :t_start], cost[:, :t_start] = head.value[:t_start], head.cost[:t_start]
+    max_drift[:, :t_start], l1_drift[:, :t_start] = head.max_drift[:t_start], head.l1_drift[:t_start]
+    positions[:, :, :t_start] = head.positions[:, :t_start]
+    qty = np.tile(template.qty, (m, 1))
+    status = np.full(m, KERNEL_OK, dtype=np.int64)
+
+    constant_mix_modes_loop(
+        template.px,
+        target_weights,
+        slippage,
+        qty,
+        float(template.trade_cost.fee_rate),
+        float(template.trade_cost.fixed_fee),
+        template.asset_index.get("USDT", -1),
+        np.ascontiguousarray(np.stack([schedules[mode] for mode in modes]), dtype=np.bool_),
+        np.nan if drift_threshold is None else float(drift_threshold),
+        t_start,
+        value,
+        cost,
+        max_drift,
+        l1_drift,
+        positions,
+        status,
+    )
+    for i, t in enumerate(status):
+        if t != KERNEL_OK:
+            raise ValueError(
+                f"[{template.prices.index[t].date()}] Capital insuffisant pour payer les frais. "
+                f"Frais: {cost[i, t]:.2f}€, Capital: {value[i, t]:.2f}€"
+            )
+    index = template.prices.index
+    return {
+        mode: HistoryBuffer.from_columns(index, template.assets, value[i], cost[i], max_drift[i], l1_drift[i], positions[i])
+        for i, mode in enumerate(modes)
+    }
+
+
+def _clone(template: Broker, t_start: int) -> Broker:
+    """Broker qui reprend les holdings et les barres 0..t_start-1 du template (px partagé)."""
+    broker = Broker(prices=template.prices, trade_cost=template.trade_cost, verbose=template.verbose, px=template.px)
+    broker.qty[:] = template.qty
+    head = template.history
+    broker.history.record_block(
+        0,
+        t_start,
+        head.value[:t_start],
+        head.cost[:t_start],
+        head.positions[:, :t_start],
+        head.max_drift[:t_start],
+        head.l1_drift[:t_start],
+    )
+    return broker
+
+
+@compiled
+def constant_mix_loop(
+    px,
+    target,
+    slippage,
+    qty,
+    fee_rate,
+    fixed_fee,
+    usdt_idx,
+    schedule,
+    drift_threshold,
+    t_start,
+    value,
+    cost,
+    max_drift,
+    l1_drift,
+    positions,
+):
+    """
+    Boucle constant-mix barre par barre (compilée par numba), même logique que les
+    appels Broker.rebalance_array / mark_to_market_array de la version par blocs.
+    drift_threshold vaut NaN quand le déclenchement par drift est désactivé.
+
+    Returns:
+        KERNEL_OK, ou l'index de la barre où le capital ne suffit pas à payer les frais
+    """
+    n = px.shape[0]
+    use_drift = not np.isnan(drift_threshold)
+    for t in range(t_start, n):
+        px_t = px[t]
+        trigger = schedule[t]
+        if not trigger and use_drift:
+            values = qty * px_t
+            total = np.sum(values)
+            if total == 0.0:
+                weights = np.zeros_like(values)
+            else:
+                weights = values / total
+            trigger = np.max(np.abs(weights - target)) >= drift_threshold
+
+        c = 0.0
+        if trigger:
+            c = rebalance(px_t, qty, target, slippage, fee_rate, fixed_fee)
+            if not pay_trading_fees(px_t, qty, c, usdt_idx):
+                cost[t] = c
+                value[t] = np.sum(qty * px_t)
+                return t
+        record(t, px_t, qty, target, value, cost, max_drift, l1_drift, positions, c)
+    return KERNEL_OK
+
+
+@compiled
+def constant_mix_modes_loop(
+    px,
+    target,
+    slippage,
+    qty,
+    fee_rate,
+    fixed_fee,
+    usdt_idx,
+    schedules,
+    drift_threshold,
+    t_start,
+    value,
+    cost,
+    max_drift,
+    l1_drift,
+    positions,
+    status,
+):
+    """
+    constant_mix_loop pour plusieurs modes en un appel : ligne i de qty, schedules,
+    value, cost, max_drift, l1_drift et positions = mode i. status[i] reçoit le
+    statut de constant_mix_loop du mode i.
+    """
+    for i in range(schedules.shape[0]):
+        status[i] = constant_mix_loop(
+            px,
+            target,
+            slippage,
+            qty[i],
+            fee_rate,
+            fixed_fee,
+            usdt_idx,
+            schedules[i],
+            drift_threshold,
+            t_start,
+            value[i],
+            cost[i],
+            max_drift[i],
+            l1_drift[i],
+            positions[i],
+        )
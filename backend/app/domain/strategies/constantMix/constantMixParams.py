@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Tuple
 
 
 @dataclass
@@ -12,4 +12,5 @@ class ConstantMixParams:
     rebalance: str = "M"
     verbose: bool = False
     drift_threshold: float = 0
-    favorite_platform: str = "Binance"  # Plateforme pour calculer slippage par asset
\ No newline at end of file
+    favorite_platform: str = "Binance"  # Plateforme pour calculer slippage par asset
+    rebalance_modes: Tuple[str, ...] = ("W", "M")  # Modes comparés par run(), le meilleur CAGR est retenu
@@ -1,6 +1,7 @@
 from typing import Dict
 
 from app.domain.strategies.baseStrategy import BaseStrategy
+import numpy as np
 import pandas as pd
 from app.domain.strategies.tradingUtils.Broker import Broker, TradeCost
 from app.domain.strategies.tradingUtils.Utils import (
@@ -10,6 +11,9 @@ from app.domain.strategies.tradingUtils.Utils import (
     compute_cagr
 )
 from app.domain.strategies.constantMix.constantMixParams import ConstantMixParams
+from app.domain.strategies.constantMix.constantMixKernel import run_constant_mix_modes
+from app.tradingutils.platform_fees_loader import get_slippage_rate
+from app.tradingutils.symbol_category import get_symbol_category
 
 
 
@@ -23,69 +27,66 @@ class ConstantMixStrategy(BaseStrategy):
         self.params.target_weights = normalize_weights(self.params.target_weights)
 
     def _run_with_rebalance_mode(self, prices: pd.DataFrame, wallet: dict, mode: str) -> pd.DataFrame:
-        from copy import deepcopy
-        from app.tradingutils.symbol_category import get_symbol_category
-        from app.tradingutils.platform_fees_loader import get_slippage_rate
-        p = deepcopy(self.params)
-        p.rebalance = mode
+        return self.run_modes(prices, wallet, (mode,))[mode]
+
+    def run_modes(self, prices: pd.DataFrame, wallet: dict, modes=("W", "M")) -> Dict[str, pd.DataFrame]:
+        """
+        Backteste plusieurs fréquences de rééquilibrage (D, W, M, Q, nD) en une passe.
+
+        Tout ce qui ne dépend pas du mode est préparé une seule fois et partagé :
+        matrice de prix, déploiement initial, poids cibles, slippage par asset et
+        masques calendaires. Les modes passent ensuite ensemble dans le kernel
+        (un seul appel compilé sur les masques empilés, voir run_constant_mix_modes).
+        """
+        p = self.params
         cost = TradeCost(fee_rate=p.fee_rate, fixed_fee=p.fixed_fee, slippage=p.slippage)
-        broker = Broker(prices=prices, trade_cost=cost, verbose=p.verbose)
+        template = Broker(prices=prices, trade_cost=cost, verbose=p.verbose)
         t0 = 0
         p0 = prices.iloc[t0]
         wallet_holdings = wallet_items_to_holdings(wallet, quote="EUR")
-        for asset, qty in wallet_holdings.items():
-            if asset in broker.holdings:
-                broker.holdings[asset] = qty
-        initial_capital = compute_portfolio_value(broker.holdings, p0)
+        template.load_holdings(wallet_holdings)
+        initial_capital = compute_portfolio_value(template.holdings, p0)
         if initial_capital <= 0:
             raise ValueError("Wallet utilisateur vide ou prix manquants")
         if p.verbose:
-            print(f"\n[{prices.index[t0].date()}] Wallet initial chargé (mode {mode})")
+            print(f"\n[{prices.index[t0].date()}] Wallet initial chargé (modes {', '.join(modes)})")
             print(f"  Capital réel : {initial_capital:.2f} €")
             print("  Holdings    : " + ", ".join(
-                f"{a}={q:.6f}" for a, q in broker.holdings.items() if q > 0
+                f"{a}={q:.6f}" for a, q in template.holdings.items() if q > 0
             ))
         # Création de la slippage map par asset (avec fallback plateforme par défaut)
         favorite_platform = getattr(self.params, 'favorite_platform', 'Binance')
         slippage_map = {a: get_slippage_rate(favorite_platform, get_symbol_category(a)) for a in prices.columns}
         tw0 = self.target_weights(t0, prices)
-        c0 = broker.rebalance(t0, tw0, slippage_map=slippage_map)
-        broker.mark_to_market(t0, extra_cost=c0, target_weights=tw0)
-        for t in range(1, len(prices)):
-            tw = self.target_weights(t, prices)
-            cw = broker._current_weights(t)
-            max_drift = max(
-                abs(cw.get(a, 0.0) - tw.get(a, 0.0))
-                for a in prices.columns
-                if a in cw or a in tw
-            )
-            scheduled = self._is_rebalance_day(prices.index, t, p.rebalance)
-            drift_hit = (
-                p.drift_threshold is not None and max_drift >= p.drift_threshold
-            )
-            if scheduled or drift_hit:
-                # recalcul de la slippage map chaque pas au cas où portefeuille évolue
-                slippage_map = {a: get_slippage_rate(favorite_platform, get_symbol_category(a)) for a in prices.columns}
-                c = broker.rebalance(t, tw, slippage_map=slippage_map)
-                broker.mark_to_market(t, extra_cost=c, target_weights=tw)
-            else:
-                broker.mark_to_market(t, extra_cost=0.0, target_weights=tw)
-        hist = broker.get_history()
-        hist.attrs = {"rebalance_mode": mode}
-        return hist
+        # Poids cibles et slippage constants : alignés une fois sur les colonnes du broker
+        tw_vec = template.weights_vector(tw0)
+        slip_vec = template.slippage_vector(slippage_map)
+        schedules = self.rebalance_masks(prices.index, modes)
+
+        # Déploiement initial identique pour tous les modes
+        c0 = template.rebalance_array(t0, tw_vec, slip_vec)
+        template.mark_to_market_array(t0, extra_cost=c0, target_weights=tw_vec)
+        histories = run_constant_mix_modes(template, tw_vec, slip_vec, schedules, p.drift_threshold)
+
+        results = {}
+        for mode in modes:
+            hist = histories[mode].to_frame()
+            hist.attrs = {"rebalance_mode": mode}
+            results[mode] = hist
+        return results
 
     def run(self, prices: pd.DataFrame, wallet: dict) -> pd.DataFrame:
-        result_w = self._run_with_rebalance_mode(prices, wallet, "W")
-        result_m = self._run_with_rebalance_mode(prices, wallet, "M")
-        
+        results = self.run_modes(prices, wallet, self.params.rebalance_modes)
+
         # Calcul correct du CAGR en utilisant les dates réelles de l'index
         # au lieu de len(prices)/365 qui ignore les weekends et jours fériés
-        cagr_w = compute_cagr(result_w["value"], use_index=True)
-        cagr_m = compute_cagr(result_m["value"], use_index=True)
-        
-        best_mode = "W" if cagr_w >= cagr_m else "M"
-        best_df = result_w if cagr_w >= cagr_m else result_m
+        cagr_by_mode = {mode: compute_cagr(df["value"], use_index=True) for mode, df in results.items()}
+
+        # À CAGR égal, le premier mode de la liste l'emporte
+        best_mode = max(cagr_by_mode, key=cagr_by_mode.get)
+        best_df = results[best_mode]
         best_df.attrs['best_mode'] = best_mode
+        best_df.attrs['cagr_by_mode'] = cagr_by_mode
         return best_df
 
     def target_weights(self, t: int, prices: pd.DataFrame) -> Dict[str, float]:
@@ -96,26 +97,44 @@ class ConstantMixStrategy(BaseStrategy):
         return normalize_weights(tw)
 
     @staticmethod
-    def _is_rebalance_day(idx: pd.DatetimeIndex, t: int, mode: str) -> bool:
-        """Décide si on rééquilibre à la date t selon la fréquence choisie."""
-        if t == 0:
-            return False  # déploiement initial géré à part
-
-        mode = mode.upper()
-        if mode == "D":
-            return True
-        if mode == "W":
-            # nouveau numéro de semaine
-            return idx[t].isocalendar().week != idx[t - 1].isocalendar().week
-        if mode == "M":
-            # changement de mois
-            return (idx[t].month != idx[t - 1].month) or (idx[t].year != idx[t - 1].year)
-        if mode == "Q" or mode == "3M":
-            # changement de trimestre
-            return idx[t].to_period("Q") != idx[t - 1].to_period("Q")
-        # format "7D", "10D", ...
-        if mode.endswith("D") and mode[:-1].isdigit():
-            k = int(mode[:-1])
-            return (t % k) == 0
-        # par défaut: quotidien
-        return True
\ No newline at end of file
+    def rebalance_mask(idx: pd.DatetimeIndex, mode: str) -> np.ndarray:
+        """Masque booléen des barres de rééquilibrage calendaire d'un mode (D, W, M, Q, nD) ; jamais la barre 0."""
+        return ConstantMixStrategy.rebalance_masks(idx, (mode,))[mode]
+
+    @staticmethod
+    def rebalance_masks(idx: pd.DatetimeIndex, modes) -> Dict[str, np.ndarray]:
+        """Masques de rééquilibrage de plusieurs modes ; les champs calendaires sont extraits une seule fois."""
+        n = len(idx)
+        fields = {}
+
+        def changed(name: str, compute) -> np.ndarray:
+            if name not in fields:
+                values = compute()
+                mask = np.ones(n, dtype=bool)
+                mask[1:] = values[1:] != values[:-1]
+                fields[name] = mask
+            return fields[name].copy()
+
+        def elapsed_days() -> np.ndarray:
+            return (idx.normalize() - idx[0].normalize()).days.to_numpy()
+
+        masks = {}
+        for mode in modes:
+            key = mode.upper()
+            if key == "W":
+                mask = changed("week", lambda: idx.isocalendar().week.to_numpy())
+            elif key == "M":
+                mask = changed("month", lambda: idx.year.to_numpy() * 12 + idx.month.to_numpy())
+            elif key == "Q" or key == "3M":
+                mask = changed("quarter", lambda: idx.year.to_numpy() * 4 + (idx.month.to_numpy() - 1) // 3)
+            elif key.endswith("D") and key[:-1].isdigit():
+                # Tous les n jours écoulés depuis la première barre, quel que soit le timeframe
+                step = int(key[:-1])
+                mask = changed(f"{step}days", lambda: elapsed_days() // step)
+            else:
+                # "D" et par défaut : première barre de chaque jour calendaire
+                mask = changed("day", lambda: idx.normalize().asi8)
+            if n:
+                mask[0] = False  # déploiement initial géré à part
+            masks[mode] = mask
+        return masks
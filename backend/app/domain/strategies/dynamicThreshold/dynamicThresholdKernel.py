@@ -0,0 +1,87 @@
+import numpy as np
+
+from app.domain.strategies.tradingUtils.Kernel import KERNEL_OK, compiled, pay_trading_fees, rebalance, record
+
+
+@compiled
+def dynamic_threshold_kernel(
+    px,
+    thresholds,
+    target,
+    slippage,
+    qty,
+    fee_rate,
+    fixed_fee,
+    rebal_frac,
+    cooldown,
+    usdt_idx,
+    value,
+    cost,
+    max_drift,
+    l1_drift,
+    positions,
+):
+    """
+    Boucle path-dependent de DynamicThresholdStrategy sur des tableaux NumPy.
+
+    Args:
+        px: Prix (barres x actifs)
+        thresholds: Seuils de drift par barre et par actif (barres x actifs)
+        target: Poids cibles alignés sur les colonnes de px
+        slippage: Slippage par actif
+        qty: Holdings initiaux (modifiés en place)
+        fee_rate, fixed_fee: Paramètres de TradeCost
+        rebal_frac: Fraction de rééquilibrage (1.0 = complet)
+        cooldown: Nombre minimal de barres entre deux rééquilibrages
+        usdt_idx: Colonne de l'actif prioritaire pour les frais (-1 si absent)
+        value, cost, max_drift, l1_drift: Colonnes de sortie (len = nb barres)
+        positions: Positions de sortie (actifs x barres)
+
+    Returns:
+        (status, last_rebalance) : status vaut KERNEL_OK, ou l'index de la barre où
+        le capital ne suffit pas à payer les frais (cost/value de cette barre contiennent
+        alors les frais et le capital).
+    """
+    n = px.shape[0]
+
+    # Rééquilibrage initial (t0)
+    c = rebalance(px[0], qty, target, slippage, fee_rate, fixed_fee)
+    if not pay_trading_fees(px[0], qty, c, usdt_idx):
+        cost[0] = c
+        value[0] = np.sum(qty * px[0])
+        return 0, 0
+    record(0, px[0], qty, target, value, cost, max_drift, l1_drift, positions, c)
+    last_rebalance = 0
+
+    for t in range(1, n):
+        px_t = px[t]
+        values = qty * px_t
+        total = np.sum(values)
+        if total == 0.0:
+            weights = np.zeros_like(values)
+        else:
+            weights = values / total
+
+        should_rebalance = np.any(np.abs(weights - target) >= thresholds[t])
+        c = 0.0
+        if should_rebalance and t - last_rebalance >= cooldown:
+            if rebal_frac < 1.0:
+                # Rééquilibrage partiel : poids = actuel + frac * (cible - actuel), renormalisés
+                partial = weights + rebal_frac * (target - weights)
+                s = np.sum(partial)
+                if abs(s) < 1e-12:
+                    partial = np.zeros_like(partial)
+                else:
+                    partial = partial / s
+                c = rebalance(px_t, qty, partial, slippage, fee_rate, fixed_fee)
+            else:
+                c = rebalance(px_t, qty, target, slippage, fee_rate, fixed_fee)
+            if not pay_trading_fees(px_t, qty, c, usdt_idx):
+                cost[t] = c
+                value[t] = np.sum(qty * px_t)
+                return t, last_rebalance
+            last_rebalance = t
+
+        record(t, px_t, qty, target, value, cost, max_drift, l1_drift, positions, c)
+
+    return KERNEL_OK, last_rebalance
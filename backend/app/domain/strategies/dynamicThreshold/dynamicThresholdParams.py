@@ -12,7 +12,7 @@ class DynamicThresholdParams:
     verbose: bool = False
     
     # Paramètres de volatilité
-    vol_window: int = 40  # Fenêtre pour calculer la volatilité (jours)
+    vol_window: int = 40  # Fenêtre pour calculer la volatilité (jours, convertie en barres selon le timeframe)
     k: float = 0.20  # Facteur pour ajuster le seuil selon la volatilité
     
     # Paramètres du seuil dynamique
@@ -25,7 +25,7 @@ class DynamicThresholdParams:
     
     # Paramètres de rééquilibrage
     rebal_frac: float = 1.0  # Fraction de rééquilibrage (1.0 = complet, < 1.0 = partiel)
-    cooldown_days: int = 5  # Délai minimum entre deux rééquilibrages (jours)
+    cooldown_days: int = 5  # Délai minimum entre deux rééquilibrages (jours, converti en barres selon le timeframe)
     
     # Plateforme pour calcul des frais et slippage par asset
     favorite_platform: str = "Binance"
@@ -8,9 +8,16 @@ from app.domain.strategies.tradingUtils.Utils import (
     normalize_weights, 
     wallet_items_to_holdings,
     compute_portfolio_value,
+    days_to_bars,
+    infer_periods_per_year,
     moving_volatility
 )
 from app.domain.strategies.dynamicThreshold.dynamicThresholdParams import DynamicThresholdParams
+from app.domain.strategies.dynamicThreshold.dynamicThresholdKernel import dynamic_threshold_kernel
+from app.domain.strategies.tradingUtils.Kernel import KERNEL_OK
+from app.tradingutils.drift_threshold import get_drift_threshold
+from app.tradingutils.platform_fees_loader import get_slippage_rate
+from app.tradingutils.symbol_category import get_symbol_category
 
 
 class DynamicThresholdStrategy(BaseStrategy):
@@ -24,6 +31,13 @@ class DynamicThresholdStrategy(BaseStrategy):
         self.last_rebalance_day = 0  # Jour du dernier rééquilibrage
 
     def run(self, prices: pd.DataFrame, wallet: dict) -> pd.DataFrame:
+        # Le mode verbose garde la boucle Broker (logs détaillés) ; sinon kernel compilé
+        if self.params.verbose:
+            return self._run_with_broker(prices, wallet)
+        return self._run_with_kernel(prices, wallet)
+
+    def _init_broker(self, prices: pd.DataFrame, wallet: dict) -> tuple[Broker, dict[str, float]]:
+        """Crée le broker, charge le wallet utilisateur et construit la slippage map par asset."""
         p = self.params
         cost = TradeCost(fee_rate=p.fee_rate, fixed_fee=p.fixed_fee, slippage=p.slippage)
         broker = Broker(prices=prices, trade_cost=cost, verbose=p.verbose)
@@ -34,9 +48,7 @@ class DynamicThresholdStrategy(BaseStrategy):
 
         wallet_holdings = wallet_items_to_holdings(wallet, quote="EUR")
 
-        for asset, qty in wallet_holdings.items():
-            if asset in broker.holdings:
-                broker.holdings[asset] = qty
+        broker.load_holdings(wallet_holdings)
 
         initial_capital = compute_portfolio_value(broker.holdings, p0)
 
@@ -51,10 +63,51 @@ class DynamicThresholdStrategy(BaseStrategy):
             ))
 
         # Création de la slippage map par asset (selon catégorie de liquidité)
-        from app.tradingutils.symbol_category import get_symbol_category
-        from app.tradingutils.platform_fees_loader import get_slippage_rate
         favorite_platform = p.favorite_platform
         slippage_map = {a: get_slippage_rate(favorite_platform, get_symbol_category(a)) for a in prices.columns}
+        return broker, slippage_map
+
+    def _run_with_kernel(self, prices: pd.DataFrame, wallet: dict) -> pd.DataFrame:
+        """Backtest via dynamic_threshold_kernel (numba si installé, NumPy sinon)."""
+        p = self.params
+        broker, slippage_map = self._init_broker(prices, wallet)
+        history = broker.history
+
+        tw_vec = broker.weights_vector(self.target_weights(0, prices))
+        thresholds = self._precompute_thresholds(prices)
+
+        status, last_rebalance = dynamic_threshold_kernel(
+            broker.px,
+            thresholds,
+            tw_vec,
+            broker.slippage_vector(slippage_map),
+            broker.qty,
+            float(broker.trade_cost.fee_rate),
+            float(broker.trade_cost.fixed_fee),
+            float(p.rebal_frac),
+            self._cooldown_bars(prices),
+            broker.asset_index.get("USDT", -1),
+            history.value,
+            history.cost,
+            history.max_drift,
+            history.l1_drift,
+            history.positions,
+        )
+        if status != KERNEL_OK:
+            raise ValueError(
+                f"[{prices.index[status].date()}] Capital insuffisant pour payer les frais. "
+                f"Frais: {history.cost[status]:.2f}€, Capital: {history.value[status]:.2f}€"
+            )
+
+        history.set_filled(len(prices))
+        self.last_rebalance_day = int(last_rebalance)
+        return broker.get_history()
+
+    def _run_with_broker(self, prices: pd.DataFrame, wallet: dict) -> pd.DataFrame:
+        """Boucle de référence barre par barre sur le Broker (utilisée en mode verbose)."""
+        p = self.params
+        broker, slippage_map = self._init_broker(prices, wallet)
+        t0 = 0
 
         # Rééquilibrage initial
         tw0 = self.target_weights(t0, prices)
@@ -64,22 +117,20 @@ class DynamicThresholdStrategy(BaseStrategy):
 
         # Pré-calcul de la volatilité annualisée pour tous les actifs (optimisation)
         # DataFrame avec colonnes = actifs, index = dates
-        vol_ann = self._precompute_asset_volatilities(prices, p.vol_window)
+        vol_ann = self._precompute_asset_volatilities(prices, self._vol_window_bars(prices))
+        cooldown = self._cooldown_bars(prices)
 
         # Boucle temporelle
+        tw = tw0
+        tw_vec = broker.weights_vector(tw)
+        slip_vec = broker.slippage_vector(slippage_map)
         for t in range(1, len(prices)):
-            tw = self.target_weights(t, prices)
-            cw = broker._current_weights(t)
+            cw_vec = broker.current_weights_array(t)
             
             # Calcul du drift par actif
-            drifts = {}
-            for asset in prices.columns:
-                if asset in cw or asset in tw:
-                    drift = abs(cw.get(asset, 0.0) - tw.get(asset, 0.0))
-                    drifts[asset] = drift
+            drifts = dict(zip(broker.assets, np.abs(cw_vec - tw_vec).tolist()))
 
             # Calcul des seuils par actif (thr[a])
-            from app.tradingutils.drift_threshold import get_drift_threshold
             thresholds = {}
             current_date = prices.index[t]
             
@@ -109,34 +160,32 @@ class DynamicThresholdStrategy(BaseStrategy):
                 if asset in thresholds and drift >= thresholds[asset]:
                     should_rebalance = True
 
-            days_since_rebalance = t - self.last_rebalance_day
-            cooldown_met = days_since_rebalance >= p.cooldown_days
+            bars_since_rebalance = t - self.last_rebalance_day
+            cooldown_met = bars_since_rebalance >= cooldown
 
             if p.verbose and t % 10 == 0:
                 # Afficher quelques seuils pour debug
                 sample_thresholds = {a: thresholds.get(a, 0.0) for a in list(thresholds.keys())[:3]}
                 print(f"\n[{prices.index[t].date()}] Drift max: {max_drift:.4f}, "
                       f"Seuils (échantillon): {sample_thresholds}, "
-                      f"Cooldown: {days_since_rebalance}/{p.cooldown_days}")
+                      f"Cooldown: {bars_since_rebalance}/{cooldown} barres")
 
             if cooldown_met and should_rebalance:
-                # Recalcul de la slippage map au cas où le portefeuille a évolué
-                slippage_map = {a: get_slippage_rate(favorite_platform, get_symbol_category(a)) for a in prices.columns}
-                
                 # Rééquilibrage partiel ou complet selon rebal_frac
                 if p.rebal_frac < 1.0:
                     # Rééquilibrage partiel : on ajuste les poids cibles
+                    cw = dict(zip(broker.assets, cw_vec.tolist()))
                     tw_partial = self._compute_partial_rebalance_weights(cw, tw, p.rebal_frac)
                     # Vérification que tw_partial est bien normalisé (déjà fait dans la fonction)
-                    c = broker.rebalance(t, tw_partial, slippage_map=slippage_map)
-                    broker.mark_to_market(t, extra_cost=c, target_weights=tw)
+                    c = broker.rebalance_array(t, broker.weights_vector(tw_partial), slip_vec)
+                    broker.mark_to_market_array(t, extra_cost=c, target_weights=tw_vec)
                 else:
                     # Rééquilibrage complet
-                    c = broker.rebalance(t, tw, slippage_map=slippage_map)
-                    broker.mark_to_market(t, extra_cost=c, target_weights=tw)
+                    c = broker.rebalance_array(t, tw_vec, slip_vec)
+                    broker.mark_to_market_array(t, extra_cost=c, target_weights=tw_vec)
                 self.last_rebalance_day = t
             else:
-                broker.mark_to_market(t, extra_cost=0.0, target_weights=tw)
+                broker.mark_to_market_array(t, extra_cost=0.0, target_weights=tw_vec)
 
         return broker.get_history()
 
@@ -147,6 +196,14 @@ class DynamicThresholdStrategy(BaseStrategy):
         return normalize_weights(tw)
 
 
+    def _cooldown_bars(self, prices: pd.DataFrame) -> int:
+        """cooldown_days converti en barres au pas de l'index (inchangé en daily)."""
+        return days_to_bars(self.params.cooldown_days, prices.index)
+
+    def _vol_window_bars(self, prices: pd.DataFrame) -> int:
+        """vol_window (jours) converti en barres au pas de l'index, au moins 2 rendements."""
+        return max(2, days_to_bars(self.params.vol_window, prices.index))
+
     def _compute_partial_rebalance_weights(
         self, 
         current_weights: Dict[str, float], 
@@ -170,7 +227,8 @@ class DynamicThresholdStrategy(BaseStrategy):
     def _precompute_asset_volatilities(
         self, 
         prices: pd.DataFrame, 
-        window: int
+        window: int,
+        periods_per_year: float | None = None
     ) -> pd.DataFrame:
         """
         Pré-calcule la volatilité annualisée pour chaque actif sur une fenêtre glissante.
@@ -182,24 +240,41 @@ class DynamicThresholdStrategy(BaseStrategy):
         
         Formule pour chaque actif a:
         - log_returns[a] = log(prices[a]).diff()
-        - vol[a] = std(log_returns[a] over window) * sqrt(365)
+        - vol[a] = std(log_returns[a] over window) * sqrt(periods_per_year)
+
+        periods_per_year (barres par an) est déduit du pas de l'index s'il n'est pas
+        fourni : 365 en daily, 8760 en 1h, 175200 en 3m.
         
         Performance: Calcul une seule fois au début, puis lecture O(1) dans la boucle.
         """
-        vol_df = pd.DataFrame(index=prices.index, columns=prices.columns, dtype=float)
-        
-        for asset in prices.columns:
-            # Calcul des rendements logarithmiques
-            log_returns = np.log(prices[asset]).diff()
-            
-            # Volatilité annualisée sur fenêtre glissante
-            # rolling(window).std() calcule l'écart-type sur la fenêtre
-            vol_series = log_returns.rolling(window=window, min_periods=min(5, window)).std() * np.sqrt(365)
-            
-            # Remplir les NaN avec 0 ou la première valeur valide
-            vol_series = vol_series.bfill().fillna(0.0)
-            
-            vol_df[asset] = vol_series
-        
-        return vol_df
+        if periods_per_year is None:
+            periods_per_year = infer_periods_per_year(prices.index)
+
+        # Calcul des rendements logarithmiques, tous actifs d'un coup
+        log_returns = np.log(prices).diff()
+
+        # Volatilité annualisée sur fenêtre glissante
+        # rolling(window).std() calcule l'écart-type sur la fenêtre
+        vol_df = log_returns.rolling(window=window, min_periods=min(5, window)).std() * np.sqrt(periods_per_year)
+
+        # Remplir les NaN avec 0 ou la première valeur valide
+        return vol_df.bfill().fillna(0.0)
+
+    def _precompute_thresholds(self, prices: pd.DataFrame) -> np.ndarray:
+        """
+        Seuils de drift par barre et par actif (barres x actifs), en une passe vectorisée :
+        max(seuil de catégorie, clamp(min_th + k * vol, min_th, max_th)),
+        ou stable_threshold pour les actifs stables.
+        """
+        p = self.params
+        vol = self._precompute_asset_volatilities(prices, self._vol_window_bars(prices)).to_numpy(dtype=np.float64)
+        category_thr = np.array(
+            [get_drift_threshold(a, getattr(p, 'favorite_platform', None)) for a in prices.columns],
+            dtype=np.float64,
+        )
+        thr_vol = np.maximum(p.min_th, np.minimum(p.max_th, p.min_th + p.k * vol))
+        thresholds = np.maximum(category_thr, thr_vol)
 
+        stable = np.array([a in p.stable_assets for a in prices.columns], dtype=bool)
+        thresholds[:, stable] = p.stable_threshold
+        return np.ascontiguousarray(thresholds)
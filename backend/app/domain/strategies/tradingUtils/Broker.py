@@ -2,6 +2,8 @@
 import pandas as pd
 import numpy as np
 
+from app.domain.strategies.tradingUtils.History import HistoryBuffer
+
 class TradeCost:
     def __init__(self, fee_rate: float = 0.001, fixed_fee: float = 1.0, slippage: float = 0.0002):
         self.fee_rate = fee_rate
@@ -9,145 +11,179 @@ class TradeCost:
         self.slippage = slippage
 
     def compute(self, trade_values: dict[str, float]) -> float:
-        variable_cost = sum(abs(v) * self.fee_rate for v in trade_values.values())
-        fixed_cost = self.fixed_fee * len([v for v in trade_values.values() if abs(v) > 1e-10])
+        return self.compute_array(np.fromiter(trade_values.values(), dtype=np.float64, count=len(trade_values)))
+
+    def compute_array(self, trade_values: np.ndarray) -> float:
+        """Frais pour un vecteur de montants échangés (en €, signés)."""
+        abs_values = np.abs(trade_values)
+        variable_cost = float(np.sum(abs_values * self.fee_rate))
+        fixed_cost = self.fixed_fee * int(np.count_nonzero(abs_values > 1e-10))
         return variable_cost + fixed_cost
 
 
 # --- additions / modifications dans core/broker.py ---
 
 class Broker:
-    def __init__(self, prices: pd.DataFrame, trade_cost: TradeCost, verbose: bool = False):
+    """
+    Broker vectorisé : les prix sont stockés dans une matrice float64 contiguë
+    (barres x actifs) et les holdings dans un vecteur indexé par position d'actif.
+    Les méthodes *_array travaillent directement sur ces vecteurs ; les méthodes
+    historiques à base de dict (rebalance, _current_weights, ...) les enveloppent.
+    """
+
+    def __init__(self, prices: pd.DataFrame, trade_cost: TradeCost, verbose: bool = False, px: np.ndarray | None = None):
         self.prices = prices
         self.assets = prices.columns.tolist()
+        self.asset_index = {a: i for i, a in enumerate(self.assets)}
         self.trade_cost = trade_cost
         self.verbose = verbose
 
-        self.holdings = {a: 0.0 for a in self.assets}
-        self.history = []
+        # px peut être fourni pour partager une même matrice entre plusieurs brokers (lecture seule)
+        self.px = px if px is not None else np.ascontiguousarray(prices.to_numpy(dtype=np.float64))
+        self.qty = np.zeros(len(self.assets), dtype=np.float64)
+        self.history = HistoryBuffer(prices.index, self.assets)
+
+    # ----------- Conversions dict <-> vecteur -----------
+
+    @property
+    def holdings(self) -> dict[str, float]:
+        """Copie des holdings sous forme de dict (lecture seule, voir load_holdings)."""
+        return {a: float(q) for a, q in zip(self.assets, self.qty)}
+
+    def load_holdings(self, holdings: dict[str, float]) -> None:
+        """Charge des quantités par actif ; les actifs absents des prix sont ignorés."""
+        for asset, qty in holdings.items():
+            i = self.asset_index.get(asset)
+            if i is not None:
+                self.qty[i] = qty
+
+    def weights_vector(self, weights: dict[str, float] | None) -> np.ndarray:
+        """Aligne un dict de poids sur l'ordre des actifs (0 pour les absents)."""
+        vec = np.zeros(len(self.assets), dtype=np.float64)
+        if weights:
+            for asset, w in weights.items():
+                i = self.asset_index.get(asset)
+                if i is not None:
+                    vec[i] = w
+        return vec
+
+    def slippage_vector(self, slippage_map: dict[str, float] | None = None) -> np.ndarray:
+        """Slippage par actif, avec repli sur le slippage par défaut du TradeCost."""
+        slip = np.full(len(self.assets), float(self.trade_cost.slippage), dtype=np.float64)
+        if slippage_map:
+            for asset, s in slippage_map.items():
+                i = self.asset_index.get(asset)
+                if i is not None:
+                    slip[i] = s
+        return slip
+
+    # ----------- Valorisation -----------
+
+    def portfolio_value(self, t: int) -> float:
+        return float(np.sum(self.qty * self.px[t]))
+
+    def current_weights_array(self, t: int) -> np.ndarray:
+        values = self.qty * self.px[t]
+        total = float(np.sum(values))
+        if total == 0.0:
+            return np.zeros(len(self.assets), dtype=np.float64)
+        return values / total
+
+    def _current_weights(self, t: int) -> dict[str, float]:
+        return dict(zip(self.assets, self.current_weights_array(t).tolist()))
+
+    def _portfolio_value(self, t: int) -> float:
+        return self.portfolio_value(t)
+
+    # ----------- Historique -----------
 
     def mark_to_market(self, t: int, extra_cost: float = 0.0, target_weights: dict[str, float] | None = None) -> None:
         """Enregistre une ligne d'historique à la date t (mark-to-market) + drift si cible fournie."""
-        px = self.prices.iloc[t]
-        value = float(sum(self.holdings[a] * px[a] for a in self.assets))
+        tw = self.weights_vector(target_weights) if target_weights is not None else None
+        self.mark_to_market_array(t, extra_cost, tw)
 
-        # Poids courants
-        cw = self._current_weights(t)
+    def mark_to_market_array(self, t: int, extra_cost: float = 0.0, target_weights: np.ndarray | None = None) -> None:
+        """Variante de mark_to_market avec des poids cibles déjà alignés sur self.assets."""
+        value = self.portfolio_value(t)
 
         # Drift vs cible (optionnel)
         max_drift = None
         l1_drift = None
-        if target_weights is not None:
-            diffs = [abs(cw.get(a, 0.0) - target_weights.get(a, 0.0)) for a in self.assets]
-            if diffs:
-                max_drift = float(max(diffs))
-                l1_drift = float(sum(diffs))
-
-        rec = {
-            "date": self.prices.index[t],
-            "value": value,
-            "cost": float(extra_cost),
-            "weights": None,
-            "trades": None,
-            "max_drift": max_drift,
-            "l1_drift": l1_drift,
-        }
-
-        # positions (optionnel)
-        for a in self.assets:
-            rec[f"pos_{a}"] = float(self.holdings[a])
-        self.history.append(rec)
+        if target_weights is not None and len(self.assets) > 0:
+            diffs = np.abs(self.current_weights_array(t) - target_weights)
+            max_drift = float(np.max(diffs))
+            l1_drift = float(np.sum(diffs))
 
-    def _current_weights(self, t: int) -> dict[str, float]:
-        px = self.prices.iloc[t]
-        total = float(sum(self.holdings[a] * px[a] for a in self.assets))
-        if total == 0.0:
-            return {a: 0.0 for a in self.assets}
-        return {a: (self.holdings[a] * px[a]) / total for a in self.assets}
+        self.history.record(t, value, float(extra_cost), self.qty, max_drift, l1_drift)
 
-    def _portfolio_value(self, t: int) -> float:
-        px = self.prices.iloc[t]
-        return float(sum(self.holdings[a] * px[a] for a in self.assets))
+    # ----------- Rééquilibrage -----------
 
     def rebalance(self, t: int, target_weights: dict[str, float], slippage_map: dict[str, float] = None) -> float:
-        total_value = self._portfolio_value(t)
-        px = self.prices.iloc[t]
-        current_value = {a: self.holdings[a] * px[a] for a in self.assets}
-        target_value  = {a: total_value * target_weights.get(a, 0.0) for a in self.assets}
-
-        trade_values_nominal = {a: target_value[a] - current_value[a] for a in self.assets}
+        tw = self.weights_vector(target_weights)
+        slip = self.slippage_vector(slippage_map)
+        return self.rebalance_array(t, tw, slip)
 
-        # Calcul des quantités avec slippage
-        trades_qty = {}
-        
-        for a in self.assets:
-            dv_nominal = trade_values_nominal[a]  # valeur nominale à acheter/vendre (en €)
-            p0 = float(px[a])
-            
-            if p0 == 0 or not np.isfinite(p0):
-                trades_qty[a] = 0.0
-                continue
-
-            if abs(dv_nominal) < 1e-12:
-                trades_qty[a] = 0.0
-                continue
-
-            # Prix d'exécution avec slippage : achat => prix plus haut, vente => prix plus bas
-            # Le slippage est déjà pris en compte via le prix d'exécution défavorable
-            # (on achète moins de quantité pour le même montant, ou on reçoit moins en vendant)
-            slip = slippage_map[a] if slippage_map and a in slippage_map else float(self.trade_cost.slippage)
-            if dv_nominal > 0:  # Achat
-                p_exec = p0 * (1.0 + slip)
-            else:  # Vente
-                p_exec = p0 * (1.0 - slip)
+    def rebalance_array(self, t: int, target_weights: np.ndarray, slippage: np.ndarray) -> float:
+        """
+        Rééquilibre vers des poids cibles alignés sur self.assets.
 
-            # Quantité achetée/vendue (le slippage est déjà intégré dans p_exec)
-            qty = dv_nominal / p_exec
-            trades_qty[a] = qty
+        Args:
+            t: Index temporel
+            target_weights: Poids cibles (vecteur, même ordre que self.assets)
+            slippage: Slippage par actif (vecteur, même ordre que self.assets)
+        """
+        px = self.px[t]
+        current_value = self.qty * px
+        total_value = float(np.sum(current_value))
+        trade_values_nominal = total_value * target_weights - current_value
+
+        # Prix d'exécution avec slippage : achat => prix plus haut, vente => prix plus bas
+        # Le slippage est déjà pris en compte via le prix d'exécution défavorable
+        # (on achète moins de quantité pour le même montant, ou on reçoit moins en vendant)
+        tradable = np.isfinite(px) & (px != 0) & ~(np.abs(trade_values_nominal) < 1e-12)
+        p_exec = np.where(trade_values_nominal > 0, px * (1.0 + slippage), px * (1.0 - slippage))
+        trades_qty = np.zeros_like(current_value)
+        np.divide(trade_values_nominal, p_exec, out=trades_qty, where=tradable)
 
         # --- Calcul des coûts : uniquement frais d'exchange ---
-        # Note : Le slippage n'est PAS un coût à déduire séparément, 
+        # Note : Le slippage n'est PAS un coût à déduire séparément,
         # il est déjà comptabilisé via le prix d'exécution moins favorable
-        cost = self.trade_cost.compute(trade_values_nominal)
+        cost = self.trade_cost.compute_array(trade_values_nominal)
 
         # --- applique les trades ---
-        for a, q in trades_qty.items():
-            self.holdings[a] += q
+        self.qty += trades_qty
 
         # --- paiement des frais : validation et prélèvement intelligent ---
         self._pay_trading_fees(t, cost, px)
 
         if self.verbose:
-            cw = self._current_weights(t)
-            drift = {a: cw.get(a, 0) - target_weights.get(a, 0) for a in self.assets}
-            actions = []
-            for a in self.assets:
-                d = drift[a]
-                if abs(d) < 0.001:
-                    continue
-                actions.append(f"{a} {'trop haut' if d>0 else 'trop bas'} ({d*100:.2f}%)")
-            trades_summary = []
-            for a, q in trades_qty.items():
-                if abs(q) < 1e-8:
-                    continue
-                sign = "Achat" if q > 0 else "Vente"
-                trades_summary.append(f"{sign} {a} {abs(q):.6f}")
-            print(f"\n[{self.prices.index[t].date()}] Rééquilibrage")
-            if actions: print("  Drift : " + "; ".join(actions))
-            if trades_summary: print("  " + "; ".join(trades_summary))
-            print(f"  Frais de trading : {cost:.2f} € (slippage déjà intégré dans les prix d'exécution)")
+            self._print_rebalance(t, target_weights, trades_qty, cost)
 
         # ⬅️ on NE pousse plus la ligne d'historique ici : on laisse strategy.py appeler mark_to_market
         return float(cost)
 
+    def _print_rebalance(self, t: int, target_weights: np.ndarray, trades_qty: np.ndarray, cost: float) -> None:
+        drift = self.current_weights_array(t) - target_weights
+        actions = []
+        for a, d in zip(self.assets, drift):
+            if abs(d) < 0.001:
+                continue
+            actions.append(f"{a} {'trop haut' if d>0 else 'trop bas'} ({d*100:.2f}%)")
+        trades_summary = []
+        for a, q in zip(self.assets, trades_qty):
+            if abs(q) < 1e-8:
+                continue
+            sign = "Achat" if q > 0 else "Vente"
+            trades_summary.append(f"{sign} {a} {abs(q):.6f}")
+        print(f"\n[{self.prices.index[t].date()}] Rééquilibrage")
+        if actions: print("  Drift : " + "; ".join(actions))
+        if trades_summary: print("  " + "; ".join(trades_summary))
+        print(f"  Frais de trading : {cost:.2f} € (slippage déjà intégré dans les prix d'exécution)")
+
     def get_history(self) -> pd.DataFrame:
-        if not self.history:
-            return pd.DataFrame(columns=["date", "value", "cost", "weights", "trades"]).set_index("date")
-        df = pd.DataFrame(self.history)
-        df.set_index("date", inplace=True)
-        return df
+        return self.history.to_frame()
 
-    def _pay_trading_fees(self, t: int, cost: float, px: pd.Series) -> None:
+    def _pay_trading_fees(self, t: int, cost: float, px: np.ndarray) -> None:
         """
         Prélève les frais de trading sur le portefeuille avec validation.
         
@@ -160,13 +196,13 @@ class Broker:
         Args:
             t: Index temporel pour logging
             cost: Montant des frais en devise de base (EUR)
-            px: Prix à l'instant t (pd.Series)
+            px: Prix à l'instant t (vecteur aligné sur self.assets)
         """
         if cost <= 0:
             return  # Pas de frais à payer
         
         # Vérifier que le capital total est suffisant
-        total_value = self._portfolio_value(t)
+        total_value = self.portfolio_value(t)
         if total_value < cost:
             raise ValueError(
                 f"[{self.prices.index[t].date()}] Capital insuffisant pour payer les frais. "
@@ -174,35 +210,33 @@ class Broker:
             )
         
         # Stratégie 1 : Prélever sur USDT si présent et suffisant
-        pay_asset = "USDT" if "USDT" in self.assets else None
+        pay_asset = self.asset_index.get("USDT")
         if pay_asset is not None and px[pay_asset] > 0:
-            asset_value = self.holdings[pay_asset] * px[pay_asset]
-            if asset_value >= cost:
+            if self.qty[pay_asset] * px[pay_asset] >= cost:
                 # USDT a assez de valeur
-                self.holdings[pay_asset] -= cost / px[pay_asset]
+                self.qty[pay_asset] -= cost / px[pay_asset]
                 return
         
         # Stratégie 2 : Prélever sur l'actif avec la plus grande valeur
-        asset_values = {a: self.holdings[a] * px[a] for a in self.assets if px[a] > 0}
-        if asset_values:
-            biggest = max(asset_values, key=asset_values.get)
+        priced = px > 0
+        if priced.any():
+            asset_values = np.where(priced, self.qty * px, -np.inf)
+            biggest = int(np.argmax(asset_values))
             if asset_values[biggest] >= cost:
                 # L'actif le plus gros a assez de valeur
-                self.holdings[biggest] -= cost / px[biggest]
+                self.qty[biggest] -= cost / px[biggest]
                 return
         
         # Stratégie 3 : Répartition proportionnelle sur tous les actifs
         # (aucun actif individuel n'a assez, mais le total oui)
-        for asset in self.assets:
-            if px[asset] > 0 and self.holdings[asset] > 0:
-                asset_value = self.holdings[asset] * px[asset]
-                # Prélever proportionnellement à la valeur de l'actif
-                fee_share = (asset_value / total_value) * cost
-                self.holdings[asset] -= fee_share / px[asset]
+        payers = priced & (self.qty > 0)
+        fee_share = (self.qty[payers] * px[payers] / total_value) * cost
+        self.qty[payers] -= fee_share / px[payers]
         
         # Validation finale : vérifier qu'aucun holding n'est devenu négatif
-        for asset in self.assets:
-            if self.holdings[asset] < -1e-10:  # Tolérance pour erreurs d'arrondi
-                if self.verbose:
-                    print(f"⚠️ Warning: Holding négatif détecté pour {asset}: {self.holdings[asset]:.8f}")
-                self.holdings[asset] = 0.0  # Correction pour éviter holdings négatifs
+        negative = self.qty < -1e-10  # Tolérance pour erreurs d'arrondi
+        if negative.any():
+            if self.verbose:
+                for i in np.flatnonzero(negative):
+                    print(f"⚠️ Warning: Holding négatif détecté pour {self.assets[i]}: {self.qty[i]:.8f}")
+            self.qty[negative] = 0.0  # Correction pour éviter holdings négatifs
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+
+class HistoryBuffer:
+    """
+    Historique colonnaire pré-alloué d'un backtest.
+
+    Une colonne NumPy par métrique (value, cost, max_drift, l1_drift) et une matrice
+    de positions (actifs x barres, une ligne contiguë par actif), dimensionnées sur
+    len(index) et remplies en place. to_frame() construit le DataFrame sans recopier
+    les colonnes.
+    """
+
+    def __init__(self, index: pd.Index, assets: list[str], capacity: int | None = None):
+        self.index = index
+        self.assets = list(assets)
+        self.size = 0
+        self._allocate(len(index) if capacity is None else capacity)
+
+    @classmethod
+    def from_columns(
+        cls,
+        index: pd.Index,
+        assets: list[str],
+        value: np.ndarray,
+        cost: np.ndarray,
+        max_drift: np.ndarray,
+        l1_drift: np.ndarray,
+        positions: np.ndarray,
+    ) -> "HistoryBuffer":
+        """Historique complet (une ligne par barre) sur des colonnes déjà remplies, sans copie."""
+        history = cls.__new__(cls)
+        history.index = index
+        history.assets = list(assets)
+        history.t = np.arange(len(value))
+        history.value, history.cost = value, cost
+        history.max_drift, history.l1_drift = max_drift, l1_drift
+        history.positions = positions
+        history.size = len(value)
+        return history
+
+    def _allocate(self, capacity: int) -> None:
+        capacity = max(int(capacity), 1)
+        self.t = np.empty(capacity, dtype=np.intp)
+        self.value = np.empty(capacity, dtype=np.float64)
+        self.cost = np.empty(capacity, dtype=np.float64)
+        self.max_drift = np.full(capacity, np.nan, dtype=np.float64)
+        self.l1_drift = np.full(capacity, np.nan, dtype=np.float64)
+        self.positions = np.empty((len(self.assets), capacity), dtype=np.float64)
+
+    def _grow(self, needed: int) -> None:
+        """Agrandit les buffers si une stratégie enregistre plus d'une ligne par barre."""
+        old = (self.t, self.value, self.cost, self.max_drift, self.l1_drift, self.positions)
+        self._allocate(max(needed, 2 * len(self.t)))
+        n = self.size
+        self.t[:n], self.value[:n], self.cost[:n] = old[0][:n], old[1][:n], old[2][:n]
+        self.max_drift[:n], self.l1_drift[:n] = old[3][:n], old[4][:n]
+        self.positions[:, :n] = old[5][:, :n]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def record(
+        self,
+        t: int,
+        value: float,
+        cost: float,
+        positions: np.ndarray,
+        max_drift: float | None = None,
+        l1_drift: float | None = None,
+    ) -> None:
+        """Ajoute la ligne de la barre t."""
+        i = self.size
+        if i >= len(self.t):
+            self._grow(i + 1)
+        self.t[i] = t
+        self.value[i] = value
+        self.cost[i] = cost
+        self.max_drift[i] = np.nan if max_drift is None else max_drift
+        self.l1_drift[i] = np.nan if l1_drift is None else l1_drift
+        self.positions[:, i] = positions
+        self.size = i + 1
+
+    def record_block(
+        self,
+        t_start: int,
+        t_end: int,
+        value: np.ndarray,
+        cost: float | np.ndarray,
+        positions: np.ndarray,
+        max_drift: np.ndarray | None = None,
+        l1_drift: np.ndarray | None = None,
+    ) -> None:
+        """Ajoute les barres [t_start, t_end) en une fois (positions : vecteur constant ou matrice actifs x barres)."""
+        m = t_end - t_start
+        if m <= 0:
+            return
+        i = self.size
+        if i + m > len(self.t):
+            self._grow(i + m)
+        j = i + m
+        self.t[i:j] = np.arange(t_start, t_end)
+        self.value[i:j] = value
+        self.cost[i:j] = cost
+        self.max_drift[i:j] = np.nan if max_drift is None else max_drift
+        self.l1_drift[i:j] = np.nan if l1_drift is None else l1_drift
+        positions = np.asarray(positions, dtype=np.float64)
+        self.positions[:, i:j] = positions[:, None] if positions.ndim == 1 else positions
+        self.size = j
+
+    def set_filled(self, n: int) -> None:
+        """Déclare les barres 0..n-1 remplies directement dans les colonnes (kernels compilés)."""
+        if n > len(self.t):
+            self._grow(n)
+        self.t[:n] = np.arange(n)
+        self.size = n
+
+    def to_frame(self) -> pd.DataFrame:
+        n = self.size
+        if n == 0:
+            return pd.DataFrame(columns=["date", "value", "cost", "weights", "trades"]).set_index("date")
+
+        t = self.t[:n]
+        if t[0] == 0 and t[-1] == n - 1 and n == len(self.index) and np.all(np.diff(t) == 1):
+            index = self.index
+        else:
+            index = self.index.take(t)
+        index = index.rename("date")
+
+        # Colonnes "weights" / "trades" conservées pour la compatibilité du format de sortie
+        columns = {
+            "value": self.value[:n],
+            "cost": self.cost[:n],
+            "weights": np.full(n, None, dtype=object),
+            "trades": np.full(n, None, dtype=object),
+            "max_drift": self.max_drift[:n],
+            "l1_drift": self.l1_drift[:n],
+        }
+        for j, a in enumerate(self.assets):
+            columns[f"pos_{a}"] = self.positions[j, :n]
+        return pd.DataFrame(columns, index=index, copy=False)
@@ -0,0 +1,88 @@
+"""
+Primitives des kernels de backtest (dynamic threshold, constant mix) sur tableaux NumPy :
+rééquilibrage, paiement des frais et enregistrement d'une barre, compilées avec numba
+si disponible. Mêmes règles que Broker (rebalance_array, _pay_trading_fees, mark_to_market_array).
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba est optionnel : repli sur la version NumPy
+    njit = None
+
+HAS_NUMBA = njit is not None
+
+# Codes retour du kernel
+KERNEL_OK = -1
+
+
+def compiled(fn):
+    """Compile la fonction avec numba si disponible, sinon la laisse en Python/NumPy."""
+    return njit(cache=True)(fn) if njit is not None else fn
+
+
+@compiled
+def rebalance(px_t, qty, target, slippage, fee_rate, fixed_fee):
+    """Même logique que Broker.rebalance_array (hors paiement des frais) ; renvoie les frais."""
+    values = qty * px_t
+    total = np.sum(values)
+    trade_values = total * target - values
+    abs_values = np.abs(trade_values)
+
+    tradable = np.isfinite(px_t) & (px_t != 0.0) & ~(abs_values < 1e-12)
+    p_exec = np.where(trade_values > 0, px_t * (1.0 + slippage), px_t * (1.0 - slippage))
+    p_exec = np.where(tradable, p_exec, 1.0)
+    qty += np.where(tradable, trade_values / p_exec, 0.0)
+
+    return np.sum(abs_values * fee_rate) + fixed_fee * np.sum(abs_values > 1e-10)
+
+
+@compiled
+def pay_trading_fees(px_t, qty, cost, usdt_idx):
+    """Même logique que Broker.pay_trading_fees ; renvoie False si le capital est insuffisant."""
+    if cost <= 0:
+        return True
+
+    total_value = np.sum(qty * px_t)
+    if total_value < cost:
+        return False
+
+    # 1. USDT si présent et suffisant
+    if usdt_idx >= 0 and px_t[usdt_idx] > 0:
+        if qty[usdt_idx] * px_t[usdt_idx] >= cost:
+            qty[usdt_idx] -= cost / px_t[usdt_idx]
+            return True
+
+    # 2. Actif avec la plus grande valeur
+    priced = px_t > 0
+    if np.any(priced):
+        asset_values = np.where(priced, qty * px_t, -np.inf)
+        biggest = np.argmax(asset_values)
+        if asset_values[biggest] >= cost:
+            qty[biggest] -= cost / px_t[biggest]
+            return True
+
+    # 3. Répartition proportionnelle
+    payers = priced & (qty > 0)
+    safe_px = np.where(payers, px_t, 1.0)
+    fee_share = (qty * px_t / total_value) * cost
+    qty -= np.where(payers, fee_share / safe_px, 0.0)
+
+    qty[:] = np.where(qty < -1e-10, 0.0, qty)
+    return True
+
+
+@compiled
+def record(t, px_t, qty, target, value, cost, max_drift, l1_drift, positions, c):
+    values = qty * px_t
+    total = np.sum(values)
+    if total == 0.0:
+        weights = np.zeros_like(values)
+    else:
+        weights = values / total
+    diffs = np.abs(weights - target)
+    value[t] = total
+    cost[t] = c
+    max_drift[t] = np.max(diffs)
+    l1_drift[t] = np.sum(diffs)
+    positions[:, t] = qty
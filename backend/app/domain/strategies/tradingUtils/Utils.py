@@ -21,6 +21,65 @@ def zscore(series: pd.Series, window: int = 20) -> pd.Series:
     return (series - mean) / std
 
 
+# ----------- Timeframes -----------
+
+# Durée d'une barre, en minutes, des timeframes supportés par les backtests
+TIMEFRAME_MINUTES = {"3m": 3, "15m": 15, "1h": 60, "4h": 240, "1d": 1440}
+
+# Agrégation de chaque champ OHLC lors du passage à une barre plus longue
+OHLC_AGGREGATION = {"open": "first", "high": "max", "low": "min", "close": "last"}
+
+
+def timeframe_minutes(timeframe: str) -> int:
+    try:
+        return TIMEFRAME_MINUTES[timeframe]
+    except KeyError:
+        raise ValueError(f"Timeframe non supporté : {timeframe}")
+
+
+def timeframe_periods_per_year(timeframe: str) -> float:
+    """Nombre de barres par an (marché ouvert 24h/24, 365 jours) : 365 en 1d, 8760 en 1h..."""
+    return 365 * 1440 / timeframe_minutes(timeframe)
+
+
+def infer_periods_per_year(index: pd.Index, default: float = 365) -> float:
+    """Barres par an déduites de l'écart médian entre deux dates de l'index."""
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return default
+    step_ns = np.median(np.diff(index.asi8)) * pd.Timedelta(1, index.unit).value
+    if not np.isfinite(step_ns) or step_ns <= 0:
+        return default
+    return 365 * pd.Timedelta(days=1).value / step_ns
+
+
+def days_to_bars(days: float, index: pd.Index) -> int:
+    """Nombre de barres couvrant days jours au pas de l'index : days en 1d, days * 24 en 1h..."""
+    return int(round(days * infer_periods_per_year(index) / 365))
+
+
+def resample_ohlc(prices: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Agrège des bougies vers un timeframe plus long, tous symboles d'un coup.
+
+    prices a des colonnes MultiIndex (champ, symbole) comme getPriceMatrix ; chaque
+    barre commence sur un multiple de la durée cible depuis l'epoch (même découpage
+    que Binance). open/close = premier/dernier prix connu de la barre, high/low = extrêmes.
+    """
+    bucket = prices.index.floor(f"{timeframe_minutes(timeframe)}min")
+    fields = prices.columns.get_level_values(0).unique()
+    parts = {f: prices[f].groupby(bucket).agg(OHLC_AGGREGATION.get(f, "last")) for f in fields}
+    resampled = pd.concat(parts, axis=1, names=prices.columns.names)
+    resampled.index.name = prices.index.name
+    return resampled
+
+
+def resample_close(close: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Matrice des clôtures (dates x symboles) agrégée vers un timeframe plus long."""
+    resampled = close.groupby(close.index.floor(f"{timeframe_minutes(timeframe)}min")).last()
+    resampled.index.name = close.index.name
+    return resampled
+
+
 def moving_volatility(series: pd.Series, window: int = 30, periods_per_year: int = 365) -> pd.Series:
     """Volatilité annualisée glissante (log-returns)."""
     log_ret = np.log(series).diff()  # plus robuste que series/shift
@@ -87,6 +146,19 @@ def sharpe_ratio(series: pd.Series, rf: float = 0.0, periods_per_year: int = 365
     return np.sqrt(periods_per_year) * excess.mean() / std
 
 
+def backtest_metrics(history: pd.DataFrame, periods_per_year: int = 365) -> dict[str, float]:
+    """Indicateurs de synthèse d'un historique de backtest (colonnes 'value' et, si présente, 'cost')."""
+    value = history["value"]
+    if value.empty:
+        return {"cagr": 0.0, "sharpe": 0.0, "max_drawdown": 0.0, "total_cost": 0.0, "final_value": float("nan")}
+    return {
+        "cagr": float(compute_cagr(value, use_index=True, periods_per_year=periods_per_year)),
+        "sharpe": float(sharpe_ratio(value, periods_per_year=periods_per_year)),
+        "max_drawdown": float(max_drawdown(value)),
+        "total_cost": float(history["cost"].sum()) if "cost" in history.columns else 0.0,
+        "final_value": float(value.iloc[-1]),
+    }
+
 
 # ----------- Divers -----------
 
@@ -1,51 +1,190 @@
-import requests
+import asyncio
 from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+import httpx
+
+from app.core.config import settings
+from app.domain.models.candle import CandleFetchReport
+from app.infrastructure.adapters.rateLimiter import AsyncRateLimiter
+
+MINUTE_MS = 60 * 1000
+
+# Durée des intervalles klines Binance de longueur fixe (le mois "1M" est paginé au curseur)
+INTERVAL_MS = {
+    "1m": MINUTE_MS,
+    "3m": 3 * MINUTE_MS,
+    "5m": 5 * MINUTE_MS,
+    "15m": 15 * MINUTE_MS,
+    "30m": 30 * MINUTE_MS,
+    "1h": 60 * MINUTE_MS,
+    "2h": 120 * MINUTE_MS,
+    "4h": 240 * MINUTE_MS,
+    "6h": 360 * MINUTE_MS,
+    "8h": 480 * MINUTE_MS,
+    "12h": 720 * MINUTE_MS,
+    "1d": 1440 * MINUTE_MS,
+    "3d": 3 * 1440 * MINUTE_MS,
+    "1w": 7 * 1440 * MINUTE_MS,
+}
+
+# Les bougies hebdomadaires s'ouvrent le lundi (l'epoch tombe un jeudi)
+WEEK_OFFSET_MS = 4 * 1440 * MINUTE_MS
 
 
 class binanceCandleAdapter:
 
-    BASE_URL = "https://api.binance.com/api/v3/klines"
+    BASE_URL = settings.BINANCE_API_URL + "/klines"
+    PAGE_LIMIT = 1000
+
+    def __init__(
+        self,
+        max_concurrency: int = settings.BINANCE_MAX_CONCURRENCY,
+        requests_per_minute: int = settings.BINANCE_REQUESTS_PER_MINUTE,
+        timeout: float = 10.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.timeout = timeout
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._loop = None
+
+    def _session(self) -> httpx.AsyncClient:
+        """Client HTTP partagé (pool de connexions keep-alive) de la boucle asyncio courante."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Client, sémaphore et limiteur sont liés à une boucle : recréés si elle change (scripts, tests)
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._rateLimiter = AsyncRateLimiter(self.requests_per_minute, per=60.0)
+            self._loop = loop
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    async def _getKlines(self, params: dict) -> list:
+        client = self._session()
+        async with self._semaphore:
+            await self._rateLimiter.acquire()
+            response = await client.get(self.BASE_URL, params=params)
+        response.raise_for_status()
+        return response.json()
 
-    def fetchCandles(self, symbol: str, start: datetime, end: datetime,interval:str):
+    async def fetchCandles(self, symbol: str, start: datetime, end: datetime, interval: str):
+        candles, _ = await self.fetchCandlesReport(symbol, start, end, interval)
+        return candles
 
-        all_candles = []
+    async def fetchCandlesReport(
+        self,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        interval: str,
+        on_page: Callable[[list], Awaitable[None]] | None = None,
+    ) -> tuple[list, CandleFetchReport]:
+        """
+        Bougies [start, end] d'un symbole et rapport de complétude.
 
+        Pour les intervalles de durée fixe, les pages sont des fenêtres disjointes de
+        PAGE_LIMIT bougies calculées à l'avance et téléchargées en parallèle ; sinon
+        (ex: "1M") on suit le curseur page par page.
+
+        Si on_page est fourni, chaque page lui est transmise dès sa réception (ordre
+        d'arrivée) et les bougies ne sont pas accumulées : la liste renvoyée est vide.
+        """
         start_ms = int(start.timestamp() * 1000)
         end_ms = int(end.timestamp() * 1000)
+        step = INTERVAL_MS.get(interval)
+        candles = []
+        received = 0
 
-        while True:
+        async def handle(page: list):
+            nonlocal received
+            received += len(page)
+            if on_page is not None:
+                await on_page(page)
+            else:
+                candles.extend(page)
 
-            params = {
-                "symbol": symbol.upper(),
-                "interval": interval,
-                "startTime": start_ms,
-                "endTime": end_ms,
-                "limit": 1000
-            }
+        if step is None:
+            await self._fetchSequential(symbol, start_ms, end_ms, interval, handle)
+            expected = None
+        else:
+            pages = [
+                (page_start, min(page_start + self.PAGE_LIMIT * step - 1, end_ms))
+                for page_start in range(start_ms, end_ms + 1, self.PAGE_LIMIT * step)
+            ]
 
-            response = requests.get(self.BASE_URL, params=params)
-            data = response.json()
+            async def fetch(page_start: int, page_end: int):
+                await handle(await self._fetchPage(symbol, interval, page_start, page_end))
 
-            if not data:
-                break
+            await asyncio.gather(*(fetch(page_start, page_end) for page_start, page_end in pages))
+            # Pages terminées dans le désordre : on rétablit l'ordre chronologique
+            candles.sort(key=lambda c: c["open_time"])
+            expected = self._expectedCount(start_ms, end_ms, interval)
 
-            # Ajout
-            for c in data:
-                all_candles.append({
-                    "open_time": datetime.fromtimestamp(c[0] / 1000, tz=timezone.utc),
-                    "open": float(c[1]),
-                    "high": float(c[2]),
-                    "low": float(c[3]),
-                    "close": float(c[4])
-                })
-            last_ts = data[-1][0]
-
-            if last_ts >= end_ms:
-                break
+        report = CandleFetchReport(
+            symbol=symbol.upper(),
+            interval=interval,
+            expected=received if expected is None else expected,
+            received=received,
+        )
+        return candles, report
 
-            start_ms = last_ts + 24 * 3600 * 1000
+    async def _fetchPage(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> list:
+        data = await self._getKlines(self._params(symbol, interval, start_ms, end_ms))
+        return [
+            {
+                "open_time": datetime.fromtimestamp(c[0] / 1000, tz=timezone.utc),
+                "open": float(c[1]),
+                "high": float(c[2]),
+                "low": float(c[3]),
+                "close": float(c[4])
+            }
+            for c in data
+        ]
 
-            if start_ms > end_ms:
+    async def _fetchSequential(self, symbol: str, start_ms: int, end_ms: int, interval: str, handle) -> None:
+        while start_ms <= end_ms:
+            page = await self._fetchPage(symbol, interval, start_ms, end_ms)
+            if not page:
                 break
+            await handle(page)
+            # Page suivante : juste après l'ouverture de la dernière bougie reçue
+            start_ms = int(page[-1]["open_time"].timestamp() * 1000) + 1
+
+    def _params(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> dict:
+        return {
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "startTime": start_ms,
+            "endTime": end_ms,
+            "limit": self.PAGE_LIMIT
+        }
+
+    @staticmethod
+    def _expectedCount(start_ms: int, end_ms: int, interval: str) -> int:
+        """Nombre d'ouvertures de bougies dans [start_ms, end_ms] (alignées sur l'epoch, lundi pour 1w)."""
+        step = INTERVAL_MS[interval]
+        offset = WEEK_OFFSET_MS if interval == "1w" else 0
+        first = -(-(start_ms - offset) // step) * step + offset
+        if first > end_ms:
+            return 0
+        return (end_ms - first) // step + 1
+
 
-        return all_candles
\ No newline at end of file
+# Adapter partagé par le process : un seul pool de connexions et un seul budget de requêtes Binance
+candleProvider = binanceCandleAdapter()
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket asyncio : au plus `rate` acquisitions par fenêtre de `per` secondes
+    (rafale maximale = rate). acquire() attend le temps nécessaire au lieu d'échouer.
+    """
+
+    def __init__(self, rate: float, per: float = 60.0):
+        if rate <= 0:
+            raise ValueError("rate doit être strictement positif")
+        self.rate = float(rate)
+        self.per = float(per)
+        self._tokens = self.rate
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) * self.per / self.rate)
@@ -0,0 +1,157 @@
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import pandas as pd
+
+from app.core.config import settings
+from app.domain.strategies.tradingUtils.Utils import wallet_items_to_holdings
+
+
+class BacktestResultCache:
+    """
+    Cache des historiques de backtest, indexé par une empreinte sha256 du calcul :
+    stratégie, paramètres résolus, holdings du wallet et version des données de prix
+    (plus les filtres de lecture). La version des données inclut la génération
+    d'écriture des bougies (BaseCandleRepository.getDataVersion) : toute écriture, même
+    un backfill sous la dernière bougie, change la clé, comme un wallet modifié ; pas
+    d'invalidation explicite.
+
+    Niveau mémoire LRU borné à max_entries, entrées expirées après ttl secondes.
+    Niveau disque optionnel (pickle par clé) pour survivre aux redémarrages et être
+    partagé entre workers uvicorn ; même TTL, appliqué sur la date du fichier. Chaque
+    écriture purge le répertoire : fichiers expirés, puis les plus anciens au-delà de
+    disk_max_entries (les clés des anciennes versions de données ne sont plus relues).
+
+    Les DataFrames renvoyés sont partagés entre requêtes : à traiter en lecture seule.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        ttl: float = 3600.0,
+        disk_dir: str | None = None,
+        disk_max_entries: int = 1024,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir or None
+        self.disk_max_entries = disk_max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, pd.DataFrame]]" = OrderedDict()
+
+    @staticmethod
+    def key(strategy_name: str, params, wallet, data_version: Any, **extra) -> str:
+        """Empreinte canonique (JSON trié) des entrées du backtest."""
+        if dataclasses.is_dataclass(params):
+            params = dataclasses.asdict(params)
+        payload = {
+            "strategy": strategy_name,
+            "params": params,
+            "wallet": sorted(wallet_items_to_holdings(wallet).items()),
+            "data_version": data_version,
+            **extra,
+        }
+        raw = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+
+        result = self._readDisk(key)
+        if result is not None:
+            self._remember(key, result, now)
+        return result
+
+    def put(self, key: str, result: pd.DataFrame) -> None:
+        self._remember(key, result, time.monotonic())
+        self._writeDisk(key, result)
+
+    def clear(self) -> None:
+        """Vide le niveau mémoire (le niveau disque expire par TTL)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, result: pd.DataFrame, stored_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (stored_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _readDisk(self, key: str) -> Optional[pd.DataFrame]:
+        if self.disk_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _writeDisk(self, key: str, result: pd.DataFrame) -> None:
+        if self.disk_dir is None:
+            return
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = self._path(key)
+        # Écriture atomique : un lecteur concurrent ne voit jamais un fichier partiel
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._pruneDisk()
+
+    def _pruneDisk(self) -> None:
+        """Supprime les fichiers expirés (et temporaires abandonnés), puis les plus anciens au-delà de disk_max_entries."""
+        now = time.time()
+        entries = []
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                try:
+                    mtime = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if now - mtime > self.ttl:
+                    self._removeFile(entry.path)
+                elif entry.name.endswith(".pkl"):
+                    entries.append((mtime, entry.path))
+        excess = len(entries) - self.disk_max_entries
+        if excess > 0:
+            for _, path in sorted(entries)[:excess]:
+                self._removeFile(path)
+
+    @staticmethod
+    def _removeFile(path: str) -> None:
+        # Un autre worker peut purger le même répertoire en même temps
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Instance partagée par le process
+backtestResultCache = BacktestResultCache(
+    max_entries=settings.BACKTEST_CACHE_SIZE,
+    ttl=settings.BACKTEST_CACHE_TTL,
+    disk_dir=settings.BACKTEST_CACHE_DIR,
+    disk_max_entries=settings.BACKTEST_CACHE_DISK_SIZE,
+)
@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional, Tuple
+
+import pandas as pd
+
+
+class PriceMatrixCache:
+    """
+    Cache en mémoire (par process) des matrices de prix pivotées (dates x symboles).
+
+    Une entrée par lecture (timeframe, symboles, début, fin), valide pour une version
+    donnée des données du timeframe : une écriture de bougies change la version et
+    l'entrée est reconstruite. saveCandles invalide aussi explicitement le timeframe
+    écrit. La matrice complète d'un timeframe (lecture sans filtre) sert toutes les
+    lectures filtrées ; les lectures filtrées (un wallet, une période) sont gardées à
+    part, dans la limite de max_entries (LRU).
+
+    Les DataFrames renvoyés sont partagés entre requêtes : à traiter en lecture seule.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, pd.DataFrame]]" = OrderedDict()
+
+    def get(
+        self,
+        timeframe: Hashable,
+        version: Any,
+        symbols: Optional[Iterable[str]] = None,
+        start=None,
+        end=None,
+    ) -> Optional[pd.DataFrame]:
+        key = self.key(timeframe, symbols, start, end)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(
+        self,
+        timeframe: Hashable,
+        version: Any,
+        prices: pd.DataFrame,
+        symbols: Optional[Iterable[str]] = None,
+        start=None,
+        end=None,
+    ) -> None:
+        key = self.key(timeframe, symbols, start, end)
+        with self._lock:
+            self._entries[key] = (version, prices)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, timeframe: Hashable | None = None) -> None:
+        """Supprime les entrées d'un timeframe, ou tout le cache si timeframe est None."""
+        with self._lock:
+            if timeframe is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == timeframe]:
+                    del self._entries[key]
+
+    @staticmethod
+    def key(timeframe: Hashable, symbols: Optional[Iterable[str]] = None, start=None, end=None) -> tuple:
+        """Clé d'une lecture : l'ordre des symboles demandés n'en change pas le résultat."""
+        return timeframe, None if symbols is None else tuple(sorted(set(symbols))), start, end
+
+
+# Instance partagée par le process (repositories et services)
+priceMatrixCache = PriceMatrixCache()
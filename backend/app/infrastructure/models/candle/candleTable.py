@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, Float, Index
 
 from app.core.database.database import Base
 
@@ -6,14 +6,22 @@ from app.core.database.database import Base
 class CandleTable(Base):
     __tablename__ = 'candle'
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    symbol = Column(String, index=True)
-    open_time = Column(DateTime, index=True)
+    # Clé (symbol, open_time) : une table partitionnée exige la clé de partition dans la clé primaire
+    symbol = Column(String, primary_key=True)
+    open_time = Column(DateTime, primary_key=True, index=True)
     open = Column(Float)
     high = Column(Float)
     low = Column(Float)
     close = Column(Float)
 
     __table_args__ = (
-        UniqueConstraint("symbol", "open_time", name="uq_symbol_time"),
-    )
\ No newline at end of file
+        # Index couvrant des lectures par symbole et plage de dates (index-only scan)
+        Index(
+            "ix_candle_symbol_open_time_covering",
+            "symbol",
+            "open_time",
+            postgresql_include=["close", "open", "high", "low"],
+        ),
+        # PostgreSQL : une partition par mois (voir BaseCandleRepository.ensurePartitions)
+        {"postgresql_partition_by": "RANGE (open_time)"},
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import UniqueConstraint, Column, Float, DateTime, String, Integer
+from sqlalchemy import Column, Float, DateTime, String, Index
 
 from app.core.database.database import Base
 
@@ -6,14 +6,22 @@ from app.core.database.database import Base
 class CandleThreeMTable(Base):
     __tablename__ = 'candleThreeMin'
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    symbol = Column(String, index=True)
-    open_time = Column(DateTime, index=True)
+    # Clé (symbol, open_time) : une table partitionnée exige la clé de partition dans la clé primaire
+    symbol = Column(String, primary_key=True)
+    open_time = Column(DateTime, primary_key=True, index=True)
     open = Column(Float)
     high = Column(Float)
     low = Column(Float)
     close = Column(Float)
 
     __table_args__ = (
-        UniqueConstraint("symbol", "open_time", name="uq_symbol_time_3min_candle"),
-    )
\ No newline at end of file
+        # Index couvrant des lectures par symbole et plage de dates (index-only scan)
+        Index(
+            "ix_candleThreeMin_symbol_open_time_covering",
+            "symbol",
+            "open_time",
+            postgresql_include=["close", "open", "high", "low"],
+        ),
+        # PostgreSQL : une partition par jour (voir BaseCandleRepository.ensurePartitions)
+        {"postgresql_partition_by": "RANGE (open_time)"},
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, Column, DateTime, String
+
+from app.core.database.database import Base
+
+
+class CandleWriteGenerationTable(Base):
+    __tablename__ = 'candleWriteGeneration'
+
+    # Compteur incrémenté à chaque écriture de bougies d'un timeframe (voir BaseCandleRepository.getDataVersion)
+    timeframe = Column(String, primary_key=True)
+    generation = Column(BigInteger, nullable=False, default=0)
+    # Écritures qui ne sont pas un simple ajout en fin de série (backfill sous le max, suppression par symbole)
+    rewrite_generation = Column(BigInteger, nullable=False, default=0)
+    # Dernière rétention appliquée : bougies antérieures supprimées (voir purgeOlderThan)
+    purged_before = Column(DateTime, nullable=True)
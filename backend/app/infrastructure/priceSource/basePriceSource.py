@@ -0,0 +1,81 @@
+from abc import abstractmethod
+from datetime import datetime
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from app.domain.port.priceSourcePort import IPriceSourcePort
+from app.domain.strategies.tradingUtils.Utils import TIMEFRAME_MINUTES, resample_close, timeframe_minutes
+
+
+class BasePriceSource(IPriceSourcePort):
+    """
+    Socle commun des sources de prix. Un timeframe stocké tel quel est lu directement ;
+    un timeframe plus long (15m, 1h, 4h...) est agrégé à la volée depuis le timeframe
+    stocké le plus long qui le divise (typiquement les bougies 3m).
+    """
+
+    def getPriceMatrix(
+        self,
+        symbols: Optional[Iterable[str]],
+        timeframe: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        source = self._sourceTimeframe(timeframe)
+        if source == timeframe:
+            return self._read(symbols, timeframe, start, end)
+
+        # Première barre complète : start ramené au début de sa barre cible
+        if start is not None:
+            start = self._naive(start).floor(f"{timeframe_minutes(timeframe)}min").to_pydatetime()
+        return resample_close(self._read(symbols, source, start, end), timeframe)
+
+    def getVersion(self, timeframe: str):
+        return self._version(self._sourceTimeframe(timeframe))
+
+    @abstractmethod
+    def _timeframes(self) -> Iterable[str]:
+        """Timeframes disponibles sans agrégation."""
+        pass
+
+    @abstractmethod
+    def _read(self, symbols, timeframe: str, start, end) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def _version(self, timeframe: str):
+        pass
+
+    def _sourceTimeframe(self, timeframe: str) -> str:
+        available = list(self._timeframes())
+        if timeframe in available:
+            return timeframe
+        target = timeframe_minutes(timeframe)
+        finer = [tf for tf in available if tf in TIMEFRAME_MINUTES and target % TIMEFRAME_MINUTES[tf] == 0]
+        if not finer:
+            raise ValueError(f"Timeframe non supporté : {timeframe}")
+        return max(finer, key=TIMEFRAME_MINUTES.get)
+
+    @staticmethod
+    def _slice(
+        prices: pd.DataFrame,
+        symbols: Optional[Iterable[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """Filtre une matrice déjà en mémoire comme le ferait la requête SQL (bornes incluses)."""
+        if symbols is not None:
+            wanted = set(symbols)
+            prices = prices.loc[:, [c for c in prices.columns if c in wanted]]
+        if start is not None or end is not None:
+            prices = prices.loc[BasePriceSource._naive(start):BasePriceSource._naive(end)]
+        return prices
+
+    @staticmethod
+    def _naive(value: Optional[datetime]):
+        """Les index de prix sont en UTC sans fuseau."""
+        if value is None:
+            return None
+        value = pd.Timestamp(value)
+        return value.tz_convert("UTC").tz_localize(None) if value.tzinfo is not None else value
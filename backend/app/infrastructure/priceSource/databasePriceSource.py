@@ -0,0 +1,44 @@
+import pandas as pd
+
+from app.infrastructure.cache.priceMatrixCache import priceMatrixCache
+from app.infrastructure.priceSource.basePriceSource import BasePriceSource
+from app.infrastructure.repository.candle.baseCandleRepository import BaseCandleRepository
+
+
+class DatabasePriceSource(BasePriceSource):
+    """
+    Matrices de prix lues en base (un repository par timeframe stocké).
+
+    Les lectures sont gardées dans priceMatrixCache tant que la version ne change pas.
+    Une lecture filtrée est servie depuis la matrice complète du timeframe si elle est
+    en cache, sinon depuis sa propre entrée ; à défaut, le filtre (symboles, dates) est
+    passé à la requête SQL et le résultat mis en cache sous cette clé.
+    """
+
+    def __init__(self, repositories: dict[str, BaseCandleRepository]):
+        self.repositories = repositories
+
+    def _timeframes(self):
+        return self.repositories.keys()
+
+    def _version(self, timeframe: str):
+        return self.repositories[timeframe].getDataVersion()
+
+    def _read(self, symbols, timeframe: str, start, end) -> pd.DataFrame:
+        repo = self.repositories[timeframe]
+        version = repo.getDataVersion()
+        full = priceMatrixCache.get(timeframe, version)
+        if full is not None:
+            return self._slice(full, symbols, start, end)
+
+        bounds = (self._naive(start), self._naive(end))
+        cached = priceMatrixCache.get(timeframe, version, symbols, *bounds)
+        if cached is not None:
+            return cached
+
+        if symbols is None and start is None and end is None:
+            prices = repo.getCloseMatrix()
+        else:
+            prices = repo.getCloseMatrix(symbols=symbols, start=start, end=end)
+        priceMatrixCache.put(timeframe, version, prices, symbols, *bounds)
+        return prices
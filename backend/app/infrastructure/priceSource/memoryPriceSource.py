@@ -0,0 +1,22 @@
+import pandas as pd
+
+from app.infrastructure.priceSource.basePriceSource import BasePriceSource
+
+
+class InMemoryPriceSource(BasePriceSource):
+    """Matrices de prix fournies en mémoire (tests, benchmarks) : aucun accès base ni disque."""
+
+    def __init__(self, matrices: dict[str, pd.DataFrame]):
+        self.matrices = matrices
+
+    def _timeframes(self):
+        return self.matrices.keys()
+
+    def _version(self, timeframe: str):
+        prices = self.matrices[timeframe]
+        if prices.empty:
+            return None
+        return prices.index[-1]
+
+    def _read(self, symbols, timeframe: str, start, end) -> pd.DataFrame:
+        return self._slice(self.matrices[timeframe], symbols, start, end)
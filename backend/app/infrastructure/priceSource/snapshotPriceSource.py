@@ -0,0 +1,46 @@
+import pandas as pd
+
+from app.infrastructure.priceSource.basePriceSource import BasePriceSource
+from app.infrastructure.repository.candle.baseCandleRepository import BaseCandleRepository
+from app.infrastructure.store.priceSnapshotStore import PriceSnapshotStore
+
+
+class SnapshotPriceSource(BasePriceSource):
+    """
+    Matrices de prix lues dans les snapshots disque mappés en mémoire (PriceSnapshotStore).
+
+    Avec un repository pour le timeframe, le snapshot est rattrapé depuis la base dès que
+    la version des données (génération d'écriture) diffère de celle qu'il a enregistrée,
+    écritures d'autres process comprises : ajout des nouvelles bougies et rétention en
+    temps normal, reconstruction seulement après une réécriture (backfill sous la
+    dernière bougie, suppression par symbole). Sans repository, il est servi tel quel.
+    """
+
+    def __init__(self, store: PriceSnapshotStore, repositories: dict[str, BaseCandleRepository] | None = None, timeframes=("1d",)):
+        self.store = store
+        self.repositories = repositories or {}
+        # Timeframes servis par le store quand aucun repository n'est fourni
+        self.timeframes = tuple(self.repositories) or tuple(timeframes)
+
+    def _timeframes(self):
+        return self.timeframes
+
+    def _version(self, timeframe: str):
+        repo = self.repositories.get(timeframe)
+        if repo is not None:
+            return repo.getDataVersion()
+        return self.store.latestOpenTime(timeframe)
+
+    def _read(self, symbols, timeframe: str, start, end) -> pd.DataFrame:
+        repo = self.repositories.get(timeframe)
+        if repo is not None:
+            version = repo.getDataVersion()
+            if version[1] is not None and not self.store.isCurrent(timeframe, version):
+                self.store.refresh(repo)
+
+        prices = self.store.read(timeframe)
+        if prices is None:
+            if repo is not None:
+                return repo.getCloseMatrix(symbols=symbols, start=start, end=end)
+            return pd.DataFrame(index=pd.DatetimeIndex([], name="open_time"), columns=pd.Index([], name="symbol"), dtype=float)
+        return self._slice(prices, symbols, start, end)
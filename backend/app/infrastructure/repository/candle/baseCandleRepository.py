@@ -1,29 +1,469 @@
+import asyncio
+import csv
+import io
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, DateTime, Float, MetaData, String, Table, delete, func, select, text, true
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.domain.port.candlePort import ICandlePort
+from app.infrastructure.cache.priceMatrixCache import priceMatrixCache
+from app.infrastructure.models.candle.candleWriteGenerationTable import CandleWriteGenerationTable
 
 
 class BaseCandleRepository(ICandlePort):
 
-    def __init__(self, db: Session,table):
+    # Granularité des partitions PostgreSQL par open_time : "month" ou "day"
+    PARTITION_UNIT = "month"
+
+    def __init__(self, db: Session, table, timeframe: str):
         self.db = db
         self.table = table
+        self.timeframe = timeframe
+        self._staging: Table | None = None
+        self._staging_created = False
+        self._dbLock: asyncio.Lock | None = None
+
+    async def _offload(self, fn, *args, **kwargs):
+        """
+        Exécute fn (accès synchrone à la session) dans un thread pour ne pas bloquer la
+        boucle asyncio : téléchargements et autres requêtes avancent pendant l'écriture.
+        Une opération à la fois par repository : la session n'est jamais partagée entre
+        deux threads en même temps (et garde sa connexion, donc la table de chargement).
+        """
+        if self._dbLock is None:
+            self._dbLock = asyncio.Lock()
+        async with self._dbLock:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def getLatestOpenTime(self):
+        """open_time de la bougie la plus récente de la table (None si vide)."""
+        return self.db.execute(select(func.max(self.table.open_time))).scalar()
+
+    def getDataVersion(self) -> tuple:
+        """
+        Version des données du timeframe : (génération d'écriture, open_time max).
+
+        La génération est incrémentée dans la transaction de chaque écriture faite par le
+        repository, y compris un backfill sous le max ou l'ajout d'un nouveau symbole ;
+        stockée en base, elle est partagée par tous les process (workers, scheduler, jobs).
+        """
+        generation = select(CandleWriteGenerationTable.generation).where(
+            CandleWriteGenerationTable.timeframe == self.timeframe
+        ).scalar_subquery()
+        latest = select(func.max(self.table.open_time)).scalar_subquery()
+        row = self.db.execute(select(generation, latest)).one()
+        return (row[0] or 0, row[1])
+
+    def getRewriteState(self) -> tuple:
+        """
+        (génération de réécriture, date de la dernière rétention) du timeframe.
+
+        La génération de réécriture ne bouge que pour les écritures qu'un ajout en fin de
+        série ne rattrape pas : bougies insérées sous l'open_time max déjà stocké (backfill,
+        nouveau symbole, trou comblé) et suppressions par symbole. Une rétention
+        (purgeOlderThan) met seulement à jour purged_before.
+        """
+        G = CandleWriteGenerationTable
+        row = self.db.execute(
+            select(G.rewrite_generation, G.purged_before).where(G.timeframe == self.timeframe)
+        ).one_or_none()
+        return (0, None) if row is None else (row[0] or 0, row[1])
+
+    def _bumpGeneration(self, rewrite: bool = False, purged_before: Optional[datetime] = None) -> None:
+        """Incrémente la génération d'écriture du timeframe (à appeler avant le commit de l'écriture)."""
+        G = CandleWriteGenerationTable
+        values = {"timeframe": self.timeframe, "generation": 1, "rewrite_generation": int(rewrite)}
+        changes = {"generation": G.generation + 1}
+        if rewrite:
+            changes["rewrite_generation"] = G.rewrite_generation + 1
+        if purged_before is not None:
+            values["purged_before"] = changes["purged_before"] = purged_before
+        self.db.execute(self._insert(G).values(**values).on_conflict_do_update(index_elements=["timeframe"], set_=changes))
+
+    def _isRewrite(self, previous_latest, inserted_times) -> bool:
+        """Vrai si des bougies ont été insérées sous l'open_time max stocké avant l'écriture."""
+        return previous_latest is not None and bool(inserted_times) and min(inserted_times) < previous_latest
+
+    async def getLatestOpenTimes(self, symbols: Optional[Iterable[str]] = None) -> dict[str, datetime]:
+        """open_time de la dernière bougie stockée pour chaque symbole, en une seule requête GROUP BY."""
+        return await self._offload(self._getLatestOpenTimes, symbols)
+
+    def _getLatestOpenTimes(self, symbols: Optional[Iterable[str]] = None) -> dict[str, datetime]:
+        stmt = select(self.table.symbol, func.max(self.table.open_time)).group_by(self.table.symbol)
+        if symbols is not None:
+            stmt = stmt.where(self.table.symbol.in_(list(symbols)))
+        return {symbol: latest for symbol, latest in self.db.execute(stmt)}
+
+    def getCloseMatrix(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """Matrice des clôtures (index = open_time, colonnes = symboles), NaN là où une bougie manque."""
+        return self._readMatrices(symbols, start, end, ("close",))["close"]
+
+    def getPriceMatrix(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        fields: Sequence[str] = ("open", "high", "low", "close"),
+        batch_size: int = 50_000,
+    ) -> pd.DataFrame:
+        """
+        Lecture en masse des bougies, sans instancier d'objets ORM.
 
-    async def saveCandles(self, symbol: str, candles: list):
-        stmt = insert(self.table).values([
-            {
-                "symbol": symbol,
-                "open_time": c["open_time"],
-                "open": c["open"],
-                "high": c["high"],
-                "low": c["low"],
-                "close": c["close"]
-            } for c in candles
-        ]).on_conflict_do_nothing(
+        Seules les colonnes (symbol, open_time, *fields) sont sélectionnées, filtrées
+        sur les symboles et l'intervalle [start, end] (bornes incluses). Les lignes sont
+        lues par lots via un curseur côté serveur et la matrice est remplie directement
+        depuis des tableaux NumPy.
+
+        Returns:
+            DataFrame indexé par open_time, colonnes MultiIndex (champ, symbole)
+        """
+        return pd.concat(self._readMatrices(symbols, start, end, fields, batch_size), axis=1)
+
+    def _priceMatrixQuery(self, symbols, start, end, fields):
+        """
+        SELECT (symbol, open_time, *fields) filtré et trié dans l'ordre de l'index couvrant
+        (symbol, open_time) INCLUDE (close, open, high, low) : index-only scan, sans lecture
+        des pages de la table.
+        """
+        columns = [getattr(self.table, f) for f in fields]
+        stmt = select(self.table.symbol, self.table.open_time, *columns)
+        if symbols is not None:
+            stmt = stmt.where(self.table.symbol.in_(list(symbols)))
+        if start is not None:
+            stmt = stmt.where(self.table.open_time >= self._naiveUtc(start))
+        if end is not None:
+            stmt = stmt.where(self.table.open_time <= self._naiveUtc(end))
+        return stmt.order_by(self.table.symbol, self.table.open_time)
+
+    def _readMatrices(self, symbols, start, end, fields, batch_size: int = 50_000) -> dict[str, pd.DataFrame]:
+        """Une matrice (open_time x symbole) par champ demandé."""
+        stmt = self._priceMatrixQuery(symbols, start, end, fields)
+        result = self.db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+        chunks = [[] for _ in range(2 + len(fields))]
+        for rows in result.partitions():
+            for chunk, values in zip(chunks, zip(*rows)):
+                chunk.append(values)
+
+        def flat(field_chunks, dtype) -> np.ndarray:
+            if not field_chunks:
+                return np.empty(0, dtype=dtype)
+            return np.concatenate([np.asarray(c, dtype=dtype) for c in field_chunks])
+
+        col_codes, col_labels = pd.factorize(flat(chunks[0], object), sort=True)
+        row_codes, row_labels = pd.factorize(pd.DatetimeIndex(flat(chunks[1], "datetime64[us]")), sort=True)
+
+        index = pd.DatetimeIndex(row_labels, name="open_time")
+        columns = pd.Index(col_labels, name="symbol")
+        frames = {}
+        for f, field_chunks in zip(fields, chunks[2:]):
+            matrix = np.full((len(index), len(columns)), np.nan, dtype=np.float64)
+            matrix[row_codes, col_codes] = flat(field_chunks, np.float64)
+            frames[f] = pd.DataFrame(matrix, index=index, columns=columns, copy=False)
+        return frames
+
+    async def saveCandles(self, symbol: str, candles: list, batch_size: int = 5000) -> int:
+        """
+        Insère les bougies par lots bornés (executemany), en ignorant celles déjà présentes.
+
+        Returns:
+            Nombre de bougies réellement insérées (lignes renvoyées par RETURNING, sans
+            compter la table).
+        """
+        return await self._offload(self._saveCandles, symbol, candles, batch_size)
+
+    def _saveCandles(self, symbol: str, candles: list, batch_size: int) -> int:
+        stmt = self._insert().on_conflict_do_nothing(
             index_elements=['symbol', 'open_time']  # ta clé unique
-        )
+        ).returning(self.table.open_time)
+
+        previous_latest = None
+        if candles:
+            times = [c["open_time"] for c in candles]
+            self.ensurePartitions(min(times), max(times))
+            previous_latest = self.getLatestOpenTime()
+
+        inserted_times = []
+        for i in range(0, len(candles), batch_size):
+            rows = [
+                {
+                    "symbol": symbol,
+                    "open_time": c["open_time"],
+                    "open": c["open"],
+                    "high": c["high"],
+                    "low": c["low"],
+                    "close": c["close"]
+                } for c in candles[i:i + batch_size]
+            ]
+            inserted_times += self.db.execute(stmt, rows).scalars().all()
+
+        inserted = len(inserted_times)
+        if inserted:
+            self._bumpGeneration(rewrite=self._isRewrite(previous_latest, inserted_times))
+        self.db.commit()
+        if inserted:
+            # Les matrices de prix en cache pour ce timeframe ne sont plus à jour
+            priceMatrixCache.invalidate(self.timeframe)
+        print(f"Ajout de {inserted}/{len(candles)} bougies pour {symbol}")
+        return inserted
+
+    def _insert(self, table=None):
+        """INSERT ... ON CONFLICT du dialecte de la session (PostgreSQL en prod, SQLite en test)."""
+        table = self.table if table is None else table
+        if self.db.get_bind().dialect.name == "sqlite":
+            return sqlite_insert(table)
+        return insert(table)
 
-        self.db.execute(stmt)
+    # ----------- Chargement en masse (backfill) -----------
+
+    CANDLE_COLUMNS = ("symbol", "open_time", "open", "high", "low", "close")
+
+    async def stageCandles(self, symbol: str, candles: list) -> int:
+        """
+        Ajoute des bougies à la table temporaire de chargement de la session.
+
+        PostgreSQL : COPY ... FROM STDIN (CSV) ; autres bases : executemany. Rien n'est
+        visible dans la table des bougies avant mergeStagedCandles().
+        """
+        if not candles:
+            return 0
+        return await self._offload(self._stageCandles, symbol, candles)
+
+    def _stageCandles(self, symbol: str, candles: list) -> int:
+        staging = self._stagingTable()
+        conn = self.db.connection()
+        if not self._staging_created:
+            staging.create(conn)
+            self._staging_created = True
+
+        if conn.dialect.name == "postgresql":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for c in candles:
+                writer.writerow((symbol, c["open_time"].isoformat(), repr(c["open"]), repr(c["high"]), repr(c["low"]), repr(c["close"])))
+            buffer.seek(0)
+            self._copyFrom(conn, staging.name, buffer)
+        else:
+            conn.execute(staging.insert(), [
+                {
+                    "symbol": symbol,
+                    "open_time": c["open_time"],
+                    "open": c["open"],
+                    "high": c["high"],
+                    "low": c["low"],
+                    "close": c["close"]
+                } for c in candles
+            ])
+        return len(candles)
+
+    async def mergeStagedCandles(self) -> dict[str, int]:
+        """
+        Fusionne la table de chargement dans la table des bougies en une seule requête
+        INSERT ... SELECT ... ON CONFLICT DO NOTHING, puis la supprime et valide.
+
+        Returns:
+            Nombre de bougies insérées par symbole
+        """
+        if not self._staging_created:
+            return {}
+        return await self._offload(self._mergeStagedCandles)
+
+    def _mergeStagedCandles(self) -> dict[str, int]:
+        staging = self._stagingTable()
+        conn = self.db.connection()
+        bounds = conn.execute(select(func.min(staging.c.open_time), func.max(staging.c.open_time))).one()
+        if bounds[0] is not None:
+            self.ensurePartitions(*bounds)
+        previous_latest = self.getLatestOpenTime()
+
+        # WHERE true : lève l'ambiguïté SELECT / ON CONFLICT du parseur SQLite
+        source = select(*(staging.c[col] for col in self.CANDLE_COLUMNS)).where(true())
+        stmt = self._insert().from_select(list(self.CANDLE_COLUMNS), source).on_conflict_do_nothing(
+            index_elements=['symbol', 'open_time']
+        ).returning(self.table.symbol, self.table.open_time)
+
+        rows = conn.execute(stmt).all()
+        inserted = Counter(symbol for symbol, _ in rows)
+        staging.drop(conn)
+        self._staging_created = False
+        if inserted:
+            self._bumpGeneration(rewrite=self._isRewrite(previous_latest, [t for _, t in rows]))
+        self.db.commit()
+
+        if inserted:
+            priceMatrixCache.invalidate(self.timeframe)
+        return dict(inserted)
+
+    def _stagingTable(self) -> Table:
+        if self._staging is None:
+            self._staging = Table(
+                f"{self.table.__tablename__}_staging",
+                MetaData(),
+                Column("symbol", String),
+                # Avec fuseau : même conversion vers la table cible que l'insertion classique
+                Column("open_time", DateTime(timezone=True)),
+                Column("open", Float),
+                Column("high", Float),
+                Column("low", Float),
+                Column("close", Float),
+                prefixes=["TEMPORARY"],
+            )
+        return self._staging
+
+    @classmethod
+    def _copyFrom(cls, conn, table_name: str, buffer: io.StringIO) -> None:
+        sql = f'COPY "{table_name}" ({", ".join(cls.CANDLE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)'
+        cursor = conn.connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):
+                # psycopg2
+                cursor.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+    # ----------- Partitions et rétention -----------
+
+    async def purgeOlderThan(self, cutoff: datetime) -> int:
+        """
+        Rétention : supprime toutes les bougies antérieures à cutoff.
+
+        Table partitionnée : les partitions entièrement périmées sont détachées puis
+        supprimées (sans parcourir les lignes ni bloquer la table mère, voir
+        _dropPartitions) et seul le reliquat de la partition à cheval sur cutoff passe
+        par un DELETE. Sinon, un DELETE unique pour tous les symboles.
+
+        Returns:
+            Nombre de partitions supprimées
+        """
+        return await self._offload(self._purgeOlderThan, cutoff)
+
+    def _purgeOlderThan(self, cutoff: datetime) -> int:
+        cutoff = self._naiveUtc(cutoff)
+        dropped = 0
+        if self._isPartitioned():
+            expired = [name for name, _, upper in self._existingPartitions() if upper <= cutoff]
+            if expired:
+                # Termine la transaction de lecture : DETACH CONCURRENTLY attend les transactions en cours
+                self.db.commit()
+                self._dropPartitions(expired)
+                dropped = len(expired)
+        result = self.db.execute(delete(self.table).where(self.table.open_time < cutoff))
+        if dropped or result.rowcount:
+            self._bumpGeneration(purged_before=cutoff)
         self.db.commit()
-        print(f"Ajout de {len(candles)} bougies pour {symbol}")
-        print(f"Total bougies dans la table : {self.db.query(self.table).count()}")
\ No newline at end of file
+        if dropped or result.rowcount:
+            priceMatrixCache.invalidate(self.timeframe)
+        return dropped
+
+    def _dropPartitions(self, names: list[str]) -> None:
+        """
+        Détache chaque partition avec DETACH PARTITION ... CONCURRENTLY puis la supprime.
+
+        Un DROP direct d'une partition attachée prend un verrou ACCESS EXCLUSIVE sur la
+        table mère et bloque lectures et écritures de toutes les partitions. Le détachement
+        concurrent ne prend qu'un SHARE UPDATE EXCLUSIVE ; il doit s'exécuter hors
+        transaction, d'où une connexion dédiée en autocommit. Une partition restée en
+        détachement (process interrompu) est terminée avec FINALIZE.
+        """
+        parent = self.table.__tablename__
+        with self.db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            pending = set(conn.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = to_regclass(quote_ident(:name)) AND i.inhdetachpending"
+                ),
+                {"name": parent},
+            ).scalars())
+            for name in names:
+                mode = "FINALIZE" if name in pending else "CONCURRENTLY"
+                conn.execute(text(f'ALTER TABLE "{parent}" DETACH PARTITION "{name}" {mode}'))
+                conn.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+
+    def ensurePartitions(self, start: datetime, end: datetime) -> None:
+        """Crée les partitions manquantes couvrant [start, end] (sans effet hors PostgreSQL partitionné)."""
+        if not self._isPartitioned():
+            return
+        bounds = self._partitionBounds(self._naiveUtc(start), self._naiveUtc(end))
+        names = [name for name, _, _ in bounds]
+        missing = set(self.db.execute(
+            text("SELECT name FROM unnest(CAST(:names AS text[])) AS name WHERE to_regclass(quote_ident(name)) IS NULL"),
+            {"names": names},
+        ).scalars())
+        for name, lower, upper in bounds:
+            if name in missing:
+                self.db.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{self.table.__tablename__}" '
+                    f"FOR VALUES FROM ('{lower.isoformat(sep=' ')}') TO ('{upper.isoformat(sep=' ')}')"
+                ))
+
+    def _isPartitioned(self) -> bool:
+        if self.db.get_bind().dialect.name != "postgresql":
+            return False
+        return bool(self.db.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(quote_ident(:name)))"),
+            {"name": self.table.__tablename__},
+        ).scalar())
+
+    def _existingPartitions(self) -> list[tuple[str, datetime, datetime]]:
+        """Partitions (nom, borne basse, borne haute) nommées selon la convention de _partitionName."""
+        names = self.db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(quote_ident(:name))"
+            ),
+            {"name": self.table.__tablename__},
+        ).scalars()
+        prefix = f"{self.table.__tablename__}_p"
+        fmt = "%Y%m" if self.PARTITION_UNIT == "month" else "%Y%m%d"
+        partitions = []
+        for name in names:
+            if not name.startswith(prefix):
+                continue
+            try:
+                lower = datetime.strptime(name[len(prefix):], fmt)
+            except ValueError:
+                continue
+            partitions.append((name, lower, self._nextBound(lower)))
+        return sorted(partitions, key=lambda p: p[1])
+
+    def _partitionBounds(self, start: datetime, end: datetime) -> list[tuple[str, datetime, datetime]]:
+        if self.PARTITION_UNIT == "month":
+            lower = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        else:
+            lower = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        bounds = []
+        while lower <= end:
+            upper = self._nextBound(lower)
+            bounds.append((self._partitionName(lower), lower, upper))
+            lower = upper
+        return bounds
+
+    def _partitionName(self, lower: datetime) -> str:
+        suffix = lower.strftime("%Y%m" if self.PARTITION_UNIT == "month" else "%Y%m%d")
+        return f"{self.table.__tablename__}_p{suffix}"
+
+    def _nextBound(self, lower: datetime) -> datetime:
+        if self.PARTITION_UNIT == "month":
+            return lower.replace(year=lower.year + lower.month // 12, month=lower.month % 12 + 1)
+        return lower + timedelta(days=1)
+
+    @staticmethod
+    def _naiveUtc(value: datetime) -> datetime:
+        """open_time est stocké sans fuseau, en UTC."""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
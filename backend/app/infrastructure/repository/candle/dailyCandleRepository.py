@@ -6,26 +6,32 @@ from sqlalchemy.orm import Session
 from app.domain.port.candlePort import ICandlePort
 from app.infrastructure.models.candle import candleTable
 from app.infrastructure.models.candle.candleTable import CandleTable
+from app.infrastructure.cache.priceMatrixCache import priceMatrixCache
 from app.infrastructure.repository.candle.baseCandleRepository import BaseCandleRepository
 
 
 class dailyCandleRepository(BaseCandleRepository):
 
     def __init__(self, db):
-        super().__init__(db, CandleTable)
+        super().__init__(db, CandleTable, timeframe="1d")
 
 
     def deleteOlderThan(self, symbol: str, minDate: datetime):
-        self.db.query(CandleTable).filter(
+        deleted = self.db.query(CandleTable).filter(
             CandleTable.symbol == symbol,
             CandleTable.open_time < minDate
         ).delete()
+        if deleted:
+            self._bumpGeneration(rewrite=True)
         self.db.commit()
+        if deleted:
+            priceMatrixCache.invalidate(self.timeframe)
 
     def getCandlesBySymbol(self, symbol: str):
         rows = (
             self.db.query(CandleTable)
             .filter(CandleTable.symbol == symbol)
+            .order_by(CandleTable.open_time)
             .all()
         )
         return rows
@@ -6,13 +6,16 @@ from app.infrastructure.models.candle.candleThreeMTable import CandleThreeMTable
 
 class threeMinCandleRepository(BaseCandleRepository):
 
+    PARTITION_UNIT = "day"
+
     def __init__(self, db):
-        super().__init__(db, CandleThreeMTable)
+        super().__init__(db, CandleThreeMTable, timeframe="3m")
 
     def getCandlesBySymbol(self, symbol: str):
         rows = (
             self.db.query(CandleThreeMTable)
             .filter(CandleThreeMTable.symbol == symbol)
+            .order_by(CandleThreeMTable.open_time)
             .all()
         )
         return rows
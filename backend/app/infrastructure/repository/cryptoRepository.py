@@ -2,11 +2,12 @@ from typing import List
 
 import httpx
 
+from app.core.config import settings
 from app.domain.port.cryptoPort import ICryptoPort
 
 
 class CryptoRepository(ICryptoPort):
-    BASE_URL = "https://api.binance.com/api/v3"
+    BASE_URL = settings.BINANCE_API_URL
 
     async def get_price(self, symbol: str) -> float:
 
@@ -0,0 +1,155 @@
+import multiprocessing
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from app.core.config import settings
+from app.domain.models.backtestJob import BacktestJob, JobStatus
+from app.domain.models.wallet.walletItem import WalletItem
+from app.domain.strategies.tradingUtils.Utils import wallet_items_to_holdings
+from app.infrastructure.runners.StrategyFactory import StrategyFactory
+
+
+def _run_job(strategy_name: str, prices: pd.DataFrame, wallet: dict, run_kwargs: dict):
+    """Exécuté dans un worker : renvoie (début, historique)."""
+    started_at = datetime.now(timezone.utc)
+    runner = StrategyFactory.create(strategy_name)()
+    return started_at, runner.run(prices, wallet, **run_kwargs)
+
+
+class BacktestJobQueue:
+    """
+    File de backtests exécutés dans un ProcessPoolExecutor borné, hors des threads
+    de requête. Les jobs (et leurs résultats) restent consultables jusqu'à ce que
+    max_jobs jobs terminés plus récents les évincent.
+
+    Les workers sont démarrés en "spawn" : un fork du process API (threads uvicorn,
+    scheduler, sessions SQLAlchemy, verrous) n'est pas sûr.
+    """
+
+    def __init__(self, max_workers: int | None = None, max_jobs: int = 1000):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, BacktestJob]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._onDone: Dict[str, Callable[[pd.DataFrame], None]] = {}
+        self._pool: ProcessPoolExecutor | None = None
+
+    def submit(
+        self,
+        strategy_name: str,
+        user_id: int,
+        prices: pd.DataFrame,
+        wallet,
+        run_kwargs: dict,
+        on_done: Callable[[pd.DataFrame], None] | None = None,
+    ) -> BacktestJob:
+        """on_done(historique) est appelé dans le process API quand le job réussit (ex: cache de résultats)."""
+        # Wallet réduit à des WalletItem (picklables) pour l'envoyer au worker
+        holdings = wallet_items_to_holdings(wallet, quote="EUR")
+        wallet = {"items": [WalletItem(id=None, symbol=s, amount=a) for s, a in holdings.items()]}
+
+        job = BacktestJob(
+            id=uuid.uuid4().hex,
+            strategy_name=strategy_name,
+            user_id=user_id,
+            submitted_at=datetime.now(timezone.utc),
+        )
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            self._jobs[job.id] = job
+            future = self._pool.submit(_run_job, strategy_name, prices, wallet, run_kwargs)
+            self._futures[job.id] = future
+            if on_done is not None:
+                self._onDone[job.id] = on_done
+            self._evict()
+        future.add_done_callback(lambda f, job_id=job.id: self._complete(job_id, f))
+        return job
+
+    def record(self, strategy_name: str, user_id: int, result: pd.DataFrame) -> BacktestJob:
+        """Enregistre un job déjà terminé (résultat servi par le cache), sans passer par un worker."""
+        now = datetime.now(timezone.utc)
+        job = BacktestJob(
+            id=uuid.uuid4().hex,
+            strategy_name=strategy_name,
+            user_id=user_id,
+            status=JobStatus.DONE,
+            submitted_at=now,
+            started_at=now,
+            finished_at=now,
+            result=result,
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        return job
+
+    def get(self, job_id: str) -> Optional[BacktestJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+            if job is not None and future is not None and job.status == JobStatus.PENDING and future.running():
+                job.status = JobStatus.RUNNING
+        return job
+
+    def wait(self, job_id: str, timeout: float | None = None) -> Optional[BacktestJob]:
+        """Attend la fin d'un job (tests, scripts)."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+            # Le callback de fin peut s'exécuter juste après le réveil de result()
+            self._complete(job_id, future)
+        return self.get(job_id)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _complete(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._futures.pop(job_id, None)
+            on_done = self._onDone.pop(job_id, None)
+            if job is None or job.finished:
+                return
+            job.finished_at = datetime.now(timezone.utc)
+            if future.cancelled():
+                job.status, job.error = JobStatus.FAILED, "Job annulé"
+                return
+            error = future.exception()
+            if error is not None:
+                job.status, job.error = JobStatus.FAILED, str(error) or type(error).__name__
+                return
+            job.started_at, job.result = future.result()
+            job.status = JobStatus.DONE
+        if on_done is not None:
+            try:
+                on_done(job.result)
+            except Exception as e:
+                # Le job reste consultable : seul le partage du résultat est perdu
+                print(f"Traitement de fin du job {job_id} impossible : {e}")
+
+    def _evict(self) -> None:
+        """Supprime les jobs terminés les plus anciens au-delà de max_jobs (appelé sous verrou)."""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [j for j, job in self._jobs.items() if job.finished][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+
+# File partagée par le process ; arrêtée dans le lifespan de l'application
+backtestJobQueue = BacktestJobQueue(max_workers=settings.BACKTEST_MAX_WORKERS)
@@ -5,8 +5,10 @@ from app.domain.strategies.constantMix.constantMixParams import ConstantMixParam
 from app.domain.strategies.constantMix.constantMixStrategy import ConstantMixStrategy
 
 class ConstantMixRunner:
-    def run(self, prices: pd.DataFrame, wallet: dict, fee_rate: float = 0.001, slippage: float = 0.0002, favorite_platform: str = "Binance"):
-        params = ConstantMixParams(
+    strategy_cls = ConstantMixStrategy
+
+    def build_params(self, fee_rate: float = 0.001, slippage: float = 0.0002, favorite_platform: str = "Binance") -> ConstantMixParams:
+        return ConstantMixParams(
             target_weights={"BTCEUR": 0.8, "ETHEUR": 0.2, "SOLEUR": 0, "XRPEUR": 0, "BNBEUR": 0},
             fee_rate=fee_rate,
             fixed_fee=1,
@@ -16,5 +18,8 @@ class ConstantMixRunner:
             drift_threshold=0,
             favorite_platform=favorite_platform
         )
-        strategy = ConstantMixStrategy(params)
+
+    def run(self, prices: pd.DataFrame, wallet: dict, fee_rate: float = 0.001, slippage: float = 0.0002, favorite_platform: str = "Binance"):
+        params = self.build_params(fee_rate=fee_rate, slippage=slippage, favorite_platform=favorite_platform)
+        strategy = self.strategy_cls(params)
         return strategy.run(prices, wallet)
@@ -6,21 +6,20 @@ from app.domain.strategies.dynamicThreshold.dynamicThresholdStrategy import Dyna
 
 
 class DynamicThresholdRunner:
+    strategy_cls = DynamicThresholdStrategy
 
-    def run(self, prices: pd.DataFrame, wallet: dict, fee_rate: float = 0.001, slippage: float = 0.0002, favorite_platform: str = "Binance"):
+    def build_params(self, fee_rate: float = 0.001, slippage: float = 0.0002, favorite_platform: str = "Binance") -> DynamicThresholdParams:
         """
-        Lance le backtest avec la stratégie DynamicThreshold.
+        Paramètres par défaut de la stratégie DynamicThreshold (point de départ des sweeps).
         
         Args:
-            prices: DataFrame des prix historiques
-            wallet: Wallet de l'utilisateur
             fee_rate: Taux de frais (défaut: 0.001 = 0.1%)
             slippage: Slippage moyen (défaut: 0.0002 = 0.02%)
             favorite_platform: Plateforme pour calculer slippage par asset (défaut: "Binance")
         """
         # Note: Les symboles doivent correspondre aux colonnes du DataFrame prices
         # Format attendu: "BTCEUR", "ETHEUR", etc. (ou "BTC", "ETH" selon votre format)
-        params = DynamicThresholdParams(
+        return DynamicThresholdParams(
             target_weights={"BTCEUR": 0.70, "ETHEUR": 0.20, "BNBEUR": 0.0, "XRPEUR": 0.10, "USDTEUR": 0.0},
             vol_window=40,
             k=0.20,  # Facteur d'ajustement selon volatilité (essayer 0.15 / 0.20 / 0.25)
@@ -37,6 +36,19 @@ class DynamicThresholdRunner:
             verbose=False,
             favorite_platform=favorite_platform
         )
-        strategy = DynamicThresholdStrategy(params)
+
+    def run(self, prices: pd.DataFrame, wallet: dict, fee_rate: float = 0.001, slippage: float = 0.0002, favorite_platform: str = "Binance"):
+        """
+        Lance le backtest avec la stratégie DynamicThreshold.
+        
+        Args:
+            prices: DataFrame des prix historiques
+            wallet: Wallet de l'utilisateur
+            fee_rate: Taux de frais (défaut: 0.001 = 0.1%)
+            slippage: Slippage moyen (défaut: 0.0002 = 0.02%)
+            favorite_platform: Plateforme pour calculer slippage par asset (défaut: "Binance")
+        """
+        params = self.build_params(fee_rate=fee_rate, slippage=slippage, favorite_platform=favorite_platform)
+        strategy = self.strategy_cls(params)
         return strategy.run(prices, wallet)
 
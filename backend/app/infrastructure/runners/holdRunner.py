@@ -3,7 +3,12 @@ from app.domain.strategies.hold.holdParams import HoldParams
 from app.domain.strategies.hold.holdStrategy import holdStrategy
 
 class HoldRunner:
+    strategy_cls = holdStrategy
+
+    def build_params(self, fee_rate: float = 0.0, slippage: float = 0.0, favorite_platform: str = "Binance") -> HoldParams:
+        return HoldParams(fee_rate=fee_rate, slippage=slippage, favorite_platform=favorite_platform)
+
     def run(self, prices: pd.DataFrame, wallet: dict, fee_rate: float = 0.0, slippage: float = 0.0, favorite_platform: str = "Binance"):
-        params = HoldParams(fee_rate=fee_rate, slippage=slippage, favorite_platform=favorite_platform)
-        strategy = holdStrategy(params)
+        params = self.build_params(fee_rate=fee_rate, slippage=slippage, favorite_platform=favorite_platform)
+        strategy = self.strategy_cls(params)
         return strategy.run(prices, wallet)
@@ -0,0 +1,135 @@
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields, replace
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from app.domain.models.wallet.walletItem import WalletItem
+from app.domain.strategies.tradingUtils.Utils import backtest_metrics, wallet_items_to_holdings
+
+# Métriques pour lesquelles "plus petit" est meilleur
+ASCENDING_METRICS = {"max_drawdown", "total_cost"}
+
+# État des workers, initialisé une fois par process (voir _init_worker)
+_worker_state: Dict[str, Any] = {}
+
+
+def expand_grid(base_params, grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Produit cartésien d'une grille {champ: [valeurs]} ; les champs sont validés sur le dataclass."""
+    known = {f.name for f in fields(base_params)}
+    unknown = sorted(set(grid) - known)
+    if unknown:
+        raise ValueError(f"Paramètres inconnus pour {type(base_params).__name__} : {', '.join(unknown)}")
+    for name, values in grid.items():
+        if not isinstance(values, (list, tuple)) or len(values) == 0:
+            raise ValueError(f"La grille du paramètre '{name}' doit être une liste non vide")
+
+    names = list(grid)
+    combos = []
+    for values in itertools.product(*(grid[n] for n in names)):
+        overrides = {}
+        for name, v in zip(names, values):
+            # Les listes JSON remplacent des tuples (ex: stable_assets)
+            if isinstance(getattr(base_params, name), tuple) and isinstance(v, list):
+                v = tuple(v)
+            overrides[name] = v
+        combos.append(overrides)
+    return combos
+
+
+def _init_worker(shm_name, shape, index, columns, strategy_cls, base_params, wallet, periods_per_year):
+    # Les workers partagent le resource tracker du parent : c'est unlink() côté parent qui libère le segment
+    shm = SharedMemory(name=shm_name)
+    px = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker_state.update(
+        shm=shm,
+        prices=pd.DataFrame(px, index=index, columns=columns, copy=False),
+        strategy_cls=strategy_cls,
+        base_params=base_params,
+        wallet=wallet,
+        periods_per_year=periods_per_year,
+    )
+
+
+def _run_combination(overrides: Dict[str, Any]) -> Dict[str, Any]:
+    state = _worker_state
+    params = replace(state["base_params"], **overrides)
+    row = dict(overrides)
+    try:
+        history = state["strategy_cls"](params).run(state["prices"], state["wallet"])
+        row.update(backtest_metrics(history, periods_per_year=state["periods_per_year"]))
+        row["error"] = None
+    except ValueError as e:
+        # Combinaison invalide (ex: capital insuffisant pour payer les frais)
+        row.update({"cagr": np.nan, "sharpe": np.nan, "max_drawdown": np.nan, "total_cost": np.nan, "final_value": np.nan})
+        row["error"] = str(e)
+    return row
+
+
+class ParameterSweep:
+    """
+    Grid search d'une stratégie : chaque combinaison de la grille est backtestée sur la
+    même matrice de prix, placée une seule fois en mémoire partagée et lue sans copie
+    par les workers d'un ProcessPoolExecutor.
+    """
+
+    def __init__(self, strategy_cls, base_params, max_workers: int | None = None, periods_per_year: float = 365):
+        self.strategy_cls = strategy_cls
+        self.base_params = base_params
+        self.max_workers = max_workers
+        self.periods_per_year = periods_per_year
+
+    def run(self, prices: pd.DataFrame, wallet, grid: Dict[str, List[Any]], rank_by: str = "sharpe") -> pd.DataFrame:
+        combos = expand_grid(self.base_params, grid)
+        # Wallet réduit à des WalletItem (picklables) pour l'envoyer aux workers
+        holdings = wallet_items_to_holdings(wallet, quote="EUR")
+        wallet = {"items": [WalletItem(id=None, symbol=s, amount=a) for s, a in holdings.items()]}
+
+        px = np.ascontiguousarray(prices.to_numpy(dtype=np.float64))
+        shm = SharedMemory(create=True, size=max(px.nbytes, 1))
+        try:
+            shared = np.ndarray(px.shape, dtype=np.float64, buffer=shm.buf)
+            shared[:] = px
+            init_args = (
+                shm.name, px.shape, prices.index, prices.columns,
+                self.strategy_cls, self.base_params, wallet, self.periods_per_year,
+            )
+            if self.max_workers == 1 or len(combos) == 1:
+                rows = self._run_inline(init_args, combos)
+            else:
+                # spawn : pas de fork du process API (threads, sessions, verrous), comme backtestJobQueue
+                with ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=init_args,
+                ) as pool:
+                    rows = list(pool.map(_run_combination, combos))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return self.rank(pd.DataFrame(rows), rank_by)
+
+    @staticmethod
+    def _run_inline(init_args, combos) -> List[Dict[str, Any]]:
+        """Exécution dans le process courant (1 worker), via le même chemin que les workers."""
+        _init_worker(*init_args)
+        try:
+            return [_run_combination(c) for c in combos]
+        finally:
+            _worker_state.pop("prices", None)
+            _worker_state.pop("shm").close()
+
+    @staticmethod
+    def rank(table: pd.DataFrame, rank_by: str = "sharpe") -> pd.DataFrame:
+        if rank_by not in table.columns:
+            raise ValueError(f"Métrique de classement inconnue : {rank_by}")
+        ranked = table.sort_values(rank_by, ascending=rank_by in ASCENDING_METRICS, na_position="last", kind="stable")
+        ranked = ranked.reset_index(drop=True)
+        ranked.index.name = "rank"
+        return ranked
@@ -0,0 +1,296 @@
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Hors POSIX : verrou limité aux threads du process
+    fcntl = None
+
+
+class PriceSnapshotStore:
+    """
+    Snapshots disque des matrices de clôtures (dates x symboles), un par timeframe.
+
+    Format (pas de dépendance en plus de NumPy) :
+        <root>/<timeframe>/meta.json      symboles, nb de lignes, offset, fichiers
+        <root>/<timeframe>/close-*.f64    float64 brut, ligne par ligne (C-order)
+        <root>/<timeframe>/times-*.i8     open_time en ns depuis l'epoch (UTC, sans fuseau)
+
+    Les lectures mappent les fichiers en mémoire (np.memmap, lecture seule) : pas de
+    copie, et plusieurs process (workers de sweep, de jobs) partagent les mêmes pages.
+    Les écritures n'ajoutent que des octets en fin de fichier puis remplacent
+    meta.json de façon atomique : un lecteur voit toujours un état cohérent, et les
+    lignes déjà écrites ne changent jamais sous un memmap ouvert. Toute modification
+    d'une ligne existante (dernière bougie complétée, nouveau symbole, données
+    antérieures) réécrit de nouveaux fichiers. Les fichiers de la génération
+    précédente sont conservés jusqu'à la réécriture suivante : un lecteur qui a lu
+    l'ancien meta.json peut encore les mapper. La rétention se fait par offset
+    logique, compacté à l'occasion.
+
+    Les écrivains (workers API, scheduler, process de jobs) sont sérialisés par un
+    verrou fcntl.flock sur <root>/<timeframe>/.lock, en plus du verrou entre threads.
+    """
+
+    META = "meta.json"
+    LOCK = ".lock"
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    # ----------- Lecture -----------
+
+    def read(self, timeframe: str) -> Optional[pd.DataFrame]:
+        """Matrice de prix mappée en mémoire (lecture seule), ou None si pas de snapshot."""
+        return self._mapped(timeframe, self._frame)
+
+    def isCurrent(self, timeframe: str, version) -> bool:
+        """Vrai si le snapshot a été construit à cette version des données (repo.getDataVersion())."""
+        meta = self._readMeta(timeframe)
+        return meta is not None and meta.get("version") is not None and meta["version"] == self._versionKey(version)
+
+    def latestOpenTime(self, timeframe: str) -> Optional[datetime]:
+        return self._mapped(
+            timeframe, lambda tf, meta: pd.Timestamp(int(self._map(tf, meta)[1][-1])).to_pydatetime()
+        )
+
+    # ----------- Écriture -----------
+
+    def write(self, timeframe: str, prices: pd.DataFrame, version=None) -> None:
+        """(Ré)écrit entièrement le snapshot du timeframe."""
+        with self._locked(timeframe):
+            self._write(timeframe, prices, version)
+
+    def append(self, timeframe: str, prices: pd.DataFrame, version=None) -> None:
+        """
+        Ajoute des lignes au snapshot. Cas rapide : mêmes symboles (ou sous-ensemble) et
+        dates >= dernière date stockée ; la dernière ligne peut être complétée en place.
+        Sinon (nouveau symbole, dates antérieures), fusion et réécriture complète.
+        """
+        with self._locked(timeframe):
+            self._append(timeframe, prices, version)
+
+    def trimBefore(self, timeframe: str, cutoff: datetime) -> None:
+        """Rétention : masque les lignes antérieures à cutoff ; compacte quand elles dominent le fichier."""
+        with self._locked(timeframe):
+            self._trimBefore(timeframe, cutoff)
+
+    def refresh(self, candleRepo, since: Optional[datetime] = None, full: bool = False) -> None:
+        """
+        Met le snapshot du timeframe du repository à jour depuis la base et y enregistre
+        la version des données (génération d'écriture, dernière bougie) lue avant les bougies.
+
+        Incrémental tant que la base n'a reçu que des ajouts en fin de série : relit les
+        bougies à partir de la dernière date stockée (ou de since si antérieure), puis
+        applique la dernière rétention. Reconstruction complète si la génération de
+        réécriture a changé (backfill sous la dernière bougie, suppression par symbole),
+        si le snapshot est vide, ou avec full=True.
+        """
+        timeframe = candleRepo.timeframe
+        with self._locked(timeframe):
+            version = candleRepo.getDataVersion()
+            if self.isCurrent(timeframe, version):
+                # Déjà à jour (par un autre process pendant l'attente du verrou, par exemple)
+                return
+            rewrite, purged_before = candleRepo.getRewriteState()
+            meta = self._readMeta(timeframe)
+            if full or meta is None or meta["rows"] - meta["offset"] <= 0 or meta.get("rewrite") != rewrite:
+                self._write(timeframe, candleRepo.getCloseMatrix(), version, rewrite)
+                return
+            last = pd.Timestamp(int(self._map(timeframe, meta)[1][-1])).to_pydatetime()
+            if since is not None:
+                since = pd.Timestamp(int(self._toNs(pd.DatetimeIndex([since]))[0])).to_pydatetime()
+                last = min(last, since)
+            self._append(timeframe, candleRepo.getCloseMatrix(start=last), version, rewrite)
+            if purged_before is not None:
+                self._trimBefore(timeframe, purged_before)
+
+    # ----------- Interne -----------
+
+    def _append(self, timeframe: str, prices: pd.DataFrame, version=None, rewrite=None) -> None:
+        meta = self._readMeta(timeframe)
+        if meta is None or meta["rows"] - meta["offset"] <= 0:
+            if not prices.empty:
+                self._write(timeframe, prices.sort_index(), version, rewrite)
+            return
+        if prices.empty:
+            meta["version"], meta["rewrite"] = self._versionKey(version), rewrite
+            self._writeMeta(timeframe, meta)
+            return
+        prices = prices.sort_index()
+
+        close, times = self._map(timeframe, meta)
+        last = times[-1]
+        new_times = self._toNs(prices.index)
+        if not set(prices.columns) <= set(meta["symbols"]) or new_times[0] < last:
+            self._write(timeframe, self._merge(self._frame(timeframe, meta), prices), version, rewrite)
+            return
+
+        block = prices.reindex(columns=meta["symbols"]).to_numpy(dtype=np.float64)
+        if new_times[0] == last:
+            row = np.where(np.isnan(block[0]), close[-1], block[0])
+            if not np.array_equal(row, close[-1], equal_nan=True):
+                # Dernière ligne complétée (bougies arrivées après la précédente écriture) :
+                # jamais modifiée en place sous les memmaps des lecteurs, nouvelle génération
+                self._write(timeframe, self._merge(self._frame(timeframe, meta), prices), version, rewrite)
+                return
+            block, new_times = block[1:], new_times[1:]
+
+        if len(new_times):
+            with open(self._path(timeframe, meta["close_file"]), "ab") as f:
+                f.write(np.ascontiguousarray(block).tobytes())
+            with open(self._path(timeframe, meta["times_file"]), "ab") as f:
+                f.write(new_times.tobytes())
+            meta["rows"] += len(new_times)
+        meta["version"], meta["rewrite"] = self._versionKey(version), rewrite
+        self._writeMeta(timeframe, meta)
+
+    def _trimBefore(self, timeframe: str, cutoff: datetime) -> None:
+        meta = self._readMeta(timeframe)
+        if meta is None:
+            return
+        _, times = self._map(timeframe, meta)
+        offset = int(np.searchsorted(times, self._toNs(pd.DatetimeIndex([cutoff]))[0], side="left"))
+        if offset <= meta["offset"]:
+            return
+        meta["offset"] = offset
+        if offset > (meta["rows"] - offset):
+            # Compaction : réécrit uniquement les lignes conservées
+            self._write(timeframe, self._frame(timeframe, meta).copy(), meta.get("version"), meta.get("rewrite"))
+            return
+        self._writeMeta(timeframe, meta)
+
+    @contextmanager
+    def _locked(self, timeframe: str):
+        """Verrou exclusif d'écriture du timeframe : threads du process, puis autres process (flock)."""
+        directory = os.path.join(self.root, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(directory, self.LOCK), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, timeframe: str, prices: pd.DataFrame, version=None, rewrite=None) -> None:
+        directory = os.path.join(self.root, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        prices = prices.sort_index()
+        suffix = uuid.uuid4().hex[:12]
+        meta = {
+            "symbols": [str(c) for c in prices.columns],
+            "rows": len(prices),
+            "offset": 0,
+            "close_file": f"close-{suffix}.f64",
+            "times_file": f"times-{suffix}.i8",
+            "version": self._versionKey(version),
+            # Génération de réécriture de la base au moment de l'écriture (None = inconnue)
+            "rewrite": rewrite,
+        }
+        with open(os.path.join(directory, meta["close_file"]), "wb") as f:
+            f.write(np.ascontiguousarray(prices.to_numpy(dtype=np.float64)).tobytes())
+        with open(os.path.join(directory, meta["times_file"]), "wb") as f:
+            f.write(self._toNs(prices.index).tobytes())
+
+        previous = self._readMeta(timeframe)
+        self._writeMeta(timeframe, meta)
+        # Génération précédente conservée (lecteurs entre meta.json et le mapping) ; les
+        # plus anciennes, et les restes d'une écriture interrompue, sont supprimées.
+        # Un lecteur qui les a déjà mappées les garde jusqu'à fermeture.
+        keep = {meta["close_file"], meta["times_file"]}
+        if previous is not None:
+            keep |= {previous["close_file"], previous["times_file"]}
+        for name in os.listdir(directory):
+            if name.startswith(("close-", "times-")) and name not in keep:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _merge(existing: pd.DataFrame, prices: pd.DataFrame) -> pd.DataFrame:
+        """Snapshot existant complété par prices (prioritaire) ; colonnes existantes en tête."""
+        symbols = list(existing.columns) + [c for c in prices.columns if c not in existing.columns]
+        return prices.combine_first(existing).reindex(columns=symbols)
+
+    def _mapped(self, timeframe: str, build, attempts: int = 3):
+        """
+        build(timeframe, meta) sur le meta.json courant, sans verrou. Si les fichiers ont
+        disparu entre la lecture de meta.json et le mapping (deux réécritures entre-temps),
+        on relit meta.json.
+        """
+        for attempt in range(attempts):
+            meta = self._readMeta(timeframe)
+            if meta is None or meta["rows"] - meta["offset"] <= 0:
+                return None
+            try:
+                return build(timeframe, meta)
+            except FileNotFoundError:
+                if attempt == attempts - 1:
+                    raise
+
+    def _frame(self, timeframe: str, meta: dict) -> pd.DataFrame:
+        close, times = self._map(timeframe, meta)
+        index = pd.DatetimeIndex(times[meta["offset"]:].view("datetime64[ns]"), name="open_time")
+        columns = pd.Index(meta["symbols"], name="symbol")
+        return pd.DataFrame(close[meta["offset"]:], index=index, columns=columns, copy=False)
+
+    def _map(self, timeframe: str, meta: dict) -> tuple[np.ndarray, np.ndarray]:
+        rows, width = meta["rows"], len(meta["symbols"])
+        if rows == 0 or width == 0:
+            return np.empty((rows, width)), np.empty(rows, dtype=np.int64)
+        close = np.memmap(self._path(timeframe, meta["close_file"]), dtype=np.float64, mode="r", shape=(rows, width))
+        times = np.memmap(self._path(timeframe, meta["times_file"]), dtype=np.int64, mode="r", shape=(rows,))
+        return close, times
+
+    def _readMeta(self, timeframe: str) -> Optional[dict]:
+        try:
+            with open(self._path(timeframe, self.META)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _writeMeta(self, timeframe: str, meta: dict) -> None:
+        path = self._path(timeframe, self.META)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+            # Données sur disque avant le renommage : meta.json ne pointe jamais vers un état partiel
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _path(self, timeframe: str, name: str) -> str:
+        return os.path.join(self.root, timeframe, name)
+
+    @staticmethod
+    def _versionKey(version):
+        """Version des données sous forme JSON (les datetimes deviennent des chaînes ISO)."""
+        if version is None:
+            return None
+        return json.loads(json.dumps(version, default=lambda v: v.isoformat()))
+
+    @staticmethod
+    def _toNs(index) -> np.ndarray:
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        return index.as_unit("ns").asi8.astype(np.int64, copy=False)
+
+
+# Store partagé par le process ; désactivé (None) si PRICE_SNAPSHOT_DIR n'est pas défini
+priceSnapshotStore = PriceSnapshotStore(settings.PRICE_SNAPSHOT_DIR) if settings.PRICE_SNAPSHOT_DIR else None
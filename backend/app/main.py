@@ -16,6 +16,8 @@ from dotenv import load_dotenv
 import os
 
 from app.core.scheduler.candleScheduler import registerCandleScheduler
+from app.infrastructure.adapters.binanceCandleAdapter import candleProvider
+from app.infrastructure.runners.backtestJobQueue import backtestJobQueue
 
 load_dotenv()
 
@@ -26,6 +28,8 @@ async def lifespan(app: FastAPI):
     print("✅ Base de données prête")
     registerCandleScheduler(app)
     yield
+    await candleProvider.aclose()
+    backtestJobQueue.shutdown()
 
 
 app = FastAPI(title="Crypto Balancer API", lifespan=lifespan)
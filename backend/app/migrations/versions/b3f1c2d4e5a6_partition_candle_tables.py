@@ -0,0 +1,147 @@
+"""partition candle tables by open_time
+
+Revision ID: b3f1c2d4e5a6
+Revises: 532a7df5ae51
+Create Date: 2026-10-18 10:00:00.000000
+
+Les tables de bougies deviennent partitionnées par plage d'open_time (mensuelle pour
+"candle", journalière pour "candleThreeMin") avec une clé primaire (symbol, open_time)
+à la place de id. La rétention se fait ensuite par suppression de partitions
+(BaseCandleRepository.purgeOlderThan) et les nouvelles partitions sont créées à
+l'écriture (BaseCandleRepository.ensurePartitions).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b3f1c2d4e5a6'
+down_revision = '532a7df5ae51'
+branch_labels = None
+depends_on = None
+
+# table -> (unité date_trunc, format du suffixe de partition, pas)
+TABLES = {
+    "candle": ("month", "YYYYMM", "1 month"),
+    "candleThreeMin": ("day", "YYYYMMDD", "1 day"),
+}
+
+# Contraintes uniques de l'ancien schéma
+OLD_UNIQUE = {
+    "candle": "uq_symbol_time",
+    "candleThreeMin": "uq_symbol_time_3min_candle",
+}
+
+
+def _exists(name: str) -> bool:
+    return op.get_bind().execute(sa.text("SELECT to_regclass(quote_ident(:name)) IS NOT NULL"), {"name": name}).scalar()
+
+
+def _is_partitioned(name: str) -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(quote_ident(:name)))"),
+        {"name": name},
+    ).scalar()
+
+
+def _create_partitioned(table: str) -> None:
+    op.execute(f'''
+        CREATE TABLE "{table}" (
+            symbol VARCHAR NOT NULL,
+            open_time TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            open FLOAT,
+            high FLOAT,
+            low FLOAT,
+            close FLOAT,
+            PRIMARY KEY (symbol, open_time)
+        ) PARTITION BY RANGE (open_time)
+    ''')
+    op.execute(f'CREATE INDEX "ix_{table}_symbol" ON "{table}" (symbol)')
+    op.execute(f'CREATE INDEX "ix_{table}_open_time" ON "{table}" (open_time)')
+
+
+def _create_partitions_for(table: str, source: str) -> None:
+    """Crée les partitions couvrant les open_time présents dans source."""
+    unit, suffix, step = TABLES[table]
+    op.execute(f'''
+        DO $$
+        DECLARE
+            lo timestamp;
+            hi timestamp;
+        BEGIN
+            SELECT date_trunc('{unit}', min(open_time)), max(open_time) INTO lo, hi FROM "{source}";
+            WHILE lo IS NOT NULL AND lo <= hi LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_p' || to_char(lo, '{suffix}'), '{table}', lo, lo + interval '{step}'
+                );
+                lo := lo + interval '{step}';
+            END LOOP;
+        END $$;
+    ''')
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table in TABLES:
+        if not _exists(table):
+            _create_partitioned(table)
+            continue
+        if _is_partitioned(table):
+            continue
+
+        old = f"{table}_old"
+        op.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+        # Libère les noms de contraintes et d'index réutilisés par la nouvelle table
+        op.execute(f'ALTER TABLE "{old}" DROP CONSTRAINT IF EXISTS "{table}_pkey"')
+        op.execute(f'ALTER TABLE "{old}" DROP CONSTRAINT IF EXISTS "{OLD_UNIQUE[table]}"')
+        op.execute(f'DROP INDEX IF EXISTS "ix_{table}_symbol"')
+        op.execute(f'DROP INDEX IF EXISTS "ix_{table}_open_time"')
+
+        _create_partitioned(table)
+        _create_partitions_for(table, old)
+        op.execute(f'''
+            INSERT INTO "{table}" (symbol, open_time, open, high, low, close)
+            SELECT symbol, open_time, open, high, low, close FROM "{old}"
+            WHERE symbol IS NOT NULL AND open_time IS NOT NULL
+            ON CONFLICT DO NOTHING
+        ''')
+        op.execute(f'DROP TABLE "{old}"')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table in TABLES:
+        if not _exists(table) or not _is_partitioned(table):
+            continue
+
+        part = f"{table}_partitioned"
+        op.execute(f'ALTER TABLE "{table}" RENAME TO "{part}"')
+        op.execute(f'ALTER TABLE "{part}" DROP CONSTRAINT IF EXISTS "{table}_pkey"')
+        op.execute(f'DROP INDEX IF EXISTS "ix_{table}_symbol"')
+        op.execute(f'DROP INDEX IF EXISTS "ix_{table}_open_time"')
+        op.execute(f'''
+            CREATE TABLE "{table}" (
+                id SERIAL PRIMARY KEY,
+                symbol VARCHAR,
+                open_time TIMESTAMP WITHOUT TIME ZONE,
+                open FLOAT,
+                high FLOAT,
+                low FLOAT,
+                close FLOAT,
+                CONSTRAINT "{OLD_UNIQUE[table]}" UNIQUE (symbol, open_time)
+            )
+        ''')
+        op.execute(f'CREATE INDEX "ix_{table}_symbol" ON "{table}" (symbol)')
+        op.execute(f'CREATE INDEX "ix_{table}_open_time" ON "{table}" (open_time)')
+        op.execute(f'''
+            INSERT INTO "{table}" (symbol, open_time, open, high, low, close)
+            SELECT symbol, open_time, open, high, low, close FROM "{part}"
+            ORDER BY open_time, symbol
+        ''')
+        # Supprime aussi toutes les partitions
+        op.execute(f'DROP TABLE "{part}" CASCADE')
@@ -0,0 +1,43 @@
+"""covering (symbol, open_time) index for candle reads
+
+Revision ID: c4a2e7f9b1d3
+Revises: b3f1c2d4e5a6
+Create Date: 2026-10-18 11:00:00.000000
+
+Index (symbol, open_time) INCLUDE (close, open, high, low) : les lectures par symbole
+et plage de dates (matrices de prix des backtests, graphiques) sont servies en
+index-only scan. L'index mono-colonne sur symbol, redondant, est supprimé.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c4a2e7f9b1d3'
+down_revision = 'b3f1c2d4e5a6'
+branch_labels = None
+depends_on = None
+
+TABLES = ("candle", "candleThreeMin")
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table in TABLES:
+        # Sur une table partitionnée, l'index est créé sur chaque partition
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS "ix_{table}_symbol_open_time_covering" '
+            f'ON "{table}" (symbol, open_time) INCLUDE (close, open, high, low)'
+        )
+        op.execute(f'DROP INDEX IF EXISTS "ix_{table}_symbol"')
+        op.execute(f'ANALYZE "{table}"')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table in TABLES:
+        op.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_symbol" ON "{table}" (symbol)')
+        op.execute(f'DROP INDEX IF EXISTS "ix_{table}_symbol_open_time_covering"')
@@ -0,0 +1,32 @@
+"""candle write generation per timeframe
+
+Revision ID: d7e3b9a1c5f2
+Revises: c4a2e7f9b1d3
+Create Date: 2026-10-18 16:00:00.000000
+
+Compteur d'écritures par timeframe, incrémenté dans la transaction de chaque écriture
+de bougies : version des données partagée par tous les process (caches de matrices de
+prix, de résultats de backtest et snapshots disque).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd7e3b9a1c5f2'
+down_revision = 'c4a2e7f9b1d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'candleWriteGeneration',
+        sa.Column('timeframe', sa.String(), nullable=False),
+        sa.Column('generation', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('timeframe'),
+    )
+
+
+def downgrade():
+    op.drop_table('candleWriteGeneration')
@@ -0,0 +1,32 @@
+"""candle rewrite generation and purge cutoff per timeframe
+
+Revision ID: e4c8a2f6d1b7
+Revises: d7e3b9a1c5f2
+Create Date: 2026-10-18 19:00:00.000000
+
+Distingue les écritures en fin de série (rattrapables par un ajout incrémental des
+snapshots) des réécritures (backfill sous la dernière bougie, suppression par symbole),
+et garde la date de la dernière rétention appliquée.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e4c8a2f6d1b7'
+down_revision = 'd7e3b9a1c5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'candleWriteGeneration',
+        sa.Column('rewrite_generation', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    op.add_column('candleWriteGeneration', sa.Column('purged_before', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('candleWriteGeneration', 'purged_before')
+    op.drop_column('candleWriteGeneration', 'rewrite_generation')
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from app.domain.strategies.tradingUtils.Utils import timeframe_minutes, timeframe_periods_per_year
+
+# Symboles réels en premier : la catégorie de slippage (majors, ...) reste réaliste
+SYMBOLS = ("BTC", "ETH", "BNB", "SOL", "XRP", "ADA", "DOGE", "DOT", "AVAX", "LINK", "USDT")
+
+
+def gbm_prices(
+    bars: int,
+    assets: int,
+    timeframe: str = "1h",
+    seed: int = 0,
+    mu: float = 0.05,
+    sigma: float = 0.8,
+    start: str = "2015-01-01",
+) -> pd.DataFrame:
+    """
+    Matrice de prix synthétique (barres x actifs) suivant un mouvement brownien géométrique.
+
+    mu et sigma sont annualisés et ramenés au pas du timeframe ; la génération est
+    déterministe pour une graine donnée afin que deux runs de benchmark comparent
+    exactement les mêmes données.
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / timeframe_periods_per_year(timeframe)
+    shocks = rng.standard_normal((bars, assets))
+    log_returns = (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * shocks
+    log_returns[0] = 0.0
+    start_prices = rng.uniform(1.0, 1000.0, assets)
+    px = start_prices * np.exp(np.cumsum(log_returns, axis=0))
+
+    index = pd.date_range(start, periods=bars, freq=f"{timeframe_minutes(timeframe)}min", name="date")
+    return pd.DataFrame(px, index=index, columns=symbols(assets))
+
+
+def symbols(assets: int) -> list[str]:
+    """Noms de colonnes : symboles connus puis ASSET<n> au-delà."""
+    named = [s for s in SYMBOLS if s != "USDT"][:assets]
+    return named + [f"ASSET{i}" for i in range(len(named), assets)]
+
+
+def equal_wallet(prices: pd.DataFrame, capital: float = 1_000_000.0) -> dict:
+    """Wallet au format DB ({"items": [symbol, amount]}) réparti à parts égales à la première barre."""
+    per_asset = capital / len(prices.columns)
+    p0 = prices.iloc[0]
+    return {"items": [SimpleNamespace(symbol=a, amount=per_asset / float(p0[a])) for a in prices.columns]}
+
+
+def equal_weights(prices: pd.DataFrame) -> dict[str, float]:
+    return {a: 1.0 / len(prices.columns) for a in prices.columns}
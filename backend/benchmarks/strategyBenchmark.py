@@ -0,0 +1,203 @@
+"""
+Benchmarks des moteurs de stratégie sur des prix synthétiques (GBM).
+
+Mesure pour chaque cas le débit (barres/s, meilleur de N répétitions après un
+run de chauffe qui absorbe la compilation numba) et le pic mémoire (tracemalloc,
+sur un run séparé pour ne pas fausser le chronométrage).
+
+Depuis backend/ :
+    python -m benchmarks.strategyBenchmark --bars 50000 --assets 10 --save baseline.json
+    python -m benchmarks.strategyBenchmark --compare baseline.json
+
+Avec --compare, les dimensions de la référence sont reprises et le code de sortie
+vaut 1 si un cas perd plus de --tolerance (25 % par défaut) de débit ou de pic
+mémoire. Une référence n'a de sens que sur la machine qui l'a produite ; les cas
+très rapides (hold) sont bruités, augmenter --bars et --repeat pour les stabiliser.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from app.domain.strategies.constantMix.constantMixParams import ConstantMixParams
+from app.domain.strategies.constantMix.constantMixStrategy import ConstantMixStrategy
+from app.domain.strategies.tradingUtils.Kernel import HAS_NUMBA
+from app.domain.strategies.dynamicThreshold.dynamicThresholdParams import DynamicThresholdParams
+from app.domain.strategies.dynamicThreshold.dynamicThresholdStrategy import DynamicThresholdStrategy
+from app.domain.strategies.hold.holdStrategy import holdStrategy
+from app.domain.strategies.tradingUtils.Broker import Broker, TradeCost
+from benchmarks.priceGenerator import equal_wallet, equal_weights, gbm_prices
+
+
+def _hold(prices: pd.DataFrame, wallet: dict):
+    return lambda: holdStrategy().run(prices, wallet)
+
+
+def _constant_mix(prices: pd.DataFrame, wallet: dict):
+    # Les params sont normalisés en place par la stratégie : une instance neuve par run
+    return lambda: ConstantMixStrategy(
+        ConstantMixParams(target_weights=equal_weights(prices), drift_threshold=0.05)
+    ).run(prices, wallet)
+
+
+def _dynamic_threshold(prices: pd.DataFrame, wallet: dict):
+    return lambda: DynamicThresholdStrategy(DynamicThresholdParams(target_weights=equal_weights(prices))).run(prices, wallet)
+
+
+def _broker_rebalance(prices: pd.DataFrame, wallet: dict):
+    """Broker.rebalance (API dict) à chaque barre, en alternant deux allocations pour forcer des échanges."""
+    assets = list(prices.columns)
+    skewed = {a: (2.0 if i % 2 else 1.0) for i, a in enumerate(assets)}
+    total = sum(skewed.values())
+    targets = (equal_weights(prices), {a: w / total for a, w in skewed.items()})
+
+    def run():
+        broker = Broker(prices, TradeCost(fee_rate=0.001, fixed_fee=0.0, slippage=0.0002))
+        broker.load_holdings({item.symbol: item.amount for item in wallet["items"]})
+        for t in range(len(prices)):
+            broker.rebalance(t, targets[t % 2])
+
+    return run
+
+
+CASES = {
+    "hold": _hold,
+    "constant_mix": _constant_mix,
+    "dynamic_threshold": _dynamic_threshold,
+    "broker_rebalance": _broker_rebalance,
+}
+
+
+def measure(fn, repeat: int = 3) -> dict:
+    """Temps (meilleur et médian) et pic mémoire d'un appel, après un run de chauffe."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "median_seconds": statistics.median(timings), "peak_mb": peak / 2 ** 20}
+
+
+def run_benchmarks(
+    bars: int,
+    assets: int,
+    timeframe: str = "1h",
+    repeat: int = 3,
+    seed: int = 0,
+    cases: list[str] | None = None,
+) -> dict:
+    """Exécute les cas demandés sur une même matrice GBM ; renvoie {"meta": ..., "results": {cas: mesures}}."""
+    prices = gbm_prices(bars, assets, timeframe=timeframe, seed=seed)
+    wallet = equal_wallet(prices)
+
+    results = {}
+    for name in cases or CASES:
+        stats = measure(CASES[name](prices, wallet), repeat=repeat)
+        stats["bars_per_sec"] = bars / stats["seconds"] if stats["seconds"] > 0 else float("inf")
+        results[name] = stats
+
+    meta = {
+        "bars": bars,
+        "assets": assets,
+        "timeframe": timeframe,
+        "repeat": repeat,
+        "seed": seed,
+        "numba": HAS_NUMBA,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25) -> list[str]:
+    """
+    Régressions de current par rapport à baseline : débit inférieur de plus de `tolerance`
+    ou pic mémoire supérieur de plus de `tolerance`. Les cas absents d'un côté sont ignorés.
+    """
+    regressions = []
+    for name, stats in current["results"].items():
+        ref = baseline["results"].get(name)
+        if ref is None:
+            continue
+        if stats["bars_per_sec"] < ref["bars_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: débit {stats['bars_per_sec']:,.0f} barres/s < référence {ref['bars_per_sec']:,.0f}"
+            )
+        if stats["peak_mb"] > ref["peak_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: pic mémoire {stats['peak_mb']:.1f} Mo > référence {ref['peak_mb']:.1f} Mo")
+    return regressions
+
+
+def _print_table(report: dict, baseline: dict | None = None) -> None:
+    meta = report["meta"]
+    print(f"{meta['bars']} barres x {meta['assets']} actifs ({meta['timeframe']}), numba={meta['numba']}")
+    print(f"{'cas':<20}{'barres/s':>14}{'médiane (s)':>14}{'pic (Mo)':>12}{'vs réf.':>10}")
+    for name, stats in report["results"].items():
+        ref = (baseline or {}).get("results", {}).get(name)
+        delta = f"{stats['bars_per_sec'] / ref['bars_per_sec'] - 1:+.0%}" if ref else ""
+        print(
+            f"{name:<20}{stats['bars_per_sec']:>14,.0f}{stats['median_seconds']:>14.4f}"
+            f"{stats['peak_mb']:>12.1f}{delta:>10}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, help="50000 par défaut, ou celui de la référence")
+    parser.add_argument("--assets", type=int, help="10 par défaut, ou celui de la référence")
+    parser.add_argument("--timeframe", help="1h par défaut, ou celui de la référence")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--case", action="append", choices=list(CASES), help="cas à exécuter (tous par défaut)")
+    parser.add_argument("--save", help="écrit le rapport JSON (nouvelle référence)")
+    parser.add_argument("--compare", help="rapport JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    baseline = None
+    defaults = {"bars": 50_000, "assets": 10, "timeframe": "1h"}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        # Mêmes dimensions que la référence sauf demande explicite contraire
+        defaults.update({k: baseline["meta"][k] for k in defaults})
+    for key, value in defaults.items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+
+    report = run_benchmarks(args.bars, args.assets, args.timeframe, args.repeat, args.seed, args.case)
+    _print_table(report, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Référence écrite : {args.save}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"RÉGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
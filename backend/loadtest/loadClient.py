@@ -0,0 +1,187 @@
+"""
+Client de charge asyncio (httpx) pour les routes /strategy, /candle, /wallet et /crypto.
+
+Prépare un wallet de test (et les bougies via le stub Binance avec --seed-candles),
+puis --concurrency workers enchaînent les routes du scénario pendant --duration
+secondes (ou --requests requêtes par route). Le rapport donne, par route : nombre
+de requêtes, erreurs, débit et latences p50/p95/p99/max en millisecondes.
+
+Depuis backend/, API déjà démarrée (voir loadtest/README.md) :
+    python -m loadtest.loadClient --base-url http://localhost:8000/api/v1 --concurrency 20 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+
+import httpx
+import numpy as np
+
+# Symboles de CryptoRepository.get_all_symbols présents dans les poids cibles des runners
+WALLET_AMOUNTS = {"BTCEUR": 0.5, "ETHEUR": 4.0, "XRPEUR": 2000.0}
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    method: str
+    path: str
+    params: dict = field(default_factory=dict)
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+
+
+def default_routes(user_id: int, symbol: str = "BTCEUR") -> list[Route]:
+    """Scénario par défaut : lectures wallet et bougies, prix (stub Binance) et backtests."""
+    return [
+        Route("GET /wallet/getWalletByUserId", "GET", f"/wallet/getWalletByUserId/{user_id}"),
+        Route("GET /wallet/exists", "GET", f"/wallet/exists/{user_id}"),
+        Route("GET /candle/getCandlesBySymbol", "GET", f"/candle/getCandlesBySymbol/{symbol}"),
+        Route("GET /crypto/price", "GET", f"/crypto/price/{symbol}"),
+        Route("POST /strategy/hold", "POST", "/strategy/hold", {"userId": user_id}),
+        Route("POST /strategy/constant_mix", "POST", "/strategy/constant_mix", {"userId": user_id}),
+        Route("POST /strategy/dynamic_threshold", "POST", "/strategy/dynamic_threshold", {"userId": user_id}),
+    ]
+
+
+async def seed(client: httpx.AsyncClient, user_id: int, candles: bool = False) -> None:
+    """Wallet de test recréé à l'identique ; bougies 1d et 3m téléchargées depuis le stub si demandé."""
+    if (await client.get(f"/wallet/exists/{user_id}")).json():
+        (await client.delete(f"/wallet/{user_id}")).raise_for_status()
+    (await client.post(f"/wallet/{user_id}/create")).raise_for_status()
+    for symbol, amount in WALLET_AMOUNTS.items():
+        response = await client.post(
+            f"/wallet/{user_id}/addItemToWalletByUserID", params={"symbol": symbol, "amount": amount}
+        )
+        response.raise_for_status()
+    if candles:
+        for path in ("/candle/getTwoYearsCandles", "/candle/getThreeMinutesCandles"):
+            (await client.get(path, timeout=None)).raise_for_status()
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    routes: list[Route],
+    concurrency: int = 10,
+    duration: float | None = 30.0,
+    requests: int | None = None,
+) -> tuple[dict[str, RouteStats], float]:
+    """
+    Exécute le scénario et renvoie (statistiques par route, durée écoulée en s).
+
+    Avec `requests`, chaque route est appelée exactement ce nombre de fois ; sinon les
+    workers tournent sur les routes jusqu'à l'échéance `duration`. Une réponse HTTP
+    >= 400 ou une erreur de transport compte comme erreur (latence non retenue).
+    """
+    stats = {route.name: RouteStats() for route in routes}
+    if requests is not None:
+        queue = [route for _ in range(requests) for route in routes]
+    else:
+        queue = None
+    deadline = None if duration is None else time.perf_counter() + duration
+    cursor = 0
+
+    def next_route() -> Route | None:
+        nonlocal cursor
+        if queue is not None:
+            if cursor >= len(queue):
+                return None
+        elif time.perf_counter() >= deadline:
+            return None
+        route = queue[cursor] if queue is not None else routes[cursor % len(routes)]
+        cursor += 1
+        return route
+
+    async def worker():
+        while (route := next_route()) is not None:
+            route_stats = stats[route.name]
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(route.method, route.path, params=route.params)
+            except httpx.HTTPError:
+                route_stats.errors += 1
+                continue
+            elapsed = time.perf_counter() - t0
+            route_stats.statuses[response.status_code] = route_stats.statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 400:
+                route_stats.errors += 1
+            else:
+                route_stats.latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats, time.perf_counter() - started
+
+
+def summarize(stats: dict[str, RouteStats], elapsed: float) -> dict[str, dict]:
+    """Latences (ms) p50/p95/p99/max, débit (requêtes réussies/s) et erreurs par route."""
+    report = {}
+    for name, route_stats in stats.items():
+        latencies = np.asarray(route_stats.latencies) * 1000
+        summary = {
+            "requests": len(latencies) + route_stats.errors,
+            "errors": route_stats.errors,
+            "statuses": {str(k): v for k, v in sorted(route_stats.statuses.items())},
+            "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        }
+        if latencies.size:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            summary.update(p50_ms=p50, p95_ms=p95, p99_ms=p99, max_ms=float(latencies.max()))
+        report[name] = summary
+    return report
+
+
+def _print_report(report: dict[str, dict], elapsed: float) -> None:
+    print(f"Durée : {elapsed:.1f} s")
+    print(f"{'route':<34}{'req.':>7}{'err.':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, s in report.items():
+        latencies = "".join(f"{s[k]:>9.1f}" if k in s else f"{'-':>9}" for k in ("p50_ms", "p95_ms", "p99_ms", "max_ms"))
+        print(f"{name:<34}{s['requests']:>7}{s['errors']:>6}{s['throughput']:>9.1f}{latencies}")
+
+
+async def _main(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        if not args.no_seed:
+            await seed(client, args.user_id, candles=args.seed_candles)
+        routes = default_routes(args.user_id)
+        if args.route:
+            routes = [r for r in routes if any(pattern in r.name for pattern in args.route)]
+        stats, elapsed = await run_load(
+            client, routes, args.concurrency, duration=args.duration, requests=args.requests
+        )
+    report = summarize(stats, elapsed)
+    _print_report(report, elapsed)
+    return {"meta": {**vars(args), "elapsed": elapsed}, "routes": report}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--user-id", type=int, default=900_001)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30.0, help="secondes (ignoré avec --requests)")
+    parser.add_argument("--requests", type=int, help="nombre de requêtes par route")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--route", action="append", help="ne garder que les routes contenant ce motif")
+    parser.add_argument("--seed-candles", action="store_true", help="backfill des bougies 1d/3m depuis le stub Binance")
+    parser.add_argument("--no-seed", action="store_true", help="ne pas recréer le wallet de test")
+    parser.add_argument("--json", help="écrit le rapport JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(_main(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if any(s["errors"] for s in result["routes"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Stub local des endpoints REST Binance utilisés par l'API (klines et ticker/price).
+
+Les bougies sont déterministes (même symbole et même open_time -> même bougie), ce
+qui rend les backfills reproductibles d'un run de charge à l'autre. Une latence
+artificielle (STUB_BINANCE_LATENCY_MS) simule l'aller-retour réseau vers Binance.
+
+    uvicorn loadtest.stubBinance:app --port 9000
+    BINANCE_API_URL=http://localhost:9000/api/v3 uvicorn app.main:app
+"""
+import asyncio
+import math
+import os
+import time
+import zlib
+
+from fastapi import FastAPI, HTTPException, Query
+
+from app.infrastructure.adapters.binanceCandleAdapter import INTERVAL_MS, WEEK_OFFSET_MS
+
+MAX_LIMIT = 1000
+LATENCY_MS = float(os.getenv("STUB_BINANCE_LATENCY_MS", "0"))
+
+app = FastAPI(title="Stub Binance")
+
+
+def _seed(symbol: str) -> int:
+    return zlib.crc32(symbol.upper().encode())
+
+
+def price_at(symbol: str, open_time_ms: int) -> float:
+    """Prix synthétique : niveau propre au symbole modulé par trois sinusoïdes déphasées."""
+    seed = _seed(symbol)
+    base = 10.0 + seed % 50_000
+    days = open_time_ms / 86_400_000
+    phase = (seed % 360) * math.pi / 180
+    return base * math.exp(
+        0.30 * math.sin(days / 90 + phase) + 0.08 * math.sin(days / 7.3 + 2 * phase) + 0.02 * math.sin(days * 24 / 5)
+    )
+
+
+def kline(symbol: str, open_time_ms: int, step_ms: int) -> list:
+    """Bougie au format de l'API Binance (prix et volumes en chaînes)."""
+    open_ = price_at(symbol, open_time_ms)
+    close = price_at(symbol, open_time_ms + step_ms)
+    high = max(open_, close) * 1.002
+    low = min(open_, close) * 0.998
+    return [
+        open_time_ms,
+        f"{open_:.8f}",
+        f"{high:.8f}",
+        f"{low:.8f}",
+        f"{close:.8f}",
+        "1000.00000000",
+        open_time_ms + step_ms - 1,
+        f"{1000 * close:.8f}",
+        100,
+        "500.00000000",
+        f"{500 * close:.8f}",
+        "0",
+    ]
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+async def _latency():
+    if LATENCY_MS > 0:
+        await asyncio.sleep(LATENCY_MS / 1000)
+
+
+@app.get("/api/v3/klines")
+async def klines(
+    symbol: str,
+    interval: str,
+    startTime: int | None = None,
+    endTime: int | None = None,
+    limit: int = Query(default=500, ge=1, le=MAX_LIMIT),
+):
+    step = INTERVAL_MS.get(interval)
+    if step is None:
+        raise HTTPException(status_code=400, detail=f"Invalid interval: {interval}")
+    await _latency()
+
+    offset = WEEK_OFFSET_MS if interval == "1w" else 0
+    # Sans bornes, Binance renvoie les `limit` dernières bougies
+    if endTime is None:
+        endTime = _now_ms()
+    if startTime is None:
+        startTime = endTime - (limit - 1) * step
+    first = -(-(startTime - offset) // step) * step + offset
+    return [kline(symbol, t, step) for t in range(first, endTime + 1, step)[:limit]]
+
+
+@app.get("/api/v3/ticker/price")
+async def ticker_price(symbol: str):
+    await _latency()
+    return {"symbol": symbol.upper(), "price": f"{price_at(symbol, _now_ms()):.8f}"}
@@ -0,0 +1,88 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1 import backtestResponse
+from app.api.v1.backtestResponse import ARROW, JSON, MSGPACK, NDJSON, SSE, downsample, negotiate, render, stream
+
+
+def test_negotiate_follows_quality_then_header_order():
+    with patch.dict(backtestResponse._AVAILABLE, {ARROW: True, MSGPACK: True}):
+        assert negotiate(None) == JSON
+        assert negotiate("text/html, */*") == JSON
+        assert negotiate("application/json;q=0.5, application/msgpack") == MSGPACK
+        assert negotiate("application/vnd.apache.arrow.stream, application/msgpack") == ARROW
+        # q invalide ignoré (qualité 1), pas d'erreur 500
+        assert negotiate("application/json;q=0.5, application/msgpack;q=abc") == MSGPACK
+
+
+def test_negotiate_falls_back_or_rejects_missing_formats():
+    with patch.dict(backtestResponse._AVAILABLE, {ARROW: False, MSGPACK: False}):
+        assert negotiate("application/vnd.apache.arrow.stream, application/json;q=0.1") == JSON
+        with pytest.raises(HTTPException) as exc:
+            negotiate("application/vnd.apache.arrow.stream")
+        assert exc.value.status_code == 406
+        # Aucun type reconnu demandé : JSON plutôt que 406
+        assert negotiate("text/plain") == JSON
+        assert negotiate("text/plain;q=x, image/png") == JSON
+
+
+def test_downsample_keeps_first_and_last_rows():
+    history = pd.DataFrame({"value": np.arange(1000.0)})
+
+    sampled = downsample(history, 10)
+
+    assert len(sampled) == 10
+    assert sampled["value"].iloc[0] == 0.0 and sampled["value"].iloc[-1] == 999.0
+    assert downsample(history, None) is history
+
+
+def test_json_without_orjson_writes_nan_as_null():
+    history = pd.DataFrame({"value": [1.0, np.nan]}, index=pd.date_range("2024-01-01", periods=2, name="date"))
+
+    with patch.object(backtestResponse, "orjson", None):
+        body = json.loads(render(history, None, layout="columnar", meta={"meilleur": "M"}).body)
+
+    assert body["meilleur"] == "M"
+    assert body["data"] == {"value": [1.0, None]}
+
+
+def _body(response) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def test_ndjson_stream_writes_one_row_per_line_in_chunks():
+    history = pd.DataFrame(
+        {"value": [1.0, 2.0, np.nan]}, index=pd.date_range("2024-01-01", periods=3, name="date")
+    )
+
+    response = stream(history, NDJSON, {"meilleur": "W"}, chunk_rows=2)
+
+    lines = _body(response).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"date": "2024-01-01T00:00:00", "value": 1.0},
+        {"date": "2024-01-02T00:00:00", "value": 2.0},
+        {"date": "2024-01-03T00:00:00", "value": None},
+    ]
+    assert json.loads(response.headers["x-backtest-meta"]) == {"meilleur": "W"}
+
+
+def test_sse_stream_sends_meta_then_row_chunks_then_end():
+    history = pd.DataFrame({"value": np.arange(5.0)}, index=pd.date_range("2024-01-01", periods=5, name="date"))
+
+    with patch.object(backtestResponse, "STREAM_CHUNK_ROWS", 2):
+        response = render(history, SSE, "records", None, {})
+    events = [e for e in _body(response).decode().split("\n\n") if e]
+
+    assert negotiate("text/event-stream") == SSE
+    assert [e.split("\n")[0] for e in events] == ["event: meta"] + ["event: rows"] * 3 + ["event: end"]
+    assert json.loads(events[0].split("data: ")[1]) == {"columns": ["value"], "rows": 5}
+    assert [r["value"] for e in events[1:4] for r in json.loads(e.split("data: ")[1])] == [0.0, 1.0, 2.0, 3.0, 4.0]
@@ -18,6 +18,157 @@ def test_run_any_strategy_returns_records():
     try:
         resp = client.post("/api/v1/strategy/mystrategy?userId=1")
         assert resp.status_code == 200
-        assert resp.json() == [{"a": 1}]
+        assert resp.json() == {"data": [{"a": 1}]}
+    finally:
+        app.dependency_overrides.pop(backtestController.backtestService, None)
+
+
+def test_run_strategy_sweep_returns_ranked_table():
+    mock_service = MagicMock()
+    mock_service.runSweep.return_value = pd.DataFrame([
+        {"k": 0.2, "sharpe": 1.5, "error": None},
+        {"k": 0.1, "sharpe": float("nan"), "error": "Capital insuffisant"},
+    ])
+
+    app.dependency_overrides[backtestController.backtestService] = lambda db=None: mock_service
+    try:
+        resp = client.post(
+            "/api/v1/strategy/dynamic_threshold/sweep?userId=1",
+            json={"grid": {"k": [0.1, 0.2]}, "max_workers": 2},
+        )
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "rank_by": "sharpe",
+            "data": [
+                {"k": 0.2, "sharpe": 1.5, "error": None},
+                {"k": 0.1, "sharpe": None, "error": "Capital insuffisant"},
+            ],
+        }
+        mock_service.runSweep.assert_called_once_with(
+            "dynamic_threshold", 1, {"k": [0.1, 0.2]}, max_workers=2, rank_by="sharpe", start=None, end=None, timeframe="1d"
+        )
+    finally:
+        app.dependency_overrides.pop(backtestController.backtestService, None)
+
+
+def test_run_strategy_rejects_unsupported_timeframe():
+    mock_service = MagicMock()
+
+    app.dependency_overrides[backtestController.backtestService] = lambda db=None: mock_service
+    try:
+        resp = client.post("/api/v1/strategy/constant_mix?userId=1&timeframe=2h")
+        assert resp.status_code == 400
+        mock_service.runStrategy.assert_not_called()
+    finally:
+        app.dependency_overrides.pop(backtestController.backtestService, None)
+
+
+def test_submit_strategy_job_returns_job_id():
+    from app.domain.models.backtestJob import BacktestJob
+
+    mock_service = MagicMock()
+    mock_service.submitStrategy.return_value = BacktestJob(id="abc", strategy_name="hold", user_id=1)
+
+    app.dependency_overrides[backtestController.backtestService] = lambda db=None: mock_service
+    try:
+        resp = client.post("/api/v1/strategy/jobs/hold?userId=1&timeframe=4h")
+        assert resp.status_code == 202
+        assert resp.json() == {"job_id": "abc", "status": "pending"}
+        mock_service.submitStrategy.assert_called_once_with("hold", 1, start=None, end=None, timeframe="4h")
+    finally:
+        app.dependency_overrides.pop(backtestController.backtestService, None)
+
+
+def test_get_strategy_job_returns_status_and_result():
+    from app.domain.models.backtestJob import BacktestJob, JobStatus
+
+    df = pd.DataFrame(
+        {"value": [10.0, 11.0], "max_drift": [float("nan"), 0.1]},
+        index=pd.date_range("2024-01-01", periods=2, freq="D", name="date"),
+    )
+    df.attrs["best_mode"] = "M"
+    jobs = {
+        "done": BacktestJob(id="done", strategy_name="constant_mix", user_id=1, status=JobStatus.DONE, result=df),
+        "pending": BacktestJob(id="pending", strategy_name="hold", user_id=1),
+    }
+    queue = MagicMock()
+    queue.get.side_effect = jobs.get
+
+    app.dependency_overrides[backtestController.job_queue] = lambda: queue
+    try:
+        done = client.get("/api/v1/strategy/jobs/done").json()
+        assert done["status"] == "done" and done["progress"] == 1.0
+        # NaN -> null, comme pour le backtest synchrone
+        assert done["meilleur"] == "M"
+        assert done["data"] == [{"value": 10.0, "max_drift": None}, {"value": 11.0, "max_drift": 0.1}]
+
+        columnar = client.get("/api/v1/strategy/jobs/done?layout=columnar&max_points=1").json()
+        assert columnar["job_id"] == "done" and columnar["data"] == {"value": [11.0], "max_drift": [0.1]}
+
+        streamed = client.get("/api/v1/strategy/jobs/done", headers={"Accept": "application/x-ndjson"})
+        assert streamed.headers["content-type"] == "application/x-ndjson"
+        assert len(streamed.text.splitlines()) == 2
+
+        pending = client.get("/api/v1/strategy/jobs/pending").json()
+        assert pending["status"] == "pending" and "data" not in pending
+
+        assert client.get("/api/v1/strategy/jobs/unknown").status_code == 404
+    finally:
+        app.dependency_overrides.pop(backtestController.job_queue, None)
+
+
+def test_run_strategy_columnar_layout_and_downsampling():
+    mock_service = MagicMock()
+    df = pd.DataFrame(
+        {"value": [1.0, 2.0, 3.0, 4.0, 5.0], "max_drift": [float("nan")] * 5},
+        index=pd.date_range("2024-01-01", periods=5, freq="D", name="date"),
+    )
+    df.attrs["best_mode"] = "W"
+    mock_service.runStrategy.return_value = df
+
+    app.dependency_overrides[backtestController.backtestService] = lambda db=None: mock_service
+    try:
+        resp = client.post("/api/v1/strategy/constant_mix?userId=1&layout=columnar&max_points=3")
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "meilleur": "W",
+            "columns": ["value", "max_drift"],
+            "index": ["2024-01-01T00:00:00", "2024-01-03T00:00:00", "2024-01-05T00:00:00"],
+            "data": {"value": [1.0, 3.0, 5.0], "max_drift": [None, None, None]},
+        }
+
+        assert client.post("/api/v1/strategy/constant_mix?userId=1&layout=rows").status_code == 400
+    finally:
+        app.dependency_overrides.pop(backtestController.backtestService, None)
+
+
+def test_run_strategy_returns_406_for_unavailable_format():
+    from app.api.v1 import backtestResponse
+
+    mock_service = MagicMock()
+    app.dependency_overrides[backtestController.backtestService] = lambda db=None: mock_service
+    try:
+        with patch.dict(backtestResponse._AVAILABLE, {backtestResponse.MSGPACK: False}):
+            resp = client.post("/api/v1/strategy/hold?userId=1", headers={"Accept": "application/msgpack"})
+        assert resp.status_code == 406
+        mock_service.runStrategy.assert_not_called()
+    finally:
+        app.dependency_overrides.pop(backtestController.backtestService, None)
+
+
+def test_run_strategy_streams_ndjson_when_requested():
+    mock_service = MagicMock()
+    df = pd.DataFrame({"value": [1.0, 2.0]}, index=pd.date_range("2024-01-01", periods=2, freq="D", name="date"))
+    mock_service.runStrategy.return_value = df
+
+    app.dependency_overrides[backtestController.backtestService] = lambda db=None: mock_service
+    try:
+        resp = client.post("/api/v1/strategy/hold?userId=1", headers={"Accept": "application/x-ndjson"})
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        assert resp.text.splitlines() == [
+            '{"date":"2024-01-01T00:00:00","value":1.0}',
+            '{"date":"2024-01-02T00:00:00","value":2.0}',
+        ]
     finally:
         app.dependency_overrides.pop(backtestController.backtestService, None)
@@ -9,13 +9,14 @@ client = TestClient(app)
 
 def test_get_two_years_candles_calls_service():
     mock_service = MagicMock()
-    mock_service.syncPeriod = AsyncMock(return_value={"synced": True})
+    mock_service.backfillPeriod = AsyncMock(return_value={"synced": True})
 
     app.dependency_overrides[candleController.candle1d_service] = lambda db=None: mock_service
     try:
         resp = client.get("/api/v1/candle/getTwoYearsCandles")
         assert resp.status_code == 200
         assert resp.json() == {"synced": True}
+        mock_service.backfillPeriod.assert_awaited_once_with(730)
     finally:
         app.dependency_overrides.pop(candleController.candle1d_service, None)
 
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.priceGenerator import equal_wallet, gbm_prices
+from benchmarks.strategyBenchmark import CASES, compare, main, run_benchmarks
+
+
+def test_gbm_prices_are_deterministic_and_positive():
+    prices = gbm_prices(100, 3, timeframe="15m", seed=42)
+
+    assert prices.shape == (100, 3)
+    assert list(prices.columns) == ["BTC", "ETH", "BNB"]
+    assert (prices.index[1] - prices.index[0]).total_seconds() == 15 * 60
+    assert (prices.to_numpy() > 0).all()
+    np.testing.assert_array_equal(prices.to_numpy(), gbm_prices(100, 3, timeframe="15m", seed=42).to_numpy())
+    assert list(gbm_prices(10, 12).columns)[-2:] == ["ASSET10", "ASSET11"]
+
+
+def test_equal_wallet_splits_capital_at_first_bar():
+    prices = gbm_prices(10, 4)
+    wallet = equal_wallet(prices, capital=1000.0)
+
+    values = [item.amount * prices[item.symbol].iloc[0] for item in wallet["items"]]
+    assert values == pytest.approx([250.0] * 4)
+
+
+def test_run_benchmarks_reports_every_case():
+    report = run_benchmarks(bars=200, assets=3, repeat=1)
+
+    assert report["meta"]["bars"] == 200 and report["meta"]["assets"] == 3
+    assert set(report["results"]) == set(CASES)
+    for stats in report["results"].values():
+        assert stats["bars_per_sec"] > 0 and stats["peak_mb"] > 0
+
+
+def test_compare_flags_throughput_and_memory_regressions():
+    baseline = {"results": {
+        "hold": {"bars_per_sec": 1000.0, "peak_mb": 10.0},
+        "constant_mix": {"bars_per_sec": 1000.0, "peak_mb": 10.0},
+    }}
+    current = {"results": {
+        "hold": {"bars_per_sec": 700.0, "peak_mb": 13.0},
+        "constant_mix": {"bars_per_sec": 800.0, "peak_mb": 12.0},
+        "broker_rebalance": {"bars_per_sec": 1.0, "peak_mb": 1.0},  # absent de la référence -> ignoré
+    }}
+
+    regressions = compare(current, baseline, tolerance=0.25)
+
+    assert len(regressions) == 2
+    assert all(r.startswith("hold:") for r in regressions)
+
+
+def test_main_saves_then_compares_with_baseline_dimensions(tmp_path):
+    path = tmp_path / "baseline.json"
+    assert main(["--bars", "100", "--assets", "2", "--repeat", "1", "--case", "hold", "--save", str(path)]) == 0
+
+    baseline = json.loads(path.read_text())
+    assert baseline["meta"]["bars"] == 100 and set(baseline["results"]) == {"hold"}
+
+    # Référence impossible à battre : la comparaison échoue
+    baseline["results"]["hold"]["bars_per_sec"] = float("inf")
+    path.write_text(json.dumps(baseline))
+    assert main(["--repeat", "1", "--case", "hold", "--compare", str(path)]) == 1
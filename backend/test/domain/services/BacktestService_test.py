@@ -1,25 +1,46 @@
+from datetime import datetime
 from unittest.mock import Mock, patch
 
+import pandas as pd
 import pytest
 
+from app.domain.models.wallet.walletItem import WalletItem
 from app.domain.services.backtestService import BacktestService
+from app.domain.strategies.constantMix.constantMixParams import ConstantMixParams
+from app.infrastructure.cache.priceMatrixCache import priceMatrixCache
+from app.infrastructure.priceSource.databasePriceSource import DatabasePriceSource
+
+
+@pytest.fixture(autouse=True)
+def clear_price_cache():
+    priceMatrixCache.invalidate()
+    yield
+    priceMatrixCache.invalidate()
+
+
+def make_candle_repo(latest="2025-12-1"):
+    repo = Mock()
+    repo.timeframe = "1d"
+    repo.getLatestOpenTime.return_value = latest
+    repo.getDataVersion.side_effect = lambda: (repo.generation, repo.getLatestOpenTime())
+    repo.generation = 0
+    repo.getRewriteState.return_value = (0, None)
+    repo.getCloseMatrix.return_value = pd.DataFrame(
+        {"BTC": [105.0]}, index=pd.DatetimeIndex([latest], name="open_time")
+    )
+    return repo
 
-def test_run_strategy_executes_runner_with_prices_and_wallet():
-    dailyCandleRepo = Mock()
-    wallet_service = Mock()
 
-    candle = Mock(
-        open_time="2025-12-1",
-        open=100,
-        high=110,
-        low=90,
-        close=105,
-        symbol="BTC"
-    )
+def make_user_repo():
+    user_repo = Mock()
+    user_repo.get_by_id.return_value = None
+    return user_repo
 
-    dailyCandleRepo.getAllCandles.return_value = [candle]
+def test_run_strategy_executes_runner_with_prices_and_wallet():
+    dailyCandleRepo = make_candle_repo()
+    wallet_service = Mock()
 
-    wallet = Mock()
+    wallet = {"items": [WalletItem(id=1, symbol="BTC", amount=1.0)]}
     wallet_service.getWalletByUserId.return_value = wallet
 
     runner = Mock()
@@ -31,15 +52,16 @@ def test_run_strategy_executes_runner_with_prices_and_wallet():
                return_value=runnerCls
     ):
         service = BacktestService(
-            dailyCandleRepo=dailyCandleRepo,
-            walletService=wallet_service
+            priceSource=DatabasePriceSource({"1d": dailyCandleRepo}),
+            walletService=wallet_service,
+            userRepo=make_user_repo()
         )
 
         result = service.runStrategy("constant_mix",userId=42)
 
     assert result == "RESULT"
 
-    dailyCandleRepo.getAllCandles.assert_called_once()
+    dailyCandleRepo.getCloseMatrix.assert_called_once()
     wallet_service.getWalletByUserId.assert_called_once_with(42)
 
     runnerCls.assert_called_once()
@@ -51,25 +73,159 @@ def test_run_strategy_executes_runner_with_prices_and_wallet():
     assert not pricesDf.empty
 
 def test_run_strategy_raises_if_strategy_not_found():
-    daily_candle_repo = Mock()
+    daily_candle_repo = make_candle_repo("2024-01-01")
     wallet_service = Mock()
 
-    candle = Mock(
-        open_time="2024-01-01",
-        open=100,
-        high=110,
-        low=90,
-        close=105,
-        symbol="BTC"
-    )
-
-    daily_candle_repo.getAllCandles.return_value = [candle]
-
     with patch(
         "app.domain.services.backtestService.StrategyFactory.create",
         side_effect=ValueError("Unknown strategy")
     ):
-        service = BacktestService(dailyCandleRepo=daily_candle_repo, walletService=wallet_service)
+        service = BacktestService(priceSource=DatabasePriceSource({"1d": daily_candle_repo}), walletService=wallet_service, userRepo=make_user_repo())
 
         with pytest.raises(ValueError):
             service.runStrategy("unknown", userId=1)
+
+
+def test_price_matrix_is_cached_until_latest_candle_changes():
+    repo = make_candle_repo()
+    wallet_service = Mock()
+    wallet_service.getWalletByUserId.return_value = {"items": [WalletItem(id=1, symbol="BTCEUR", amount=0.1)]}
+    runner = Mock()
+    runner.build_params.return_value = ConstantMixParams(target_weights={"BTCEUR": 1.0})
+
+    with patch("app.domain.services.backtestService.StrategyFactory.create", return_value=Mock(return_value=runner)):
+        service = BacktestService(priceSource=DatabasePriceSource({"1d": repo}), walletService=wallet_service, userRepo=make_user_repo())
+
+        service.runStrategy("constant_mix", userId=1)
+        service.runStrategy("constant_mix", userId=1)
+
+        first, second = (call.args[0] for call in runner.run.call_args_list)
+        assert second is first
+        repo.getCloseMatrix.assert_called_once_with(symbols=["BTCEUR"], start=None, end=None)
+
+        # Nouvelle bougie en base : la version change, la matrice est reconstruite
+        repo.getLatestOpenTime.return_value = "2025-12-2"
+        service.runStrategy("constant_mix", userId=1)
+        assert repo.getCloseMatrix.call_count == 2
+
+
+def test_price_matrix_cache_invalidated_explicitly():
+    repo = make_candle_repo()
+    service = BacktestService(priceSource=DatabasePriceSource({"1d": repo}), walletService=Mock(), userRepo=make_user_repo())
+
+    service._loadPrices()
+    priceMatrixCache.invalidate("1d")
+    service._loadPrices()
+
+    assert repo.getCloseMatrix.call_count == 2
+
+
+def test_run_strategy_loads_only_needed_symbols_and_dates():
+    repo = make_candle_repo()
+    wallet_service = Mock()
+    wallet_service.getWalletByUserId.return_value = {
+        "items": [WalletItem(id=1, symbol="ADAEUR", amount=10.0), WalletItem(id=2, symbol="BTCEUR", amount=0.1)]
+    }
+
+    runner = Mock()
+    runner.build_params.return_value = ConstantMixParams(target_weights={"BTCEUR": 0.8, "ETHEUR": 0.2, "SOLEUR": 0})
+
+    with patch("app.domain.services.backtestService.StrategyFactory.create", return_value=Mock(return_value=runner)):
+        service = BacktestService(priceSource=DatabasePriceSource({"1d": repo}), walletService=wallet_service, userRepo=make_user_repo())
+        service.runStrategy("constant_mix", userId=1, start=datetime(2024, 1, 1), end=datetime(2024, 6, 30))
+
+    # Poids nuls ignorés, actifs du wallet conservés ; filtres passés à la requête
+    repo.getCloseMatrix.assert_called_once_with(
+        symbols=["ADAEUR", "BTCEUR", "ETHEUR"], start=datetime(2024, 1, 1), end=datetime(2024, 6, 30)
+    )
+
+
+def test_sweep_symbols_include_target_weights_of_the_grid():
+    params = ConstantMixParams(target_weights={"BTCEUR": 1.0})
+    grid_weights = [{"BTCEUR": 0.5, "SOLEUR": 0.5}, {"BTCEUR": 0.5, "XRPEUR": 0.0}]
+
+    assert BacktestService._requiredSymbols(params, {"items": []}, grid_weights) == ["BTCEUR", "SOLEUR"]
+    assert BacktestService._requiredSymbols(object(), {"items": []}) is None
+
+
+def test_identical_runs_hit_the_result_cache_until_data_changes():
+    from app.infrastructure.cache.backtestResultCache import BacktestResultCache
+
+    repo = make_candle_repo()
+    wallet_service = Mock()
+    wallet_service.getWalletByUserId.return_value = {"items": [WalletItem(id=1, symbol="BTC", amount=1.0)]}
+    runner = Mock()
+    runner.build_params.return_value = ConstantMixParams(target_weights={"BTC": 1.0})
+    runner.run.return_value = pd.DataFrame({"value": [1.0]})
+
+    with patch("app.domain.services.backtestService.StrategyFactory.create", return_value=Mock(return_value=runner)):
+        service = BacktestService(
+            priceSource=DatabasePriceSource({"1d": repo}),
+            walletService=wallet_service,
+            userRepo=make_user_repo(),
+            resultCache=BacktestResultCache(),
+        )
+        first = service.runStrategy("constant_mix", userId=1)
+        second = service.runStrategy("constant_mix", userId=1)
+        assert second is first
+        assert runner.run.call_count == 1
+        repo.getCloseMatrix.assert_called_once()
+
+        # Nouvelle bougie : la version des données change la clé
+        repo.getLatestOpenTime.return_value = "2025-12-2"
+        service.runStrategy("constant_mix", userId=1)
+        assert runner.run.call_count == 2
+
+        # Backfill sous le max (nouveau symbole, trou comblé) : seule la génération bouge
+        repo.generation += 1
+        service.runStrategy("constant_mix", userId=1)
+        assert runner.run.call_count == 3
+
+
+def test_repeated_backtests_for_a_wallet_read_prices_once():
+    repo = make_candle_repo()
+    wallet_service = Mock()
+    wallet_service.getWalletByUserId.return_value = {"items": [WalletItem(id=1, symbol="BTCEUR", amount=0.1)]}
+
+    runner = Mock()
+    runner.build_params.return_value = ConstantMixParams(target_weights={"BTCEUR": 0.8, "ETHEUR": 0.2})
+
+    with patch("app.domain.services.backtestService.StrategyFactory.create", return_value=Mock(return_value=runner)):
+        service = BacktestService(priceSource=DatabasePriceSource({"1d": repo}), walletService=wallet_service, userRepo=make_user_repo())
+        service.runStrategy("constant_mix", userId=1, start=datetime(2024, 1, 1))
+        service.runStrategy("constant_mix", userId=1, start=datetime(2024, 1, 1))
+
+    # Lecture filtrée (symboles du wallet et des poids, période) mise en cache dès le premier run
+    repo.getCloseMatrix.assert_called_once_with(symbols=["BTCEUR", "ETHEUR"], start=datetime(2024, 1, 1), end=None)
+    assert runner.run.call_count == 2
+
+
+def test_jobs_share_the_result_cache_with_synchronous_runs():
+    from app.infrastructure.cache.backtestResultCache import BacktestResultCache
+
+    repo = make_candle_repo()
+    wallet_service = Mock()
+    wallet_service.getWalletByUserId.return_value = {"items": [WalletItem(id=1, symbol="BTC", amount=1.0)]}
+    runner = Mock()
+    runner.build_params.return_value = ConstantMixParams(target_weights={"BTC": 1.0})
+    queue = Mock()
+    computed = pd.DataFrame({"value": [1.0]})
+
+    with patch("app.domain.services.backtestService.StrategyFactory.create", return_value=Mock(return_value=runner)):
+        service = BacktestService(
+            priceSource=DatabasePriceSource({"1d": repo}),
+            walletService=wallet_service,
+            userRepo=make_user_repo(),
+            jobQueue=queue,
+            resultCache=BacktestResultCache(),
+        )
+        service.submitStrategy("constant_mix", userId=1)
+        # Fin du job dans le process API : le résultat est rangé sous la clé de runStrategy
+        queue.submit.call_args.kwargs["on_done"](computed)
+
+        assert service.runStrategy("constant_mix", userId=1) is computed
+        runner.run.assert_not_called()
+
+        service.submitStrategy("constant_mix", userId=1)
+        queue.submit.assert_called_once()
+        queue.record.assert_called_once_with("constant_mix", 1, computed)
@@ -1,8 +1,9 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, AsyncMock
 
 import pytest
 
+from app.domain.models.candle import CandleFetchReport
 from app.domain.services.candle.baseCandleService import baseCandleService
 
 
@@ -10,10 +11,17 @@ from app.domain.services.candle.baseCandleService import baseCandleService
 async def test_sync_period_saves_candles_for_each_symbol():
     candleRepo = AsyncMock()
     cryptoRepo = AsyncMock()
-    binanceAdapter = Mock()
+    binanceAdapter = AsyncMock()
 
     cryptoRepo.get_all_symbols.return_value = ["BTCEUR", "ETHEUR", "BNBEUR", "XRPEUR", "SOLEUR"]
-    binanceAdapter.fetchCandles.return_value = ["candle"]
+    candleRepo.getLatestOpenTimes.return_value = {}
+    candleRepo.saveCandles.return_value = 1
+
+    async def fetch(sym, start, end, interval, on_page=None):
+        await on_page(["candle"])
+        return [], CandleFetchReport(sym, interval, expected=8, received=1)
+
+    binanceAdapter.fetchCandlesReport.side_effect = fetch
 
     service = baseCandleService(
         candleRepo=candleRepo,
@@ -23,18 +31,20 @@ async def test_sync_period_saves_candles_for_each_symbol():
         retention_days=30
     )
 
-    await service.syncPeriod(7)
+    completeness = await service.syncPeriod(7)
 
-    assert binanceAdapter.fetchCandles.call_count == 5
+    assert binanceAdapter.fetchCandlesReport.call_count == 5
     assert candleRepo.saveCandles.call_count == 5
+    assert completeness["ETHEUR"] == {"expected": 8, "received": 1, "inserted": 1, "complete": False}
 
 @pytest.mark.asyncio
 async def test_update_candles_saves_and_cleans():
     crypto_repo = AsyncMock()
     candle_repo = AsyncMock()
-    binance_adapter = Mock()
+    binance_adapter = AsyncMock()
 
     crypto_repo.get_all_symbols.return_value = ["BTC"]
+    candle_repo.getLatestOpenTimes.return_value = {}
     binance_adapter.fetchCandles.return_value = ["candle"]
 
     service = baseCandleService(
@@ -48,15 +58,18 @@ async def test_update_candles_saves_and_cleans():
     await service.updateCandles()
 
     candle_repo.saveCandles.assert_called_once()
-    candle_repo.deleteOlderThan.assert_called_once()
+    candle_repo.purgeOlderThan.assert_awaited_once()
+    cutoff = candle_repo.purgeOlderThan.call_args.args[0]
+    assert timedelta(days=29) < datetime.now(timezone.utc) - cutoff < timedelta(days=31)
 
 @pytest.mark.asyncio
 async def test_update_candles_skips_when_no_data():
     crypto_repo = AsyncMock()
     candle_repo = AsyncMock()
-    binance_adapter = Mock()
+    binance_adapter = AsyncMock()
 
     crypto_repo.get_all_symbols.return_value = ["BTC"]
+    candle_repo.getLatestOpenTimes.return_value = {}
     binance_adapter.fetchCandles.return_value = []
 
     service = baseCandleService(
@@ -70,15 +83,17 @@ async def test_update_candles_skips_when_no_data():
     await service.updateCandles()
 
     candle_repo.saveCandles.assert_not_called()
-    candle_repo.deleteOlderThan.assert_not_called()
+    # La rétention s'applique à chaque passage, même sans nouvelle bougie
+    candle_repo.purgeOlderThan.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_update_candles_ignores_exceptions():
     crypto_repo = AsyncMock()
     candle_repo = AsyncMock()
-    binance_adapter = Mock()
+    binance_adapter = AsyncMock()
 
     crypto_repo.get_all_symbols.return_value = ["BTC", "ETH"]
+    candle_repo.getLatestOpenTimes.return_value = {}
     binance_adapter.fetchCandles.side_effect = Exception("Binance down")
 
     service = baseCandleService(
@@ -94,6 +109,79 @@ async def test_update_candles_ignores_exceptions():
     candle_repo.saveCandles.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_update_candles_fetches_only_missing_range():
+    crypto_repo = AsyncMock()
+    candle_repo = AsyncMock()
+    binance_adapter = AsyncMock()
+
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    crypto_repo.get_all_symbols.return_value = ["BTC", "ETH", "SOL"]
+    candle_repo.getLatestOpenTimes.return_value = {
+        # service arrêté pendant une heure : trou à rattraper
+        "BTC": (now - timedelta(hours=1)).replace(tzinfo=None),
+        # déjà à jour
+        "ETH": now.replace(tzinfo=None),
+    }
+    binance_adapter.fetchCandles.return_value = ["candle"]
+
+    service = baseCandleService(candle_repo, crypto_repo, binance_adapter, timeframe="3m", retention_days=2)
+    await service.updateCandles()
+
+    starts = {c.args[0]: c.args[1] for c in binance_adapter.fetchCandles.call_args_list}
+    assert set(starts) == {"BTC", "SOL"}
+    assert starts["BTC"] == now - timedelta(hours=1) + timedelta(minutes=3)
+    # aucun historique : toute la période de rétention
+    assert starts["SOL"] == now - timedelta(days=2)
+    assert candle_repo.saveCandles.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_sync_period_starts_after_latest_stored_candle():
+    crypto_repo = AsyncMock()
+    candle_repo = AsyncMock()
+    binance_adapter = AsyncMock()
+
+    latest = datetime.now(timezone.utc) - timedelta(days=10)
+    crypto_repo.get_all_symbols.return_value = ["BTCEUR"]
+    candle_repo.getLatestOpenTimes.return_value = {"BTCEUR": latest}
+    binance_adapter.fetchCandlesReport.return_value = ([], CandleFetchReport("BTCEUR", "1d", expected=0, received=0))
+
+    service = baseCandleService(candle_repo, crypto_repo, binance_adapter, timeframe="1d", retention_days=730)
+    await service.syncPeriod(730)
+
+    binance_adapter.fetchCandlesReport.assert_called_once()
+    assert binance_adapter.fetchCandlesReport.call_args.args[1] == latest + timedelta(days=1)
+    candle_repo.saveCandles.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_backfill_period_stages_then_merges():
+    crypto_repo = AsyncMock()
+    candle_repo = AsyncMock()
+    binance_adapter = AsyncMock()
+
+    crypto_repo.get_all_symbols.return_value = ["BTCEUR", "ETHEUR"]
+    candle_repo.getLatestOpenTimes.return_value = {}
+    candle_repo.stageCandles.side_effect = lambda sym, batch: len(batch)
+    candle_repo.mergeStagedCandles.return_value = {"BTCEUR": 3}
+
+    async def fetch(sym, start, end, interval, on_page=None):
+        await on_page(["candle"] * 3)
+        return [], CandleFetchReport(sym, interval, expected=3, received=3)
+
+    binance_adapter.fetchCandlesReport.side_effect = fetch
+
+    service = baseCandleService(candle_repo, crypto_repo, binance_adapter, timeframe="1d", retention_days=730)
+    completeness = await service.backfillPeriod(730)
+
+    assert candle_repo.stageCandles.call_count == 2
+    candle_repo.saveCandles.assert_not_called()
+    candle_repo.mergeStagedCandles.assert_awaited_once()
+    assert completeness["BTCEUR"]["inserted"] == 3
+    assert completeness["ETHEUR"] == {"expected": 3, "received": 3, "inserted": 0, "complete": True}
+
+
 def test_timeframe_to_delta_days():
     service = baseCandleService(None, None, None, "1d", 30)
     assert service._timeframe_to_delta() == timedelta(days=1)
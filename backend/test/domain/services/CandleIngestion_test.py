@@ -0,0 +1,33 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.domain.services.candle.candleIngestion import CandleIngestionPipeline
+
+
+@pytest.mark.asyncio
+async def test_pipeline_writes_pages_in_bounded_batches():
+    repo = AsyncMock()
+    repo.saveCandles.side_effect = lambda symbol, batch: len(batch)
+
+    async with CandleIngestionPipeline(repo, batch_size=5, max_pending_pages=2) as pipeline:
+        for _ in range(4):
+            await pipeline.put("BTCEUR", ["c"] * 3)
+        await pipeline.put("ETHEUR", ["c"] * 2)
+        await pipeline.put("ETHEUR", [])
+
+    batches = [(c.args[0], len(c.args[1])) for c in repo.saveCandles.call_args_list]
+    # BTC : 6 bougies dès que le lot dépasse 5, puis le reste à la fermeture
+    assert batches == [("BTCEUR", 6), ("BTCEUR", 6), ("ETHEUR", 2)]
+    assert pipeline.inserted == {"BTCEUR": 12, "ETHEUR": 2}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_propagates_write_errors():
+    repo = AsyncMock()
+    repo.saveCandles.side_effect = RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        async with CandleIngestionPipeline(repo, batch_size=1, max_pending_pages=1) as pipeline:
+            for _ in range(10):
+                await pipeline.put("BTCEUR", ["c"])
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.domain.strategies.tradingUtils.Broker import Broker, TradeCost
+
+
+def make_prices():
+    dates = pd.date_range("2020-01-01", periods=3, freq="D")
+    return pd.DataFrame({
+        "BTC": [100.0, 120.0, 90.0],
+        "ETH": [50.0, 50.0, 55.0],
+    }, index=dates)
+
+
+def test_broker_stores_prices_and_holdings_as_arrays():
+    broker = Broker(make_prices(), TradeCost(fee_rate=0.0, fixed_fee=0.0, slippage=0.0))
+    broker.load_holdings({"BTC": 1.0, "ETH": 2.0, "XRP": 3.0})
+
+    assert broker.px.dtype == np.float64 and broker.px.flags["C_CONTIGUOUS"]
+    assert broker.holdings == {"BTC": 1.0, "ETH": 2.0}  # XRP absent des prix -> ignoré
+    assert broker.portfolio_value(1) == pytest.approx(220.0)
+    np.testing.assert_allclose(broker.current_weights_array(1), [120.0 / 220.0, 100.0 / 220.0])
+
+
+def test_rebalance_without_costs_reaches_target_weights():
+    broker = Broker(make_prices(), TradeCost(fee_rate=0.0, fixed_fee=0.0, slippage=0.0))
+    broker.load_holdings({"BTC": 1.0, "ETH": 2.0})
+
+    cost = broker.rebalance(1, {"BTC": 0.5, "ETH": 0.5})
+
+    assert cost == 0.0
+    assert broker.portfolio_value(1) == pytest.approx(220.0)
+    assert broker._current_weights(1) == pytest.approx({"BTC": 0.5, "ETH": 0.5})
+
+
+def test_rebalance_charges_fees_and_applies_slippage():
+    broker = Broker(make_prices(), TradeCost(fee_rate=0.01, fixed_fee=1.0, slippage=0.0))
+    broker.load_holdings({"BTC": 1.0, "ETH": 2.0})
+
+    cost = broker.rebalance(0, {"BTC": 0.25, "ETH": 0.75}, slippage_map={"ETH": 0.01})
+
+    # 200€ -> 50€ BTC / 150€ ETH : 50€ vendus, 50€ achetés
+    assert cost == pytest.approx(100.0 * 0.01 + 2 * 1.0)
+    holdings = broker.holdings
+    # ETH acheté au prix dégradé de 50.5 €, frais prélevés sur l'actif le plus gros (ETH)
+    expected_eth = 2.0 + 50.0 / 50.5 - cost / 50.0
+    assert holdings["BTC"] == pytest.approx(0.5)
+    assert holdings["ETH"] == pytest.approx(expected_eth)
+
+
+def test_pay_trading_fees_raises_when_capital_is_insufficient():
+    broker = Broker(make_prices(), TradeCost(fee_rate=0.0, fixed_fee=10.0, slippage=0.0))
+    broker.load_holdings({"BTC": 0.01, "ETH": 0.01})
+
+    with pytest.raises(ValueError):
+        broker.rebalance(0, {"BTC": 0.0, "ETH": 1.0})
+
+
+def test_mark_to_market_records_drift_and_positions():
+    broker = Broker(make_prices(), TradeCost(fee_rate=0.0, fixed_fee=0.0, slippage=0.0))
+    broker.load_holdings({"BTC": 1.0, "ETH": 2.0})
+
+    broker.mark_to_market(0, extra_cost=1.5, target_weights={"BTC": 0.5, "ETH": 0.5})
+    hist = broker.get_history()
+
+    assert list(hist.index) == [make_prices().index[0]]
+    row = hist.iloc[0]
+    assert row["value"] == pytest.approx(200.0)
+    assert row["cost"] == pytest.approx(1.5)
+    assert row["max_drift"] == pytest.approx(0.0)
+    assert row["pos_BTC"] == 1.0 and row["pos_ETH"] == 2.0
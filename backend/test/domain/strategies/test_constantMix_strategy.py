@@ -51,12 +51,161 @@ def test_target_weights_filters_missing_columns():
     assert pytest.approx(sum(tw.values()), rel=1e-6) == 1.0
 
 
-def test_is_rebalance_day_various_modes():
-    idx = pd.date_range("2020-01-01", periods=10, freq="D")
-    fn = ConstantMixStrategy._is_rebalance_day
-
-    assert not fn(idx, 0, "D")
-    assert fn(idx, 1, "D")
-    assert fn(idx, 7, "7D") is True
-    assert fn(idx, 6, "7D") is False
-    assert fn(idx, 1, "W") in (True, False)
+def test_rebalance_mask_various_modes():
+    idx = pd.date_range("2020-01-01", periods=10, freq="D")  # mercredi
+    mask = ConstantMixStrategy.rebalance_mask
+
+    assert mask(idx, "D").tolist() == [False] + [True] * 9
+    assert mask(idx, "7D").nonzero()[0].tolist() == [7]
+    assert idx[mask(idx, "W")].tolist() == [pd.Timestamp("2020-01-06")]  # premier lundi
+
+
+@pytest.mark.parametrize("freq", ["3min", "15min", "h", "4h"])
+def test_daily_modes_follow_calendar_days_on_intraday_bars(freq):
+    idx = pd.date_range("2020-01-01 04:00", "2020-01-10 23:59", freq=freq)
+    mask = ConstantMixStrategy.rebalance_mask
+
+    # Première barre de chaque jour, pas chaque barre ; 3D : tous les trois jours écoulés
+    assert idx[mask(idx, "D")].tolist() == pd.date_range("2020-01-02", "2020-01-10", freq="D").tolist()
+    assert idx[mask(idx, "3D")].tolist() == pd.DatetimeIndex(["2020-01-04", "2020-01-07", "2020-01-10"]).tolist()
+
+
+@pytest.mark.parametrize(
+    "mode, first, expected",
+    [
+        ("M", None, ["2021-01-01", "2021-02-01", "2021-03-01", "2021-04-01"]),
+        ("Q", None, ["2021-01-01", "2021-04-01"]),
+        ("W", "2020-12-21", None),
+    ],
+)
+def test_rebalance_mask_follows_calendar_boundaries(mode, first, expected):
+    idx = pd.date_range("2020-12-20", periods=120, freq="D")  # dimanche
+
+    rebalanced = idx[ConstantMixStrategy.rebalance_mask(idx, mode)]
+
+    if expected is None:
+        # Chaque lundi, jamais la première barre
+        expected = pd.date_range(first, idx[-1], freq="W-MON")
+    assert rebalanced.tolist() == pd.DatetimeIndex(expected).tolist()
+
+
+def test_constantmix_only_trades_on_rebalance_days():
+    dates = pd.date_range("2020-01-01", periods=70, freq="D")
+    prices = pd.DataFrame({
+        "BTC": [100.0 + t for t in range(70)],
+        "ETH": [50.0 + 0.5 * (t % 5) for t in range(70)],
+    }, index=dates)
+    params = ConstantMixParams(target_weights={"BTC": 0.5, "ETH": 0.5}, rebalance="M", drift_threshold=None, verbose=False)
+    wallet = {"items": [type("I", (), {"symbol": "BTC", "amount": 10.0})(), type("I", (), {"symbol": "ETH", "amount": 10.0})()]}
+
+    hist = ConstantMixStrategy(params)._run_with_rebalance_mode(prices, wallet, "M")
+
+    traded = hist.index[hist["cost"] > 0]
+    assert list(traded) == [dates[0], pd.Timestamp("2020-02-01"), pd.Timestamp("2020-03-01")]
+    # Entre deux rééquilibrages, la valeur suit les prix avec des quantités fixes
+    feb = hist.loc["2020-02-02":"2020-02-29"]
+    expected = feb["pos_BTC"] * prices.loc[feb.index, "BTC"] + feb["pos_ETH"] * prices.loc[feb.index, "ETH"]
+    pd.testing.assert_series_equal(feb["value"], expected, check_names=False)
+
+
+def test_run_modes_returns_one_curve_per_mode_and_run_picks_best_cagr():
+    prices = make_prices()
+    params = ConstantMixParams(target_weights={"BTC": 0.5, "ETH": 0.5}, rebalance_modes=("D", "W", "M"), verbose=False)
+    wallet = {"items": [type("I", (), {"symbol": "BTC", "amount": 0.5})(), type("I", (), {"symbol": "ETH", "amount": 5.0})()]}
+    strat = ConstantMixStrategy(params)
+
+    curves = strat.run_modes(prices, wallet, ("D", "W", "M"))
+    best = strat.run(prices, wallet)
+
+    assert set(curves) == {"D", "W", "M"}
+    assert all(len(df) == len(prices) and df.attrs["rebalance_mode"] == m for m, df in curves.items())
+    cagr = best.attrs["cagr_by_mode"]
+    assert best.attrs["best_mode"] == max(cagr, key=cagr.get)
+
+
+def test_stacked_modes_match_single_mode_runs():
+    prices = make_prices()
+    params = ConstantMixParams(target_weights={"BTC": 0.5, "ETH": 0.5}, drift_threshold=0.05, verbose=False)
+    wallet = {"items": [type("I", (), {"symbol": "BTC", "amount": 0.5})(), type("I", (), {"symbol": "ETH", "amount": 5.0})()]}
+    strat = ConstantMixStrategy(params)
+
+    # Un seul appel du kernel pour tous les modes : aucun état partagé entre les lignes
+    curves = strat.run_modes(prices, wallet, ("D", "W", "M", "7D"))
+
+    for mode, curve in curves.items():
+        pd.testing.assert_frame_equal(curve, strat._run_with_rebalance_mode(prices, wallet, mode), check_freq=False)
+
+
+@pytest.mark.parametrize("drift_threshold", [None, 0.02, 0.0])
+def test_compiled_loop_matches_block_loop(monkeypatch, drift_threshold):
+    import numpy as np
+    from app.domain.strategies.constantMix import constantMixKernel
+
+    rng = np.random.default_rng(11)
+    dates = pd.date_range("2024-01-01", periods=2000, freq="3min")
+    data = np.exp(np.cumsum(rng.normal(0, 0.002, (2000, 3)), axis=0)) * [30000.0, 2000.0, 1.0]
+    prices = pd.DataFrame(data, index=dates, columns=["BTC", "ETH", "USDT"])
+    params = dict(target_weights={"BTC": 0.5, "ETH": 0.3, "USDT": 0.2}, drift_threshold=drift_threshold, fixed_fee=0.1)
+    wallet = {"items": [type("I", (), {"symbol": "BTC", "amount": 10.0})(), type("I", (), {"symbol": "USDT", "amount": 5000.0})()]}
+
+    compiled = ConstantMixStrategy(ConstantMixParams(**params)).run_modes(prices, wallet, ("D", "W"))
+    monkeypatch.setattr(constantMixKernel, "HAS_NUMBA", False)
+    blocks = ConstantMixStrategy(ConstantMixParams(**params)).run_modes(prices, wallet, ("D", "W"))
+
+    for mode in ("D", "W"):
+        pd.testing.assert_frame_equal(compiled[mode], blocks[mode], check_freq=False, rtol=1e-10)
+
+
+def make_template(prices, holdings, fixed_fee):
+    import numpy as np
+    from app.domain.strategies.tradingUtils.Broker import Broker, TradeCost
+
+    broker = Broker(prices=prices, trade_cost=TradeCost(fee_rate=0.001, fixed_fee=fixed_fee, slippage=0.0))
+    broker.load_holdings(holdings)
+    target = broker.weights_vector({"BTC": 0.5, "ETH": 0.3, "USDT": 0.2})
+    slippage = np.full(len(broker.assets), 0.0005)
+    c0 = broker.rebalance_array(0, target, slippage)
+    broker.mark_to_market_array(0, extra_cost=c0, target_weights=target)
+    return broker, target, slippage
+
+
+@pytest.mark.parametrize("drift_threshold", [None, 0.01])
+def test_compiled_modes_kernel_matches_segment_kernel(monkeypatch, drift_threshold):
+    import numpy as np
+    from app.domain.strategies.constantMix import constantMixKernel
+
+    if not constantMixKernel.HAS_NUMBA:
+        pytest.skip("numba non installé : un seul chemin")
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("2024-01-01", periods=3000, freq="3min")
+    data = np.exp(np.cumsum(rng.normal(0, 0.003, (3000, 3)), axis=0)) * [30000.0, 2000.0, 1.0]
+    prices = pd.DataFrame(data, index=dates, columns=["BTC", "ETH", "USDT"])
+    holdings = {"BTC": 1.0, "USDT": 2000.0}
+    schedules = ConstantMixStrategy.rebalance_masks(dates, ("D", "7D", "W"))
+
+    compiled = constantMixKernel.run_constant_mix_modes(*make_template(prices, holdings, 0.5), schedules, drift_threshold)
+    monkeypatch.setattr(constantMixKernel, "HAS_NUMBA", False)
+    segments = constantMixKernel.run_constant_mix_modes(*make_template(prices, holdings, 0.5), schedules, drift_threshold)
+
+    for mode in schedules:
+        pd.testing.assert_frame_equal(compiled[mode].to_frame(), segments[mode].to_frame(), check_freq=False, rtol=1e-10)
+
+
+def test_compiled_and_segment_kernels_fail_on_the_same_bar(monkeypatch):
+    import numpy as np
+    from app.domain.strategies.constantMix import constantMixKernel
+
+    if not constantMixKernel.HAS_NUMBA:
+        pytest.skip("numba non installé : un seul chemin")
+    dates = pd.date_range("2024-01-01", periods=30, freq="D")
+    prices = pd.DataFrame({"BTC": np.linspace(100, 130, 30), "ETH": np.linspace(50, 40, 30), "USDT": 1.0}, index=dates)
+    holdings = {"BTC": 1.0, "USDT": 20.0}
+    schedules = ConstantMixStrategy.rebalance_masks(dates, ("D",))
+
+    errors = []
+    for numba in (True, False):
+        monkeypatch.setattr(constantMixKernel, "HAS_NUMBA", numba)
+        with pytest.raises(ValueError, match="Capital insuffisant") as exc:
+            constantMixKernel.run_constant_mix_modes(*make_template(prices, holdings, 20.0), schedules, None)
+        errors.append(str(exc.value))
+    assert errors[0] == errors[1]
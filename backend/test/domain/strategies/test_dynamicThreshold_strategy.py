@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.domain.strategies.dynamicThreshold.dynamicThresholdParams import DynamicThresholdParams
+from app.domain.strategies.dynamicThreshold.dynamicThresholdStrategy import DynamicThresholdStrategy
+
+
+def make_prices(n=200):
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2021-01-01", periods=n, freq="D")
+    returns = rng.normal(0.0, 0.03, (n, 3))
+    returns[:, 2] = rng.normal(0.0, 0.001, n)
+    data = 100.0 * np.exp(np.cumsum(returns, axis=0))
+    return pd.DataFrame(data, index=dates, columns=["BTCEUR", "ETHEUR", "USDT"])
+
+
+def make_wallet():
+    item = lambda s, a: type("I", (), {"symbol": s, "amount": a})()
+    return {"items": [item("BTCEUR", 10.0), item("ETHEUR", 20.0), item("USDT", 5.0)]}
+
+
+def make_params(**overrides):
+    params = dict(
+        target_weights={"BTCEUR": 0.6, "ETHEUR": 0.3, "USDT": 0.1},
+        stable_assets=("USDT",),
+        cooldown_days=3,
+    )
+    params.update(overrides)
+    return DynamicThresholdParams(**params)
+
+
+@pytest.mark.parametrize("rebal_frac", [1.0, 0.5])
+def test_kernel_matches_broker_loop(rebal_frac):
+    prices = make_prices()
+
+    kernel = DynamicThresholdStrategy(make_params(rebal_frac=rebal_frac))._run_with_kernel(prices, make_wallet())
+    reference = DynamicThresholdStrategy(make_params(rebal_frac=rebal_frac))._run_with_broker(prices, make_wallet())
+
+    assert (reference["cost"] > 0).sum() > 1
+    pd.testing.assert_frame_equal(kernel, reference, check_freq=False, rtol=1e-10)
+
+
+def test_thresholds_use_stable_threshold_and_bounds():
+    prices = make_prices()
+    strat = DynamicThresholdStrategy(make_params(min_th=0.03, max_th=0.2, stable_threshold=0.005))
+
+    thr = strat._precompute_thresholds(prices)
+
+    assert thr.shape == prices.shape
+    assert np.all(thr[:, 2] == 0.005)
+    assert np.all((thr[:, :2] >= 0.03) & (thr[:, :2] <= 0.2))
+
+
+def test_kernel_raises_when_fees_exceed_capital():
+    prices = make_prices(20)
+    item = lambda s, a: type("I", (), {"symbol": s, "amount": a})()
+    wallet = {"items": [item("BTCEUR", 0.001)]}
+
+    with pytest.raises(ValueError, match="Capital insuffisant"):
+        DynamicThresholdStrategy(make_params(fixed_fee=5.0)).run(prices, wallet)
+
+
+def test_volatility_is_annualized_from_bar_size():
+    daily = make_prices()
+    hourly = daily.set_axis(pd.date_range("2021-01-01", periods=len(daily), freq="h"))
+    strat = DynamicThresholdStrategy(make_params())
+
+    vol_daily = strat._precompute_asset_volatilities(daily, 30)
+    vol_hourly = strat._precompute_asset_volatilities(hourly, 30)
+
+    np.testing.assert_allclose(vol_hourly.to_numpy(), vol_daily.to_numpy() * np.sqrt(24))
+
+
+@pytest.mark.parametrize("run", ["_run_with_kernel", "_run_with_broker"])
+def test_cooldown_is_counted_in_days_on_intraday_bars(run):
+    hourly = make_prices(24 * 20)
+    hourly = hourly.set_axis(pd.date_range("2021-01-01", periods=len(hourly), freq="h"))
+    strat = DynamicThresholdStrategy(make_params(cooldown_days=2))
+
+    history = getattr(strat, run)(hourly, make_wallet())
+
+    # Délai de 2 jours = 48 barres horaires entre deux rééquilibrages, pas 2 barres
+    rebalanced = np.flatnonzero(history["cost"].to_numpy() > 0)
+    assert len(rebalanced) > 2
+    assert np.diff(rebalanced).min() >= 48
+    assert strat._vol_window_bars(hourly) == 40 * 24
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from app.domain.strategies.tradingUtils.History import HistoryBuffer
+
+
+def test_history_buffer_builds_frame_without_copying_columns():
+    index = pd.date_range("2020-01-01", periods=3, freq="D")
+    buf = HistoryBuffer(index, ["BTC", "ETH"])
+
+    for t in range(3):
+        buf.record(t, value=100.0 + t, cost=0.5 * t, positions=np.array([1.0, 2.0 + t]), max_drift=0.1, l1_drift=0.2)
+    df = buf.to_frame()
+
+    assert list(df.columns) == ["value", "cost", "weights", "trades", "max_drift", "l1_drift", "pos_BTC", "pos_ETH"]
+    assert df.index.name == "date" and list(df.index) == list(index)
+    assert list(df["pos_ETH"]) == [2.0, 3.0, 4.0]
+    assert np.shares_memory(df["value"].to_numpy(), buf.value)
+
+
+def test_history_buffer_grows_and_keeps_recorded_dates():
+    index = pd.date_range("2020-01-01", periods=2, freq="D")
+    buf = HistoryBuffer(index, ["BTC"])
+
+    buf.record(0, 1.0, 0.0, np.array([1.0]))
+    buf.record(1, 2.0, 0.0, np.array([1.0]))
+    buf.record(1, 3.0, 1.0, np.array([2.0]))
+    df = buf.to_frame()
+
+    assert len(df) == 3
+    assert list(df.index) == [index[0], index[1], index[1]]
+    assert df["max_drift"].isna().all()
+    assert list(df["pos_BTC"]) == [1.0, 1.0, 2.0]
+
+
+def test_history_buffer_empty_frame():
+    buf = HistoryBuffer(pd.DatetimeIndex([]), ["BTC"])
+    df = buf.to_frame()
+    assert df.empty and "value" in df.columns
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -5,6 +6,10 @@ from app.domain.strategies.tradingUtils.Utils import (
     normalize_weights,
     wallet_items_to_holdings,
     compute_portfolio_value,
+    days_to_bars,
+    infer_periods_per_year,
+    resample_ohlc,
+    timeframe_periods_per_year,
 )
 
 
@@ -25,3 +30,35 @@ def test_compute_portfolio_value_ignores_missing_assets():
     prices = pd.Series({"BTC": 100.0})
     value = compute_portfolio_value(holdings, prices)
     assert value == 100.0  # XRP missing -> ignored
+
+
+def test_periods_per_year_follow_bar_size():
+    assert timeframe_periods_per_year("1d") == 365
+    assert timeframe_periods_per_year("1h") == 365 * 24
+    assert infer_periods_per_year(pd.date_range("2024-01-01", periods=10, freq="3min")) == 365 * 480
+    assert infer_periods_per_year(pd.DatetimeIndex(["2024-01-01"])) == 365
+    with pytest.raises(ValueError):
+        timeframe_periods_per_year("2h")
+
+
+def test_days_to_bars_follow_bar_size():
+    assert days_to_bars(5, pd.date_range("2024-01-01", periods=10, freq="D")) == 5
+    assert days_to_bars(5, pd.date_range("2024-01-01", periods=10, freq="h")) == 120
+    assert days_to_bars(2, pd.date_range("2024-01-01", periods=10, freq="3min")) == 960
+
+
+def test_resample_ohlc_aggregates_each_field_on_utc_boundaries():
+    index = pd.date_range("2024-01-01 00:57", periods=4, freq="3min", name="open_time")
+    close = pd.DataFrame({"BTCEUR": [1.0, 2.0, 3.0, 4.0], "ETHEUR": [10.0, np.nan, 30.0, 40.0]}, index=index)
+    prices = pd.concat(
+        {"open": close - 0.5, "high": close + 1.0, "low": close - 1.0, "close": close}, axis=1, names=["field", "symbol"]
+    )
+
+    bars = resample_ohlc(prices, "1h")
+
+    assert list(bars.index) == [pd.Timestamp("2024-01-01 00:00"), pd.Timestamp("2024-01-01 01:00")]
+    assert bars["open"]["BTCEUR"].tolist() == [0.5, 1.5]
+    assert bars["high"]["BTCEUR"].tolist() == [2.0, 5.0]
+    assert bars["low"]["BTCEUR"].tolist() == [0.0, 1.0]
+    # Le trou ETH (NaN) n'écrase pas la clôture de la barre
+    assert bars["close"]["ETHEUR"].tolist() == [10.0, 40.0]
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from app.domain.services.candle.baseCandleService import baseCandleService
+from app.infrastructure.adapters.binanceCandleAdapter import INTERVAL_MS, binanceCandleAdapter
+from app.infrastructure.adapters.rateLimiter import AsyncRateLimiter
+
+DAY_MS = 24 * 3600 * 1000
+
+
+def kline(ts_ms, close=1.0):
+    return [ts_ms, "1.0", "2.0", "0.5", str(close), "10.0"]
+
+
+def stub_transport(latency=0.0, stats=None, listed_from_ms=None):
+    """Stub des klines Binance : une bougie par intervalle aligné dans [startTime, endTime]."""
+    stats = stats if stats is not None else {}
+    stats.setdefault("in_flight", 0)
+    stats.setdefault("max_in_flight", 0)
+    stats.setdefault("calls", 0)
+
+    async def handler(request: httpx.Request):
+        stats["calls"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(latency)
+            start = int(request.url.params["startTime"])
+            end = int(request.url.params["endTime"])
+            limit = int(request.url.params["limit"])
+            step = INTERVAL_MS[request.url.params["interval"]]
+            if listed_from_ms is not None:
+                start = max(start, listed_from_ms)
+            first = -(-start // step) * step
+            rows = [kline(ts) for ts in range(first, end + 1, step)][:limit]
+            return httpx.Response(200, json=rows)
+        finally:
+            stats["in_flight"] -= 1
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_fetch_candles_parses_klines():
+    adapter = binanceCandleAdapter(transport=stub_transport())
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    try:
+        candles = await adapter.fetchCandles("btceur", start, start + timedelta(days=4), "1d")
+    finally:
+        await adapter.aclose()
+
+    assert len(candles) == 5
+    assert candles[0] == {"open_time": start, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_fetch_3m_candles_pages_by_interval_in_parallel():
+    stats = {}
+    adapter = binanceCandleAdapter(transport=stub_transport(latency=0.02, stats=stats))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=7)
+    try:
+        candles, report = await adapter.fetchCandlesReport("BTCEUR", start, end, "3m")
+    finally:
+        await adapter.aclose()
+
+    open_times = [c["open_time"] for c in candles]
+    # 7 jours de bougies 3m, sans trou ni doublon : 3361 bougies sur 4 pages
+    assert len(open_times) == 7 * 480 + 1
+    assert all(b - a == timedelta(minutes=3) for a, b in zip(open_times, open_times[1:]))
+    assert stats["calls"] == 4
+    assert stats["max_in_flight"] == 4
+    assert report.complete and report.expected == report.received == 3361
+
+
+@pytest.mark.asyncio
+async def test_fetch_streams_pages_to_callback():
+    adapter = binanceCandleAdapter(transport=stub_transport())
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    pages = []
+
+    async def on_page(page):
+        pages.append(len(page))
+
+    try:
+        candles, report = await adapter.fetchCandlesReport("BTCEUR", start, start + timedelta(days=4), "3m", on_page=on_page)
+    finally:
+        await adapter.aclose()
+
+    assert candles == []
+    assert sorted(pages) == [921, 1000]
+    assert report.received == sum(pages) == report.expected
+
+
+@pytest.mark.asyncio
+async def test_fetch_report_flags_incomplete_symbol():
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    listed = start + timedelta(days=2)
+    adapter = binanceCandleAdapter(transport=stub_transport(listed_from_ms=int(listed.timestamp() * 1000)))
+    try:
+        candles, report = await adapter.fetchCandlesReport("NEWEUR", start, start + timedelta(days=9), "1d")
+    finally:
+        await adapter.aclose()
+
+    assert (report.expected, report.received, report.missing) == (10, 8, 2)
+    assert not report.complete
+    assert candles[0]["open_time"] == listed
+
+
+def test_expected_count_aligns_on_interval():
+    start = int(datetime(2024, 1, 1, 0, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    end = int(datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc).timestamp() * 1000)
+
+    # ouvertures 00:15, 00:30, 00:45, 01:00
+    assert binanceCandleAdapter._expectedCount(start, end, "15m") == 4
+    # 2024-01-01 est un lundi : une seule ouverture hebdomadaire sur la semaine
+    monday = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    assert binanceCandleAdapter._expectedCount(monday, monday + 6 * DAY_MS, "1w") == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_candles_raises_on_http_error():
+    adapter = binanceCandleAdapter(transport=httpx.MockTransport(lambda r: httpx.Response(429, json={"code": -1003})))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await adapter.fetchCandles("BTCEUR", start, start + timedelta(days=1), "1d")
+    finally:
+        await adapter.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sync_fetches_symbols_concurrently_under_limit():
+    stats = {}
+    adapter = binanceCandleAdapter(max_concurrency=3, transport=stub_transport(latency=0.05, stats=stats))
+    crypto_repo = AsyncMock()
+    crypto_repo.get_all_symbols.return_value = [f"SYM{i}EUR" for i in range(9)]
+    candle_repo = AsyncMock()
+    candle_repo.getLatestOpenTimes.return_value = {}
+    service = baseCandleService(candle_repo, crypto_repo, adapter, timeframe="1d", retention_days=30)
+
+    started = time.perf_counter()
+    try:
+        await service.syncPeriod(3)
+    finally:
+        await adapter.aclose()
+    elapsed = time.perf_counter() - started
+
+    assert candle_repo.saveCandles.call_count == 9
+    assert stats["max_in_flight"] == 3
+    # 9 requêtes de 50 ms par vagues de 3, au lieu de ~450 ms en séquentiel
+    assert elapsed < 0.35
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spreads_acquisitions():
+    limiter = AsyncRateLimiter(rate=5, per=0.5)
+
+    started = time.perf_counter()
+    for _ in range(10):
+        await limiter.acquire()
+    elapsed = time.perf_counter() - started
+
+    # 5 jetons disponibles d'emblée, les 5 suivants arrivent sur ~0.5 s
+    assert 0.4 <= elapsed < 1.0
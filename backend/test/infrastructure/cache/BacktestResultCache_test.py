@@ -0,0 +1,85 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pandas as pd
+
+from app.domain.models.wallet.walletItem import WalletItem
+from app.domain.strategies.constantMix.constantMixParams import ConstantMixParams
+from app.infrastructure.cache.backtestResultCache import BacktestResultCache
+
+
+def make_wallet(*items):
+    return {"items": [WalletItem(id=i, symbol=s, amount=a) for i, (s, a) in enumerate(items)]}
+
+
+def make_result(value=1.0):
+    df = pd.DataFrame({"value": [value]}, index=pd.DatetimeIndex(["2024-01-01"], name="date"))
+    df.attrs["best_mode"] = "M"
+    return df
+
+
+def test_key_depends_on_every_input_but_not_on_wallet_order():
+    params = ConstantMixParams(target_weights={"BTCEUR": 1.0})
+    wallet = make_wallet(("BTCEUR", 1.0), ("ETHEUR", 2.0))
+    version = datetime(2024, 1, 1)
+    key = BacktestResultCache.key("constant_mix", params, wallet, version)
+
+    assert key == BacktestResultCache.key("constant_mix", params, make_wallet(("ETHEUR", 2.0), ("BTCEUR", 1.0)), version)
+    assert key != BacktestResultCache.key("hold", params, wallet, version)
+    assert key != BacktestResultCache.key("constant_mix", ConstantMixParams(target_weights={"BTCEUR": 1.0}, fee_rate=0.002), wallet, version)
+    assert key != BacktestResultCache.key("constant_mix", params, make_wallet(("BTCEUR", 1.5), ("ETHEUR", 2.0)), version)
+    assert key != BacktestResultCache.key("constant_mix", params, wallet, datetime(2024, 1, 2))
+    assert key != BacktestResultCache.key("constant_mix", params, wallet, version, timeframe="1h")
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = BacktestResultCache(max_entries=2)
+    cache.put("a", make_result(1.0))
+    cache.put("b", make_result(2.0))
+    cache.get("a")
+    cache.put("c", make_result(3.0))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_entries_expire_after_ttl():
+    cache = BacktestResultCache(ttl=10)
+    with patch("app.infrastructure.cache.backtestResultCache.time.monotonic", return_value=100.0):
+        cache.put("a", make_result())
+    with patch("app.infrastructure.cache.backtestResultCache.time.monotonic", return_value=105.0):
+        assert cache.get("a") is not None
+    with patch("app.infrastructure.cache.backtestResultCache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+
+
+def test_disk_tier_survives_a_new_cache_instance(tmp_path):
+    BacktestResultCache(disk_dir=str(tmp_path)).put("k", make_result(4.0))
+
+    restored = BacktestResultCache(disk_dir=str(tmp_path)).get("k")
+
+    pd.testing.assert_frame_equal(restored, make_result(4.0))
+    assert restored.attrs["best_mode"] == "M"
+
+
+def test_disk_tier_prunes_expired_and_oldest_files(tmp_path):
+    import os
+    import time
+
+    cache = BacktestResultCache(ttl=100.0, disk_dir=str(tmp_path), disk_max_entries=2)
+    now = time.time()
+    cache.put("expire", make_result())
+    os.utime(tmp_path / "expire.pkl", (now - 500, now - 500))
+    (tmp_path / "abandon.pkl.1.2.tmp").write_bytes(b"")
+    os.utime(tmp_path / "abandon.pkl.1.2.tmp", (now - 500, now - 500))
+    cache.put("a", make_result(0.0))
+    os.utime(tmp_path / "a.pkl", (now - 20, now - 20))
+    cache.put("b", make_result(1.0))
+    os.utime(tmp_path / "b.pkl", (now - 10, now - 10))
+
+    cache.put("c", make_result(2.0))
+
+    # Expirés et temporaires abandonnés supprimés, puis le plus ancien au-delà de 2 fichiers
+    assert sorted(os.listdir(tmp_path)) == ["b.pkl", "c.pkl"]
+    assert BacktestResultCache(disk_dir=str(tmp_path)).get("a") is None
+    assert BacktestResultCache(disk_dir=str(tmp_path)).get("c")["value"].tolist() == [2.0]
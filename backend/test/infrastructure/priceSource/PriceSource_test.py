@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.infrastructure.cache.priceMatrixCache import priceMatrixCache
+from app.infrastructure.priceSource.databasePriceSource import DatabasePriceSource
+from app.infrastructure.priceSource.memoryPriceSource import InMemoryPriceSource
+from app.infrastructure.priceSource.snapshotPriceSource import SnapshotPriceSource
+from app.infrastructure.store.priceSnapshotStore import PriceSnapshotStore
+
+
+@pytest.fixture(autouse=True)
+def clear_price_cache():
+    priceMatrixCache.invalidate()
+    yield
+    priceMatrixCache.invalidate()
+
+
+def make_prices(n=5):
+    dates = pd.date_range("2024-01-01", periods=n, freq="D", name="open_time")
+    data = np.arange(n * 3, dtype=float).reshape(n, 3) + 1.0
+    return pd.DataFrame(data, index=dates, columns=pd.Index(["BTCEUR", "ETHEUR", "SOLEUR"], name="symbol"))
+
+
+def make_repo(prices):
+    repo = Mock()
+    repo.timeframe = "1d"
+    repo.getLatestOpenTime.return_value = prices.index[-1].to_pydatetime()
+    repo.generation = 0
+    repo.getDataVersion.side_effect = lambda: (repo.generation, repo.getLatestOpenTime())
+    repo.rewrite = 0
+    repo.getRewriteState.side_effect = lambda: (repo.rewrite, None)
+    repo.getCloseMatrix.side_effect = lambda symbols=None, start=None, end=None: InMemoryPriceSource._slice(
+        prices, symbols, start, end
+    )
+    return repo
+
+
+def test_in_memory_source_filters_symbols_and_dates():
+    source = InMemoryPriceSource({"1d": make_prices()})
+
+    prices = source.getPriceMatrix(["ETHEUR", "BTCEUR", "XRPEUR"], "1d", start=datetime(2024, 1, 2), end=datetime(2024, 1, 3))
+
+    assert list(prices.columns) == ["BTCEUR", "ETHEUR"]
+    assert list(prices.index) == [pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-03")]
+    assert source.getVersion("1d") == pd.Timestamp("2024-01-05")
+
+
+def test_in_memory_source_accepts_timezone_aware_bounds():
+    source = InMemoryPriceSource({"1d": make_prices()})
+
+    prices = source.getPriceMatrix(None, "1d", start=datetime(2024, 1, 4, tzinfo=timezone.utc))
+
+    assert len(prices) == 2
+
+
+def test_unknown_timeframe_raises():
+    with pytest.raises(ValueError):
+        InMemoryPriceSource({"1d": make_prices()}).getPriceMatrix(None, "4h")
+    with pytest.raises(ValueError):
+        DatabasePriceSource({"1d": make_repo(make_prices())}).getPriceMatrix(None, "4h")
+
+
+def test_database_source_pushes_filters_to_repository_when_not_cached():
+    repo = make_repo(make_prices())
+    source = DatabasePriceSource({"1d": repo})
+
+    source.getPriceMatrix(["BTCEUR"], "1d", start=datetime(2024, 1, 3))
+
+    repo.getCloseMatrix.assert_called_once_with(symbols=["BTCEUR"], start=datetime(2024, 1, 3), end=None)
+
+
+def test_database_source_serves_filtered_reads_from_cached_full_matrix():
+    repo = make_repo(make_prices())
+    source = DatabasePriceSource({"1d": repo})
+
+    source.getPriceMatrix(None, "1d")
+    prices = source.getPriceMatrix(["SOLEUR"], "1d", end=datetime(2024, 1, 2))
+
+    repo.getCloseMatrix.assert_called_once_with()
+    assert prices["SOLEUR"].tolist() == [3.0, 6.0]
+
+
+def test_snapshot_source_builds_then_reads_snapshot(tmp_path):
+    repo = make_repo(make_prices())
+    source = SnapshotPriceSource(PriceSnapshotStore(str(tmp_path)), {"1d": repo})
+
+    first = source.getPriceMatrix(["BTCEUR"], "1d")
+    second = source.getPriceMatrix(None, "1d")
+
+    # Un seul aller-retour en base : la deuxième lecture vient du fichier mappé
+    repo.getCloseMatrix.assert_called_once()
+    assert first["BTCEUR"].tolist() == make_prices()["BTCEUR"].tolist()
+    assert second.shape == (5, 3)
+    assert not second.to_numpy().flags.writeable
+
+
+def test_snapshot_source_rebuilds_after_a_backfill_below_the_latest_candle(tmp_path):
+    prices = make_prices()
+    repo = make_repo(prices)
+    source = SnapshotPriceSource(PriceSnapshotStore(str(tmp_path)), {"1d": repo})
+    source.getPriceMatrix(None, "1d")
+
+    # Backfill d'une bougie ancienne par un autre process : dernière bougie inchangée
+    prices.iloc[1, 0] = 42.0
+    repo.generation += 1
+    repo.rewrite += 1
+    rebuilt = source.getPriceMatrix(["BTCEUR"], "1d")
+    source.getPriceMatrix(None, "1d")
+
+    assert rebuilt["BTCEUR"].iloc[1] == 42.0
+    assert repo.getCloseMatrix.call_count == 2
+
+
+def test_snapshot_source_catches_up_incrementally_after_an_append(tmp_path):
+    prices = make_prices(n=6)
+    repo = make_repo(prices.iloc[:5])
+    source = SnapshotPriceSource(PriceSnapshotStore(str(tmp_path)), {"1d": repo})
+    source.getPriceMatrix(None, "1d")
+
+    # Nouvelle bougie écrite par un autre process : seules les lignes récentes sont relues
+    repo.getLatestOpenTime.return_value = prices.index[-1].to_pydatetime()
+    repo.getCloseMatrix.side_effect = lambda symbols=None, start=None, end=None: InMemoryPriceSource._slice(
+        prices, symbols, start, end
+    )
+    repo.generation += 1
+    caught_up = source.getPriceMatrix(None, "1d")
+
+    assert repo.getCloseMatrix.call_args.kwargs == {"start": datetime(2024, 1, 5)}
+    pd.testing.assert_frame_equal(caught_up, prices, check_freq=False, check_index_type=False)
+
+
+def test_snapshot_source_without_repository_or_snapshot_is_empty(tmp_path):
+    source = SnapshotPriceSource(PriceSnapshotStore(str(tmp_path)))
+
+    assert source.getPriceMatrix(None, "1d").empty
+    assert source.getVersion("1d") is None
+
+
+def test_longer_timeframes_are_resampled_from_three_minute_candles():
+    index = pd.date_range("2024-01-01", periods=40, freq="3min", name="open_time")
+    three_min = pd.DataFrame({"BTCEUR": np.arange(40, dtype=float)}, index=index)
+    source = InMemoryPriceSource({"1d": make_prices(), "3m": three_min})
+
+    quarter = source.getPriceMatrix(None, "15m", start=datetime(2024, 1, 1, 0, 20))
+    hourly = source.getPriceMatrix(None, "1h")
+
+    # start ramené au début de sa barre de 15 minutes : pas de barre partielle
+    assert quarter.index[0] == pd.Timestamp("2024-01-01 00:15")
+    assert quarter["BTCEUR"].tolist() == [9.0, 14.0, 19.0, 24.0, 29.0, 34.0, 39.0]
+    assert hourly["BTCEUR"].tolist() == [19.0, 39.0]
+    assert source.getVersion("4h") == index[-1]
+
+
+def test_database_source_caches_filtered_reads_per_symbols_and_dates():
+    repo = make_repo(make_prices())
+    source = DatabasePriceSource({"1d": repo})
+
+    first = source.getPriceMatrix(["ETHEUR", "BTCEUR"], "1d", start=datetime(2024, 1, 3))
+    again = source.getPriceMatrix(["BTCEUR", "ETHEUR"], "1d", start=datetime(2024, 1, 3))
+    source.getPriceMatrix(["BTCEUR"], "1d", start=datetime(2024, 1, 3))
+
+    assert again is first
+    assert repo.getCloseMatrix.call_count == 2
@@ -0,0 +1,313 @@
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database.database import Base
+from app.infrastructure.models.candle.candleTable import CandleTable
+from app.infrastructure.repository.candle.dailyCandleRepository import dailyCandleRepository
+from app.infrastructure.repository.candle.threeMinCandleRepository import threeMinCandleRepository
+
+
+@pytest.fixture
+def db_session():
+    # Une seule connexion partagée : les écritures du repository passent par un thread (asyncio.to_thread)
+    engine = create_engine(
+        "sqlite:///:memory:", echo=False, connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+        db.rollback()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def pg_session():
+    """Session sur une base PostgreSQL dédiée aux tests (TEST_DATABASE_URL), pour les chemins propres à PostgreSQL."""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL non défini")
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    db.query(CandleTable).filter(CandleTable.symbol.like("TEST%")).delete(synchronize_session=False)
+    db.commit()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.query(CandleTable).filter(CandleTable.symbol.like("TEST%")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def add_candle(db, symbol, open_time, close):
+    db.add(CandleTable(symbol=symbol, open_time=open_time, open=close, high=close, low=close, close=close))
+    db.commit()
+
+
+def test_get_latest_open_time(db_session):
+    repo = dailyCandleRepository(db_session)
+    assert repo.timeframe == "1d"
+    assert repo.getLatestOpenTime() is None
+
+    add_candle(db_session, "BTCEUR", datetime(2024, 1, 2), 100.0)
+    add_candle(db_session, "ETHEUR", datetime(2024, 1, 5), 50.0)
+
+    assert repo.getLatestOpenTime() == datetime(2024, 1, 5)
+
+
+def test_get_close_matrix_pivots_and_filters(db_session):
+    repo = dailyCandleRepository(db_session)
+    add_candle(db_session, "BTCEUR", datetime(2024, 1, 1), 100.0)
+    add_candle(db_session, "BTCEUR", datetime(2024, 1, 2), 101.0)
+    add_candle(db_session, "ETHEUR", datetime(2024, 1, 2), 50.0)
+    add_candle(db_session, "ETHEUR", datetime(2024, 1, 3), 51.0)
+    add_candle(db_session, "XRPEUR", datetime(2024, 1, 3), 0.5)
+
+    matrix = repo.getCloseMatrix()
+
+    assert list(matrix.columns) == ["BTCEUR", "ETHEUR", "XRPEUR"]
+    assert list(matrix.index) == [datetime(2024, 1, 1), datetime(2024, 1, 2), datetime(2024, 1, 3)]
+    assert matrix.loc[datetime(2024, 1, 2), "ETHEUR"] == 50.0
+    assert np.isnan(matrix.loc[datetime(2024, 1, 1), "ETHEUR"])
+
+    filtered = repo.getCloseMatrix(symbols=["BTCEUR", "ETHEUR"], start=datetime(2024, 1, 2), end=datetime(2024, 1, 2))
+    assert filtered.to_dict() == {"BTCEUR": {pd.Timestamp("2024-01-02"): 101.0}, "ETHEUR": {pd.Timestamp("2024-01-02"): 50.0}}
+
+
+def test_get_price_matrix_ohlc_in_small_batches(db_session):
+    repo = dailyCandleRepository(db_session)
+    for day in range(1, 6):
+        add_candle(db_session, "BTCEUR", datetime(2024, 1, day), 100.0 + day)
+
+    matrix = repo.getPriceMatrix(batch_size=2)
+
+    assert list(matrix.columns.get_level_values(0).unique()) == ["open", "high", "low", "close"]
+    assert matrix[("close", "BTCEUR")].tolist() == [101.0, 102.0, 103.0, 104.0, 105.0]
+
+
+def test_get_price_matrix_empty(db_session):
+    matrix = dailyCandleRepository(db_session).getCloseMatrix()
+
+    assert matrix.empty
+    assert isinstance(matrix.index, pd.DatetimeIndex)
+
+
+@pytest.mark.asyncio
+async def test_get_latest_open_times_groups_by_symbol(db_session):
+    repo = dailyCandleRepository(db_session)
+    add_candle(db_session, "BTCEUR", datetime(2024, 1, 1), 100.0)
+    add_candle(db_session, "BTCEUR", datetime(2024, 1, 3), 101.0)
+    add_candle(db_session, "ETHEUR", datetime(2024, 1, 2), 50.0)
+
+    assert await repo.getLatestOpenTimes() == {"BTCEUR": datetime(2024, 1, 3), "ETHEUR": datetime(2024, 1, 2)}
+    assert await repo.getLatestOpenTimes(["ETHEUR", "SOLEUR"]) == {"ETHEUR": datetime(2024, 1, 2)}
+
+
+@pytest.mark.asyncio
+async def test_save_candles_batches_and_counts_inserted_rows(db_session):
+    repo = dailyCandleRepository(db_session)
+    candles = [
+        {"open_time": datetime(2024, 1, day), "open": 1.0, "high": 1.0, "low": 1.0, "close": float(day)}
+        for day in range(1, 8)
+    ]
+
+    assert await repo.saveCandles("BTCEUR", candles[:4], batch_size=3) == 4
+    # Les 4 premières sont déjà en base : seules les 3 nouvelles sont comptées
+    assert await repo.saveCandles("BTCEUR", candles, batch_size=3) == 3
+    assert repo.getCloseMatrix()["BTCEUR"].tolist() == [float(day) for day in range(1, 8)]
+
+
+@pytest.mark.asyncio
+async def test_data_version_moves_on_every_write_even_below_the_latest_candle(db_session):
+    repo = dailyCandleRepository(db_session)
+    assert repo.getDataVersion() == (0, None)
+
+    await repo.saveCandles("BTCEUR", [utc_candle(5, 100.0)])
+    after_first = repo.getDataVersion()
+    assert after_first == (1, datetime(2024, 1, 5))
+
+    # Nouveau symbole sous le max : l'open_time max ne bouge pas, la génération si
+    await repo.saveCandles("ETHEUR", [utc_candle(2, 50.0)])
+    assert repo.getDataVersion() == (2, datetime(2024, 1, 5))
+
+    # Rien d'inséré : version inchangée
+    await repo.saveCandles("ETHEUR", [utc_candle(2, 50.0)])
+    assert repo.getDataVersion()[0] == 2
+
+    await repo.stageCandles("SOLEUR", [utc_candle(1, 20.0)])
+    await repo.mergeStagedCandles()
+    await repo.purgeOlderThan(datetime(2024, 1, 2))
+    assert repo.getDataVersion()[0] == 4
+    # Générations indépendantes par timeframe
+    assert threeMinCandleRepository(db_session).getDataVersion() == (0, None)
+
+
+@pytest.mark.asyncio
+async def test_rewrite_state_tracks_writes_below_the_latest_candle_and_purges(db_session):
+    repo = dailyCandleRepository(db_session)
+    assert repo.getRewriteState() == (0, None)
+
+    # Ajouts en fin de série : pas de réécriture
+    await repo.saveCandles("BTCEUR", [utc_candle(3, 100.0)])
+    await repo.saveCandles("BTCEUR", [utc_candle(4, 101.0)])
+    await repo.saveCandles("ETHEUR", [utc_candle(4, 50.0)])
+    assert repo.getRewriteState() == (0, None)
+
+    # Backfill sous la dernière bougie
+    await repo.saveCandles("ETHEUR", [utc_candle(2, 49.0)])
+    assert repo.getRewriteState() == (1, None)
+
+    await repo.stageCandles("SOLEUR", [utc_candle(1, 20.0)])
+    await repo.mergeStagedCandles()
+    assert repo.getRewriteState() == (2, None)
+
+    # Rétention : la date de coupure suffit à mettre une copie à jour
+    await repo.purgeOlderThan(datetime(2024, 1, 2))
+    assert repo.getRewriteState() == (2, datetime(2024, 1, 2))
+
+
+def utc_candle(day, close):
+    return {"open_time": datetime(2024, 1, day, tzinfo=timezone.utc), "open": close, "high": close, "low": close, "close": close}
+
+
+async def stage_and_merge(repo):
+    await repo.saveCandles("TESTBTC", [utc_candle(1, 1.0)])
+    await repo.stageCandles("TESTBTC", [utc_candle(1, 99.0), utc_candle(2, 2.0)])
+    await repo.stageCandles("TESTETH", [utc_candle(2, 20.0), utc_candle(3, 30.0)])
+    return await repo.mergeStagedCandles()
+
+
+@pytest.mark.asyncio
+async def test_staged_candles_are_merged_without_duplicates(db_session):
+    repo = dailyCandleRepository(db_session)
+
+    assert await stage_and_merge(repo) == {"TESTBTC": 1, "TESTETH": 2}
+    matrix = repo.getCloseMatrix()
+    # La bougie déjà présente n'est pas écrasée
+    assert matrix["TESTBTC"].dropna().tolist() == [1.0, 2.0]
+    assert matrix["TESTETH"].dropna().tolist() == [20.0, 30.0]
+    # La table de chargement est supprimée : un nouveau cycle repart de zéro
+    assert await repo.mergeStagedCandles() == {}
+
+
+@pytest.mark.asyncio
+async def test_copy_loader_on_postgres(pg_session):
+    repo = dailyCandleRepository(pg_session)
+
+    assert await stage_and_merge(repo) == {"TESTBTC": 1, "TESTETH": 2}
+    matrix = repo.getCloseMatrix(symbols=["TESTBTC", "TESTETH"])
+    assert matrix["TESTETH"].dropna().tolist() == [20.0, 30.0]
+
+
+def test_partition_bounds_follow_table_granularity():
+    daily = dailyCandleRepository(None)
+    three_min = threeMinCandleRepository(None)
+
+    assert [name for name, _, _ in daily._partitionBounds(datetime(2024, 11, 20), datetime(2025, 1, 3))] == [
+        "candle_p202411", "candle_p202412", "candle_p202501"
+    ]
+    assert daily._nextBound(datetime(2024, 12, 1)) == datetime(2025, 1, 1)
+    assert three_min._partitionBounds(datetime(2024, 1, 31, 23, 57), datetime(2024, 2, 1, 0, 3)) == [
+        ("candleThreeMin_p20240131", datetime(2024, 1, 31), datetime(2024, 2, 1)),
+        ("candleThreeMin_p20240201", datetime(2024, 2, 1), datetime(2024, 2, 2)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_purge_older_than_without_partitions(db_session):
+    repo = dailyCandleRepository(db_session)
+    add_candle(db_session, "BTCEUR", datetime(2024, 1, 1), 100.0)
+    add_candle(db_session, "ETHEUR", datetime(2024, 1, 2), 50.0)
+    add_candle(db_session, "BTCEUR", datetime(2024, 1, 3), 101.0)
+
+    assert await repo.purgeOlderThan(datetime(2024, 1, 3, tzinfo=timezone.utc)) == 0
+    assert await repo.getLatestOpenTimes() == {"BTCEUR": datetime(2024, 1, 3)}
+    assert len(repo.getCloseMatrix()) == 1
+
+
+@pytest.mark.asyncio
+async def test_partition_retention_on_postgres(pg_session):
+    repo = dailyCandleRepository(pg_session)
+    if not repo._isPartitioned():
+        pytest.skip("table candle non partitionnée (migration non appliquée)")
+    await repo.saveCandles("TESTBTC", [utc_candle(day, float(day)) for day in (1, 2)])
+    await repo.saveCandles("TESTBTC", [{**utc_candle(1, 3.0), "open_time": datetime(2024, 3, 5, tzinfo=timezone.utc)}])
+    partitions = [name for name, _, _ in repo._existingPartitions()]
+    assert {"candle_p202401", "candle_p202403"} <= set(partitions)
+
+    dropped = await repo.purgeOlderThan(datetime(2024, 3, 1))
+
+    assert dropped >= 1
+    assert "candle_p202401" not in [name for name, _, _ in repo._existingPartitions()]
+    # Détachée puis supprimée : pas de table orpheline
+    assert pg_session.execute(text("SELECT to_regclass('candle_p202401')")).scalar() is None
+    assert repo.getCloseMatrix(symbols=["TESTBTC"])["TESTBTC"].tolist() == [3.0]
+
+
+def test_price_matrix_read_is_index_only_scan(pg_session):
+    repo = dailyCandleRepository(pg_session)
+    for day in range(1, 29):
+        add_candle(pg_session, "TESTBTC", datetime(2024, 2, day), float(day))
+        add_candle(pg_session, "TESTETH", datetime(2024, 2, day), float(day))
+
+    # VACUUM (hors transaction) met à jour la visibility map requise par l'index-only scan
+    with pg_session.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f'VACUUM ANALYZE "{CandleTable.__tablename__}"'))
+
+    stmt = repo._priceMatrixQuery(["TESTBTC"], datetime(2024, 2, 3), datetime(2024, 2, 20), ("open", "high", "low", "close"))
+    compiled = stmt.compile(dialect=pg_session.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    # Table minuscule : on désactive le seq scan pour vérifier que l'index couvre la requête
+    pg_session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = "\n".join(pg_session.execute(text(f"EXPLAIN {compiled}")).scalars())
+
+    # Sur une table partitionnée, le plan nomme les index hérités par chaque partition
+    assert "Index Only Scan" in plan
+    assert "Seq Scan" not in plan
+
+
+async def test_writes_leave_the_event_loop_free_for_downloads(db_session):
+    import asyncio
+    import threading
+
+    from app.domain.services.candle.candleIngestion import CandleIngestionPipeline
+
+    repo = dailyCandleRepository(db_session)
+    started, release = threading.Event(), threading.Event()
+    events = []
+    save = repo._saveCandles
+
+    def slow_save(*args):
+        started.set()
+        release.wait(2)
+        events.append("write")
+        return save(*args)
+
+    repo._saveCandles = slow_save
+
+    async def fetch_next_page():
+        # Téléchargement simulé : doit avancer pendant que le lot précédent s'écrit
+        await asyncio.to_thread(started.wait, 2)
+        await asyncio.sleep(0)
+        events.append("fetch")
+        release.set()
+        return [utc_candle(2, 2.0)]
+
+    async with CandleIngestionPipeline(repo, batch_size=1) as pipeline:
+        await pipeline.put("BTCEUR", [utc_candle(1, 1.0)])
+        await pipeline.put("BTCEUR", await fetch_next_page())
+
+    assert events == ["fetch", "write", "write"]
+    assert pipeline.inserted == {"BTCEUR": 2}
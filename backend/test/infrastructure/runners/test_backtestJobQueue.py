@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.domain.models.backtestJob import JobStatus
+from app.domain.models.wallet.walletItem import WalletItem
+from app.infrastructure.runners.backtestJobQueue import BacktestJobQueue
+from app.infrastructure.runners.holdRunner import HoldRunner
+
+
+def make_prices(n=60):
+    rng = np.random.default_rng(5)
+    dates = pd.date_range("2023-01-01", periods=n, freq="D")
+    px = np.exp(np.cumsum(rng.normal(0, 0.02, size=(n, 2)), axis=0)) * [30000.0, 2000.0]
+    return pd.DataFrame(px, index=dates, columns=["BTCEUR", "ETHEUR"])
+
+
+def make_wallet():
+    return {"items": [WalletItem(id=1, symbol="BTCEUR", amount=0.5), WalletItem(id=2, symbol="ETHEUR", amount=5.0)]}
+
+
+@pytest.fixture
+def queue():
+    queue = BacktestJobQueue(max_workers=1, max_jobs=2)
+    yield queue
+    queue.shutdown()
+
+
+def test_job_runs_in_worker_and_matches_inline_run(queue):
+    prices, wallet = make_prices(), make_wallet()
+
+    job = queue.submit("hold", 1, prices, wallet, {"fee_rate": 0.0, "slippage": 0.0, "favorite_platform": "Binance"})
+    assert job.status in (JobStatus.PENDING, JobStatus.RUNNING)
+    # Pas de fork du process API (threads, sessions, verrous)
+    assert queue._pool._mp_context.get_start_method() == "spawn"
+
+    done = queue.wait(job.id, timeout=60)
+
+    assert done.status == JobStatus.DONE
+    assert done.progress == 1.0
+    assert done.started_at is not None and done.finished_at >= done.started_at
+    expected = HoldRunner().run(prices, wallet)
+    pd.testing.assert_frame_equal(done.result, expected)
+
+
+def test_failed_job_reports_error(queue):
+    job = queue.submit("inconnue", 1, make_prices(), make_wallet(), {})
+
+    done = queue.wait(job.id, timeout=60)
+
+    assert done.status == JobStatus.FAILED
+    assert done.result is None
+    assert done.error == "Strategy not supported"
+
+
+def test_oldest_finished_jobs_are_evicted(queue):
+    ids = []
+    for _ in range(3):
+        job = queue.submit("hold", 1, make_prices(10), make_wallet(), {})
+        queue.wait(job.id, timeout=60)
+        ids.append(job.id)
+
+    assert queue.get(ids[0]) is None
+    assert queue.get(ids[2]).status == JobStatus.DONE
+    assert queue.get("inconnu") is None
+
+
+def test_on_done_receives_result_and_recorded_jobs_are_finished(queue):
+    results = []
+    job = queue.submit("hold", 1, make_prices(10), make_wallet(), {}, on_done=results.append)
+    done = queue.wait(job.id, timeout=60)
+
+    assert len(results) == 1 and results[0] is done.result
+
+    recorded = queue.record("hold", 1, done.result)
+    assert queue.get(recorded.id).status == JobStatus.DONE
+    assert recorded.result is done.result and recorded.progress == 1.0
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.domain.models.wallet.walletItem import WalletItem
+from app.domain.strategies.dynamicThreshold.dynamicThresholdParams import DynamicThresholdParams
+from app.domain.strategies.dynamicThreshold.dynamicThresholdStrategy import DynamicThresholdStrategy
+from app.domain.strategies.tradingUtils.Utils import backtest_metrics
+from app.infrastructure.runners import parameterSweep
+from app.infrastructure.runners.parameterSweep import ParameterSweep, expand_grid
+
+
+def make_prices(n=120):
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("2021-01-01", periods=n, freq="D")
+    returns = rng.normal(0, 0.03, size=(n, 2))
+    px = np.exp(np.cumsum(returns, axis=0)) * [30000.0, 2000.0]
+    return pd.DataFrame(px, index=dates, columns=["BTCEUR", "ETHEUR"])
+
+
+def make_wallet():
+    return {"items": [WalletItem(id=1, symbol="BTCEUR", amount=0.5), WalletItem(id=2, symbol="ETHEUR", amount=5.0)]}
+
+
+def base_params():
+    return DynamicThresholdParams(target_weights={"BTCEUR": 0.6, "ETHEUR": 0.4}, fixed_fee=0.0)
+
+
+def test_expand_grid_builds_cartesian_product_and_converts_tuples():
+    combos = expand_grid(base_params(), {"k": [0.1, 0.2], "stable_assets": [["USDT", "USDC"]]})
+
+    assert combos == [
+        {"k": 0.1, "stable_assets": ("USDT", "USDC")},
+        {"k": 0.2, "stable_assets": ("USDT", "USDC")},
+    ]
+
+
+def test_expand_grid_rejects_unknown_field():
+    with pytest.raises(ValueError):
+        expand_grid(base_params(), {"nope": [1]})
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_sweep_matches_individual_runs_and_is_ranked(max_workers, monkeypatch):
+    prices = make_prices()
+    grid = {"cooldown_days": [1, 10], "rebal_frac": [0.5, 1.0]}
+    pools = []
+
+    class RecordingPool(parameterSweep.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setattr(parameterSweep, "ProcessPoolExecutor", RecordingPool)
+
+    table = ParameterSweep(DynamicThresholdStrategy, base_params(), max_workers=max_workers).run(prices, make_wallet(), grid)
+
+    # Pas de fork du process appelant
+    assert all(pool._mp_context.get_start_method() == "spawn" for pool in pools)
+    assert len(pools) == (max_workers > 1)
+
+    assert len(table) == 4
+    assert table["sharpe"].is_monotonic_decreasing
+    assert table["error"].isna().all()
+    for _, row in table.iterrows():
+        params = base_params()
+        params.cooldown_days, params.rebal_frac = int(row["cooldown_days"]), float(row["rebal_frac"])
+        expected = backtest_metrics(DynamicThresholdStrategy(params).run(prices, make_wallet()))
+        assert row["final_value"] == pytest.approx(expected["final_value"], rel=1e-12)
+        assert row["total_cost"] == pytest.approx(expected["total_cost"], rel=1e-12)
+
+
+def test_sweep_records_failing_combination():
+    prices = make_prices(30)
+    wallet = {"items": [WalletItem(id=1, symbol="BTCEUR", amount=0.0001), WalletItem(id=2, symbol="ETHEUR", amount=0.0)]}
+    # Frais fixes supérieurs au capital : la combinaison échoue sans interrompre la grille
+    table = ParameterSweep(DynamicThresholdStrategy, base_params(), max_workers=1).run(
+        prices, wallet, {"fixed_fee": [0.0, 100.0]}, rank_by="max_drawdown"
+    )
+
+    failed = table[table["fixed_fee"] == 100.0].iloc[0]
+    assert "Capital insuffisant" in failed["error"]
+    assert np.isnan(failed["sharpe"])
+    assert table.iloc[-1]["fixed_fee"] == 100.0
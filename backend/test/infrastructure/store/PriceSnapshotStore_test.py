@@ -0,0 +1,172 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.infrastructure.store.priceSnapshotStore import PriceSnapshotStore
+
+
+def make_prices(start="2024-01-01", n=5, symbols=("BTCEUR", "ETHEUR")):
+    dates = pd.date_range(start, periods=n, freq="D", name="open_time")
+    data = np.arange(n * len(symbols), dtype=float).reshape(n, len(symbols)) + 1.0
+    return pd.DataFrame(data, index=dates, columns=pd.Index(list(symbols), name="symbol"))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceSnapshotStore(str(tmp_path))
+
+
+def test_read_returns_none_without_snapshot(store):
+    assert store.read("1d") is None
+    assert store.latestOpenTime("1d") is None
+
+
+def test_write_then_read_is_memory_mapped_and_read_only(store):
+    prices = make_prices()
+    store.write("1d", prices)
+
+    snapshot = store.read("1d")
+
+    pd.testing.assert_frame_equal(snapshot, prices, check_freq=False, check_index_type=False)
+    values = snapshot.to_numpy()
+    assert not values.flags.writeable
+    assert store.latestOpenTime("1d") == datetime(2024, 1, 5)
+
+
+def test_append_adds_rows_and_completes_last_row_in_new_files(store):
+    prices = make_prices()
+    prices.iloc[-1, 1] = np.nan  # ETH pas encore arrivée pour la dernière bougie
+    store.write("1d", prices)
+    before = store.read("1d")
+
+    update = pd.DataFrame(
+        {"ETHEUR": [99.0, 100.0], "BTCEUR": [50.0, 51.0]},
+        index=pd.DatetimeIndex(["2024-01-05", "2024-01-06"]),
+    )
+    store.append("1d", update)
+
+    # Un backtest en cours sur l'ancien mapping ne voit pas la ligne changer
+    assert np.isnan(before.loc["2024-01-05", "ETHEUR"])
+    snapshot = store.read("1d")
+    assert len(snapshot) == 6
+    # La dernière ligne stockée est complétée, les nouvelles valeurs l'emportent
+    assert snapshot.loc["2024-01-05", "ETHEUR"] == 99.0
+    assert snapshot.loc["2024-01-05", "BTCEUR"] == 50.0
+    assert snapshot.loc["2024-01-06"].tolist() == [51.0, 100.0]
+
+
+def test_append_with_new_symbol_rebuilds_snapshot(store):
+    store.write("1d", make_prices())
+
+    store.append("1d", make_prices(start="2024-01-03", n=2, symbols=("SOLEUR",)))
+
+    snapshot = store.read("1d")
+    assert list(snapshot.columns) == ["BTCEUR", "ETHEUR", "SOLEUR"]
+    assert snapshot["SOLEUR"].notna().sum() == 2
+    assert len(snapshot) == 5
+
+
+def test_trim_before_hides_then_compacts_old_rows(store):
+    store.write("1d", make_prices(n=10))
+
+    store.trimBefore("1d", datetime(2024, 1, 3))
+    assert store.read("1d").index[0] == pd.Timestamp("2024-01-03")
+
+    store.trimBefore("1d", datetime(2024, 1, 8))
+    snapshot = store.read("1d")
+    assert snapshot.index[0] == pd.Timestamp("2024-01-08")
+    assert len(snapshot) == 3
+    # Compaction : les anciens fichiers ont été remplacés
+    assert store._readMeta("1d")["offset"] == 0
+
+
+def test_refresh_reads_only_new_candles_from_repository(store):
+    class Repo:
+        timeframe = "1d"
+
+        def __init__(self):
+            self.starts = []
+            self.rows, self.generation, self.rewrite, self.purged_before = 5, 1, 0, None
+
+        def getDataVersion(self):
+            return self.generation, datetime(2024, 1, self.rows)
+
+        def getRewriteState(self):
+            return self.rewrite, self.purged_before
+
+        def getCloseMatrix(self, symbols=None, start=None, end=None):
+            self.starts.append(start)
+            full = make_prices(n=self.rows)
+            return full if start is None else full[full.index >= pd.Timestamp(start)]
+
+    repo = Repo()
+    store.refresh(repo)
+    repo.rows, repo.generation = 7, 3
+
+    store.refresh(repo)
+
+    assert repo.starts == [None, datetime(2024, 1, 5)]
+    pd.testing.assert_frame_equal(store.read("1d"), make_prices(n=7), check_freq=False, check_index_type=False)
+    assert store.isCurrent("1d", (3, datetime(2024, 1, 7)))
+    assert not store.isCurrent("1d", (4, datetime(2024, 1, 7)))
+
+    store.trimBefore("1d", datetime(2024, 1, 6))  # compaction : version conservée
+    assert store.isCurrent("1d", (3, datetime(2024, 1, 7)))
+
+    store.refresh(repo, full=True)  # déjà à jour : pas de relecture
+    assert repo.starts == [None, datetime(2024, 1, 5)]
+
+    # Purge en base : rétention appliquée sans relecture complète
+    repo.generation, repo.purged_before = 4, datetime(2024, 1, 7)
+    store.refresh(repo)
+    assert repo.starts[-1] == datetime(2024, 1, 7)
+    assert store.read("1d").index[0] == pd.Timestamp("2024-01-07")
+
+    # Réécriture sous la dernière bougie : reconstruction complète
+    repo.generation, repo.rewrite, repo.purged_before = 5, 1, None
+    store.refresh(repo)
+    assert repo.starts[-1] is None
+    assert len(store.read("1d")) == 7
+
+
+def test_writes_hold_an_inter_process_file_lock(store):
+    fcntl = pytest.importorskip("fcntl")
+    store.write("1d", make_prices())
+
+    with store._locked("1d"):
+        # Autre description de fichier ouverte = autre process pour flock
+        with open(f"{store.root}/1d/{store.LOCK}") as other:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    with open(f"{store.root}/1d/{store.LOCK}") as other:
+        fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        fcntl.flock(other, fcntl.LOCK_UN)
+
+
+def test_previous_generation_stays_readable_until_next_rewrite(store, tmp_path):
+    store.write("1d", make_prices())
+    stale = store._readMeta("1d")  # lecteur qui a lu meta.json sans avoir encore mappé
+
+    store.write("1d", make_prices(n=6))
+    pd.testing.assert_frame_equal(
+        store._frame("1d", stale), make_prices(), check_freq=False, check_index_type=False
+    )
+
+    store.write("1d", make_prices(n=7))
+    # Deux générations plus tard, les fichiers sont supprimés et read() relit meta.json
+    assert len(os.listdir(tmp_path / "1d")) == 6  # meta, verrou, 2 générations x 2 fichiers
+    assert len(store.read("1d")) == 7
+
+
+def test_unchanged_last_row_is_appended_without_rewrite(store):
+    store.write("1d", make_prices())
+    files = store._readMeta("1d")["close_file"]
+
+    store.append("1d", make_prices(n=6).iloc[-2:])
+
+    assert store._readMeta("1d")["close_file"] == files
+    assert len(store.read("1d")) == 6
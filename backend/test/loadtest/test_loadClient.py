@@ -0,0 +1,49 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from loadtest.loadClient import Route, RouteStats, run_load, summarize
+from loadtest.stubBinance import app as stub_app
+
+
+def test_stub_klines_are_aligned_limited_and_deterministic():
+    client = TestClient(stub_app)
+    day = 86_400_000
+    params = {"symbol": "btceur", "interval": "1d", "startTime": 10 * day + 1, "endTime": 20 * day, "limit": 5}
+
+    data = client.get("/api/v3/klines", params=params).json()
+
+    assert [c[0] for c in data] == [11 * day + i * day for i in range(5)]
+    assert data == client.get("/api/v3/klines", params=params).json()
+    assert float(data[0][3]) <= float(data[0][1]) <= float(data[0][2])
+    assert client.get("/api/v3/klines", params={**params, "interval": "7m"}).status_code == 400
+    assert float(client.get("/api/v3/ticker/price", params={"symbol": "BTCEUR"}).json()["price"]) > 0
+
+
+def test_summarize_reports_percentiles_and_errors():
+    stats = {"a": RouteStats(latencies=[i / 1000 for i in range(1, 101)], errors=2, statuses={200: 100, 500: 2})}
+
+    report = summarize(stats, elapsed=10.0)["a"]
+
+    assert report["requests"] == 102 and report["errors"] == 2
+    assert report["throughput"] == pytest.approx(10.0)
+    assert report["p50_ms"] == pytest.approx(50.5)
+    assert report["p99_ms"] == pytest.approx(99.01)
+    assert report["max_ms"] == pytest.approx(100.0)
+
+
+async def test_run_load_sends_requested_count_per_route():
+    app = FastAPI()
+
+    @app.get("/ok")
+    def ok():
+        return {}
+
+    routes = [Route("ok", "GET", "/ok"), Route("missing", "GET", "/missing")]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        stats, elapsed = await run_load(client, routes, concurrency=3, requests=4)
+
+    assert len(stats["ok"].latencies) == 4 and stats["ok"].errors == 0
+    assert stats["missing"].errors == 4 and stats["missing"].statuses == {404: 4}
+    assert elapsed > 0